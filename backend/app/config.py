@@ -15,14 +15,98 @@ class Settings:
     AI_PROVIDER: str = os.getenv("AI_PROVIDER", "gemini")  # "openai", "anthropic", or "gemini"
     AI_DEMO_MODE: bool = os.getenv("AI_DEMO_MODE", "true").lower() == "true"  # Default to demo mode
     
+    # Provider endpoints - override to point at a proxy or a local stand-in server
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
+    ANTHROPIC_BASE_URL: str = os.getenv("ANTHROPIC_BASE_URL", "")
+    GEMINI_API_ENDPOINT: str = os.getenv("GEMINI_API_ENDPOINT", "")
+    GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    
+    # Provider prompt-prefix caching for the static system prompts
+    PROMPT_CACHE_ENABLED: bool = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+    
+    # Model tiering - "provider=model" pairs override the default fast/quality models
+    MODEL_TIERING_ENABLED: bool = os.getenv("MODEL_TIERING_ENABLED", "true").lower() == "true"
+    FAST_MODELS: str = os.getenv("FAST_MODELS", "")
+    QUALITY_MODELS: str = os.getenv("QUALITY_MODELS", "")
+    TIER_LOAD_THRESHOLD: int = int(os.getenv("TIER_LOAD_THRESHOLD", "8"))  # in-flight generations
+    TIER_FAST_BELOW_SECONDS: float = float(os.getenv("TIER_FAST_BELOW_SECONDS", "15"))
+    
+    # Request deadlines - default budget plus "endpoint=seconds" overrides
+    REQUEST_DEADLINE_SECONDS: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+    REQUEST_DEADLINES: str = os.getenv("REQUEST_DEADLINES", "")
+    DEADLINE_FALLBACK_RESERVE_SECONDS: float = float(os.getenv("DEADLINE_FALLBACK_RESERVE_SECONDS", "0.5"))
+    
+    # Speculative pre-generation from partial surveys
+    SPECULATION_ENABLED: bool = os.getenv("SPECULATION_ENABLED", "true").lower() == "true"
+    SPECULATION_TTL_SECONDS: int = int(os.getenv("SPECULATION_TTL_SECONDS", "600"))
+    SPECULATION_MAX_ENTRIES: int = int(os.getenv("SPECULATION_MAX_ENTRIES", "256"))
+    # Speculations one client address may have pending - /prefetch is anonymous
+    SPECULATION_MAX_PER_CLIENT: int = int(os.getenv("SPECULATION_MAX_PER_CLIENT", "2"))
+    
+    # Prompt registry - "name=version" / "name=tokens" pairs, comma-separated
+    PROMPT_VERSIONS: str = os.getenv("PROMPT_VERSIONS", "")
+    PROMPT_BUDGETS: str = os.getenv("PROMPT_BUDGETS", "")
+    
+    # AI assistant - roadmap passages sent per question and the per-project retrieval cache
+    ASSISTANT_MAX_PASSAGES: int = int(os.getenv("ASSISTANT_MAX_PASSAGES", "6"))
+    RETRIEVAL_CACHE_PROJECTS: int = int(os.getenv("RETRIEVAL_CACHE_PROJECTS", "512"))
+    RETRIEVAL_CACHE_QUERIES: int = int(os.getenv("RETRIEVAL_CACHE_QUERIES", "32"))
+    
+    # Idempotency-Key support for expensive mutating endpoints
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_WAIT_SECONDS: int = int(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "60"))
+    
     # Database - SQLite by default, PostgreSQL for production
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./sanapath.db")
     
+    # Read replica for read-only endpoints (defaults to a separate pool on DATABASE_URL);
+    # a client that wrote is read from the primary for READ_YOUR_WRITES_SECONDS
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL", "")
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    READ_YOUR_WRITES_MAX_CLIENTS: int = int(os.getenv("READ_YOUR_WRITES_MAX_CLIENTS", "10000"))
+    # PostgreSQL only: run read-only endpoints in SET TRANSACTION READ ONLY
+    DB_READ_ONLY_TRANSACTIONS: bool = os.getenv("DB_READ_ONLY_TRANSACTIONS", "false").lower() == "true"
+    
+    # Unfiltered community listing total: "exact" (COUNT(*) per request) or "cached"
+    # (kept for COMMUNITY_TOTAL_TTL_SECONDS, dropped on publish in this process)
+    COMMUNITY_TOTAL_MODE: str = os.getenv("COMMUNITY_TOTAL_MODE", "exact")
+    COMMUNITY_TOTAL_TTL_SECONDS: float = float(os.getenv("COMMUNITY_TOTAL_TTL_SECONDS", "30"))
+    
+    # Recompute community project member counts from their collaborators this often
+    MEMBER_COUNT_RECONCILE_SECONDS: float = float(os.getenv("MEMBER_COUNT_RECONCILE_SECONDS", "3600"))
+    
+    # SQLite connection PRAGMAs (ignored for other databases)
+    SQLITE_TUNING_ENABLED: bool = os.getenv("SQLITE_TUNING_ENABLED", "true").lower() == "true"
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB
+    SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+    
     # JWT - Generate secure key if not provided
     SECRET_KEY: str = os.getenv("SECRET_KEY", "") or secrets.token_urlsafe(32)
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
     
+    # Threads for bcrypt hashing/verification - the cap on concurrent hashes
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    
+    # Verified JWT payloads cached until their exp (0 disables the cache)
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    
+    # Token revocation - per-worker Bloom filter over the revoked_tokens table
+    REVOCATION_REFRESH_SECONDS: float = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+    # Each refresh re-reads this much before the newest revocation seen, for rows committed late
+    REVOCATION_REFRESH_OVERLAP_SECONDS: float = float(os.getenv("REVOCATION_REFRESH_OVERLAP_SECONDS", "60"))
+    REVOCATION_REBUILD_SECONDS: float = float(os.getenv("REVOCATION_REBUILD_SECONDS", "3600"))
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+    
+    # Authenticated-user snapshots cached in process (TTL 0 disables the cache)
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    
     # OAuth - GitHub
     GITHUB_CLIENT_ID: str = os.getenv("GITHUB_CLIENT_ID", "")
     GITHUB_CLIENT_SECRET: str = os.getenv("GITHUB_CLIENT_SECRET", "")
@@ -31,10 +115,26 @@ class Settings:
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
     
+    # Firebase - ID tokens are verified locally against Google's signing keys
+    FIREBASE_PROJECT_ID: str = os.getenv("FIREBASE_PROJECT_ID", "")
+    FIREBASE_CERTS_URL: str = os.getenv(
+        "FIREBASE_CERTS_URL",
+        "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+    )
+    
     # OAuth - LinkedIn
     LINKEDIN_CLIENT_ID: str = os.getenv("LINKEDIN_CLIENT_ID", "")
     LINKEDIN_CLIENT_SECRET: str = os.getenv("LINKEDIN_CLIENT_SECRET", "")
     
+    # Shared outbound HTTP client (OAuth user info, key fetches)
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+    HTTP_READ_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "10"))
+    HTTP_POOL_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_POOL_TIMEOUT_SECONDS", "5"))
+    
     # URLs
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:5173")
     BACKEND_URL: str = os.getenv("BACKEND_URL", "http://localhost:8000")
@@ -57,6 +157,41 @@ class Settings:
         """Check if any AI API key is configured."""
         return bool(self.OPENAI_API_KEY or self.ANTHROPIC_API_KEY or self.GEMINI_API_KEY)
     
+    @staticmethod
+    def _parse_pairs(value: str) -> dict:
+        """Parse "a=1,b=2" into {"a": "1", "b": "2"}."""
+        pairs = {}
+        for item in value.split(","):
+            if "=" in item:
+                key, val = item.split("=", 1)
+                pairs[key.strip()] = val.strip()
+        return pairs
+    
+    @property
+    def prompt_versions(self) -> dict:
+        """Active prompt version overrides by prompt name."""
+        return self._parse_pairs(self.PROMPT_VERSIONS)
+    
+    @property
+    def prompt_budgets(self) -> dict:
+        """Input-token budget overrides by prompt name."""
+        return {k: int(v) for k, v in self._parse_pairs(self.PROMPT_BUDGETS).items()}
+    
+    @property
+    def fast_models(self) -> dict:
+        """Fast-tier model overrides by provider."""
+        return self._parse_pairs(self.FAST_MODELS)
+    
+    @property
+    def quality_models(self) -> dict:
+        """Quality-tier model overrides by provider."""
+        return self._parse_pairs(self.QUALITY_MODELS)
+    
+    @property
+    def request_deadlines(self) -> dict:
+        """Per-endpoint deadline overrides in seconds."""
+        return {k: float(v) for k, v in self._parse_pairs(self.REQUEST_DEADLINES).items()}
+    
     @property
     def cors_origins_list(self) -> list:
         """Get list of allowed CORS origins."""
@@ -1,18 +1,61 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+import hashlib
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from sqlalchemy import event, inspect, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, declarative_base
 from .config import settings
 
-# Handle SQLite vs PostgreSQL
-connect_args = {}
-if "sqlite" in settings.DATABASE_URL:
-    connect_args = {"check_same_thread": False}
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    future=True,
-    connect_args=connect_args
-)
+def sqlite_pragmas() -> list:
+    """PRAGMA statements applied to every new SQLite connection, from settings."""
+    return [
+        # WAL lets readers run alongside the single writer; with synchronous=NORMAL
+        # a commit no longer fsyncs (the WAL is synced at checkpoints instead)
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        # Wait for a competing writer instead of failing with "database is locked"
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+    ]
+
+
+def configure_sqlite(async_engine: AsyncEngine) -> AsyncEngine:
+    """Apply the tuning PRAGMAs whenever the pool opens a new connection."""
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return async_engine
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    async_engine = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
+    if "sqlite" in url and settings.SQLITE_TUNING_ENABLED:
+        configure_sqlite(async_engine)
+    return async_engine
+
+
+# Primary for writes (and reads that must see them), replica - or a separate
+# pool on the primary - for read-only traffic
+engine = _create_engine(settings.DATABASE_URL)
+read_engine = _create_engine(settings.DATABASE_READ_URL or settings.DATABASE_URL)
 
 async_session = async_sessionmaker(
     engine,
@@ -20,19 +63,166 @@ async_session = async_sessionmaker(
     expire_on_commit=False
 )
 
+# Read-only sessions never flush, so nothing can be written by accident
+read_session = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False
+)
+
+primary_read_session = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False
+)
+
 Base = declarative_base()
 
-async def get_db():
+
+# Sessions remember whether the current transaction wrote anything, so get_db
+# commits once - and not at all after a handler that already committed
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_soft_rollback")
+def _transaction_ended(session, *args):
+    session.info.pop("has_writes", None)
+
+
+_DIALECT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": pg_insert,
+}
+
+
+def dialect_insert(session: AsyncSession):
+    """The session dialect's ``insert`` with ON CONFLICT support, or None if it has none."""
+    return _DIALECT_INSERTS.get(session.bind.dialect.name)
+
+
+def has_pending_writes(session: AsyncSession) -> bool:
+    return bool(session.new or session.dirty or session.deleted or session.info.get("has_writes"))
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReadYourWrites:
+    """
+    Clients that wrote recently, so their reads go to the primary until the
+    replica has caught up. Clients are identified by their Authorization header
+    (or address). Tracked per process - behind several workers, keep the
+    window above the replication lag and use sticky sessions.
+    """
+
+    def __init__(self, window_seconds: float, max_clients: int):
+        self.window_seconds = window_seconds
+        self.max_clients = max_clients
+        self._writes: "OrderedDict[str, float]" = OrderedDict()
+        self.stats = {"read_engine": 0, "primary": 0}
+
+    @staticmethod
+    def client_key(request: Request) -> str:
+        identity = request.headers.get("authorization") or (request.client.host if request.client else "")
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def mark_write(self, request: Request) -> None:
+        key = self.client_key(request)
+        self._writes[key] = time.monotonic() + self.window_seconds
+        self._writes.move_to_end(key)
+        while len(self._writes) > self.max_clients:
+            self._writes.popitem(last=False)
+
+    def must_read_primary(self, request: Request) -> bool:
+        key = self.client_key(request)
+        until = self._writes.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._writes[key]
+            return False
+        return True
+
+
+read_your_writes = ReadYourWrites(
+    window_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    max_clients=settings.READ_YOUR_WRITES_MAX_CLIENTS,
+)
+
+
+async def get_db(request: Request = None):
+    """Session for endpoints that write. Commits once, only if there is something to commit."""
     async with async_session() as session:
         try:
             yield session
-            await session.commit()
+            if has_pending_writes(session):
+                await session.commit()
+            if request is not None and request.method not in SAFE_METHODS:
+                read_your_writes.mark_write(request)
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
 
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only endpoints: the read engine, or the primary for a
+    client that wrote within the read-your-writes window. Never flushes or
+    commits; the transaction is simply rolled back when the session closes.
+    """
+    if read_your_writes.must_read_primary(request):
+        read_your_writes.stats["primary"] += 1
+        factory = primary_read_session
+    else:
+        read_your_writes.stats["read_engine"] += 1
+        factory = read_session
+    async with factory() as session:
+        if settings.DB_READ_ONLY_TRANSACTIONS and session.bind.dialect.name == "postgresql":
+            # Costs a statement, but the server rejects any write and can skip write bookkeeping
+            await session.execute(text("SET TRANSACTION READ ONLY"))
+        yield session
+
+
+def _add_missing_columns(sync_conn) -> None:
+    # create_all skips existing tables, so columns added later are created here;
+    # such columns need a server default (or to be nullable)
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(sync_conn.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            sync_conn.exec_driver_sql(ddl)
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    # create_all skips existing tables, so indexes added later are created here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_create_missing_indexes)
@@ -0,0 +1,219 @@
+"""
+Idempotency-Key support for expensive mutating endpoints.
+
+A retried request carrying the same ``Idempotency-Key`` gets the stored response
+of the first one instead of triggering another LLM generation or inserting
+duplicate rows. A retry that arrives while the first request is still running
+waits for its result.
+"""
+import asyncio
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from .config import settings
+from .database import get_db
+from .models.idempotency import IdempotencyKey
+from .services.auth import verify_token
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Mutating endpoints that are expensive or non-idempotent
+IDEMPOTENT_ROUTES = {
+    ("POST", "/api/survey/submit"),
+    ("POST", "/api/community/publish"),
+    ("POST", "/projects/start"),
+}
+
+# How often a waiting request re-checks a key owned by another worker
+POLL_INTERVAL_SECONDS = 0.1
+
+
+def _error(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": True, "error_code": "IDEMPOTENCY_ERROR", "message": message}
+    )
+
+
+def _replay(body: bytes, status_code: int, raw_headers: List[Tuple[bytes, bytes]]) -> Response:
+    # raw_headers, not a dict: repeated headers such as Set-Cookie must all survive
+    response = Response(content=body, status_code=status_code)
+    response.raw_headers = list(raw_headers)
+    return response
+
+
+def _caller(request: Request) -> str:
+    """Authenticated user id, so keys from different users never collide."""
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        payload = verify_token(auth[7:])
+        if payload and payload.get("sub"):
+            return payload["sub"]
+    return "anonymous"
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    """Replays stored responses for repeated Idempotency-Key requests."""
+
+    def __init__(self, app, routes: Iterable = IDEMPOTENT_ROUTES):
+        super().__init__(app)
+        self.routes = set(routes)
+        # In-process waiters; requests on other workers fall back to polling
+        self._inflight: Dict[str, asyncio.Event] = {}
+
+    @asynccontextmanager
+    async def _session(self, request: Request):
+        # Honour dependency overrides so tests hit the same database as the routes
+        provider = request.app.dependency_overrides.get(get_db, get_db)
+        async with asynccontextmanager(provider)() as session:
+            yield session
+
+    async def dispatch(self, request: Request, call_next):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or (request.method, request.url.path) not in self.routes:
+            return await call_next(request)
+        if len(key) > 255:
+            return _error(400, f"{IDEMPOTENCY_HEADER} must be at most 255 characters")
+
+        scope = f"{request.method} {request.url.path}|{_caller(request)}"
+        request_hash = hashlib.sha256(await request.body()).hexdigest()
+        slot = f"{scope}|{key}"
+
+        stored = await self._claim(request, scope, key, request_hash)
+        if stored is not None:
+            return stored
+
+        event = self._inflight[slot] = asyncio.Event()
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            await self._finish(request, scope, key, response, body)
+            return _replay(body, response.status_code, response.headers.raw)
+        except BaseException:
+            # Cancellation (client disconnect) included - otherwise retries would get
+            # 409 until the lease expires; shielded so the release itself completes
+            await asyncio.shield(self._release(request, scope, key))
+            raise
+        finally:
+            event.set()
+            self._inflight.pop(slot, None)
+
+    async def _claim(self, request: Request, scope: str, key: str, request_hash: str) -> Optional[Response]:
+        """Claim the key for this request, or return the response a retry should get."""
+        deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            async with self._session(request) as db:
+                result = await db.execute(
+                    select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+                )
+                record = result.scalar_one_or_none()
+                if record is not None and record.expires_at <= datetime.utcnow():
+                    await db.delete(record)
+                    await db.flush()
+                    record = None
+                
+                if record is None:
+                    db.add(IdempotencyKey(
+                        scope=scope,
+                        key=key,
+                        request_hash=request_hash,
+                        status="in_progress",
+                        expires_at=datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_WAIT_SECONDS)
+                    ))
+                    try:
+                        await db.commit()
+                        return None
+                    except IntegrityError:
+                        # Another request claimed the key between our read and insert
+                        await db.rollback()
+                        continue
+                
+                if record.request_hash != request_hash:
+                    return _error(422, f"{IDEMPOTENCY_HEADER} was already used with a different request body")
+                if record.status == "completed":
+                    if record.response_headers is None:
+                        # Stored before headers were kept
+                        return Response(
+                            content=record.response_body,
+                            status_code=record.status_code,
+                            media_type=record.content_type,
+                            headers={REPLAYED_HEADER: "true"}
+                        )
+                    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record.response_headers]
+                    headers.append((REPLAYED_HEADER.lower().encode("latin-1"), b"true"))
+                    return _replay(record.response_body, record.status_code, headers)
+            
+            # The first request is still running - wait for it to finish
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return _error(409, "A request with this Idempotency-Key is still being processed")
+            event = self._inflight.get(f"{scope}|{key}")
+            try:
+                if event is not None:
+                    await asyncio.wait_for(event.wait(), timeout=remaining)
+                else:
+                    await asyncio.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _finish(self, request: Request, scope: str, key: str, response: Response, body: bytes) -> None:
+        if response.status_code >= 500:
+            # Server errors are not final - let a retry run the request again
+            await self._release(request, scope, key)
+            return
+        async with self._session(request) as db:
+            result = await db.execute(
+                select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+            )
+            record = result.scalar_one_or_none()
+            if record is not None:
+                record.status = "completed"
+                record.status_code = response.status_code
+                record.content_type = response.headers.get("content-type")
+                record.response_body = body
+                record.response_headers = [
+                    [name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers.raw
+                ]
+                record.expires_at = datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+
+    async def _release(self, request: Request, scope: str, key: str) -> None:
+        async with self._session(request) as db:
+            await db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.scope == scope,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.status == "in_progress"
+                )
+            )
+
+
+async def purge_expired_keys(session_factory) -> int:
+    """Delete expired idempotency records. Returns the number removed."""
+    async with session_factory() as db:
+        result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+        await db.commit()
+        return result.rowcount or 0
+
+
+async def purge_expired_keys_periodically(session_factory, interval_seconds: int = 3600) -> None:
+    """Background TTL cleanup, started from the application lifespan."""
+    while True:
+        try:
+            removed = await purge_expired_keys(session_factory)
+            if removed:
+                logger.info(f"Purged {removed} expired idempotency keys")
+        except Exception as e:
+            logger.warning(f"Idempotency key cleanup failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -1,19 +1,41 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from .routes import survey, community, auth
+from .routes import survey, community, auth, metrics, ai
 from .routers import projects, users
-from .database import init_db
+from .database import init_db, async_session, engine
 from .config import settings
+from .idempotency import IdempotencyMiddleware, purge_expired_keys_periodically
+from .services.http_client import outbound_http
+from .services.revocation import purge_expired_revocations_periodically
+from .services.terms import backfill_project_terms_logged
+from .services.search import init_search_index
+from .services.membership import reconcile_member_counts_periodically
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Initialize database tables
     await init_db()
+    # Tables created before full-text search get its index (and backfill) here
+    await init_search_index(engine)
+    await outbound_http.start()
+    idempotency_cleanup = asyncio.create_task(purge_expired_keys_periodically(async_session))
+    revocation_cleanup = asyncio.create_task(purge_expired_revocations_periodically(async_session))
+    # Projects published before the technology/tag tables existed
+    term_backfill = asyncio.create_task(backfill_project_terms_logged(async_session))
+    member_count_reconciliation = asyncio.create_task(
+        reconcile_member_counts_periodically(async_session, settings.MEMBER_COUNT_RECONCILE_SECONDS)
+    )
     yield
     # Shutdown: cleanup if needed
+    idempotency_cleanup.cancel()
+    revocation_cleanup.cancel()
+    term_backfill.cancel()
+    member_count_reconciliation.cancel()
+    await outbound_http.aclose()
 
 
 app = FastAPI(
@@ -25,6 +47,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Replay stored responses for retried Idempotency-Key requests
+app.add_middleware(IdempotencyMiddleware)
+
 # Session middleware for OAuth
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
 
@@ -43,6 +68,8 @@ app.include_router(survey.router)
 app.include_router(community.router)
 app.include_router(projects.router)
 app.include_router(users.router)
+app.include_router(ai.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, LargeBinary, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Stored outcome of a mutating request sent with an ``Idempotency-Key`` header
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("scope", "key", name="uq_idempotency_scope_key"),)
+    
+    id = Column(Integer, primary_key=True)
+    
+    # "<METHOD> <path>|<user>" - keys are only unique per endpoint and caller
+    scope = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)
+    
+    # "in_progress" until the first request finishes, then "completed"
+    status = Column(String, nullable=False, default="in_progress")
+    status_code = Column(Integer, nullable=True)
+    content_type = Column(String, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    # [name, value] pairs as sent, repeated headers (Set-Cookie, Vary) included
+    response_headers = Column(JSON, nullable=True)
+    
+    # Timestamps - expires_at is naive UTC; while in progress it is a short lease
+    # so a key abandoned by a crashed worker can be claimed again
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
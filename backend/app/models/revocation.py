@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class RevokedToken(Base):
+    """
+    Access token revoked before its expiry, identified by its ``jti`` claim
+    """
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True)
+    jti = Column(String, unique=True, nullable=False)
+    
+    # Naive UTC expiry of the token itself - the row is useless after it
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Workers read the rows revoked since their last refresh (plus an overlap)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -34,6 +34,27 @@ class SurveyResponse(BaseModel):
     team_preference: str = Field(..., description="Solo or team preference")
     collaboration_tools: List[str] = Field(..., description="Familiar collaboration tools")
 
+class PartialSurveyResponse(BaseModel):
+    """Survey answers known after step 4 - used for speculative pre-generation."""
+    # Personal Information
+    name: str = Field(..., description="Student's name")
+    email: Optional[str] = Field(None, description="Student's email")
+    university: Optional[str] = Field(None, description="University/Institution name")
+
+    # Skills Assessment
+    programming_languages: List[str] = Field(..., description="Known programming languages")
+    skill_level: SkillLevel = Field(..., description="Overall skill level")
+    ai_ml_experience: str = Field(..., description="Experience with AI/ML")
+
+    # Interests
+    interest_areas: List[str] = Field(..., description="Areas of interest in AI")
+    preferred_project_type: str = Field(..., description="Type of project preferred")
+    industry_interest: List[str] = Field(..., description="Industries of interest")
+
+    # Goals
+    career_goal: str = Field(..., description="Primary career goal")
+    learning_style: str = Field(..., description="Preferred learning style")
+
 class TaskResource(BaseModel):
     title: str
     url: str
@@ -67,6 +88,14 @@ class RecommendationResponse(BaseModel):
     recommendations: List[ProjectRecommendation]
     personalization_summary: str
 
+class RoadmapRegenerateRequest(BaseModel):
+    week: int = Field(..., description="Week number to regenerate")
+    task_index: Optional[int] = Field(None, ge=0, description="Regenerate only this task of the week (0-based)")
+    instructions: Optional[str] = Field(None, max_length=500, description="What the student wants changed")
+
+class RecommendationRegenerateRequest(RoadmapRegenerateRequest):
+    project_index: int = Field(..., ge=0, description="Which recommended project to edit (0-based)")
+
 class CommunityProject(BaseModel):
     id: str
     title: str
@@ -1,20 +1,63 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Table, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
 import uuid
 
+# Timestamps used as pagination keys. SQLite's CURRENT_TIMESTAMP has no
+# fractional seconds, so values bound from Python are stored (and compared)
+# without them as well - otherwise a row never equals its own cursor
+PaginationTimestamp = DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
 # Association table for project collaborators
 project_collaborators = Table(
     'project_collaborators',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
     Column('project_id', Integer, ForeignKey('projects.id'), primary_key=True),
-    Column('joined_at', DateTime, server_default=func.now())
+    Column('joined_at', DateTime, server_default=func.now()),
+    # The primary key leads with user_id; loading a project's members needs project_id first
+    Index('ix_project_collaborators_project', 'project_id', 'user_id')
+)
+
+
+class Term(Base):
+    """
+    Interned technology/tag name - projects reference terms by id so filters are index lookups
+    """
+    __tablename__ = "terms"
+    
+    id = Column(Integer, primary_key=True)
+    # Canonical form: trimmed, lower-case, single spaces
+    name = Column(String, unique=True, nullable=False)
+
+
+# Technologies and tags of community projects, mirrored from the JSON columns.
+# Keyed term-first, so "projects using X" is a range of the primary key
+project_technologies = Table(
+    'project_technologies',
+    Base.metadata,
+    Column('term_id', Integer, ForeignKey('terms.id'), primary_key=True),
+    Column('project_id', Integer, ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_project_technologies_project', 'project_id')
 )
 
+project_tags = Table(
+    'project_tags',
+    Base.metadata,
+    Column('term_id', Integer, ForeignKey('terms.id'), primary_key=True),
+    Column('project_id', Integer, ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_project_tags_project', 'project_id')
+)
+
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # OAuth callbacks look users up by their provider identity
+        Index("ix_users_provider_identity", "provider", "provider_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     uuid = Column(String, unique=True, default=lambda: str(uuid.uuid4()))
@@ -58,11 +101,22 @@ class User(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Community board: published projects, newest first. On PostgreSQL the
+        # filter columns are included so filtered counts are index-only scans
+        Index(
+            "ix_projects_published_created",
+            "is_published",
+            "created_at",
+            "id",
+            postgresql_include=["difficulty_level", "looking_for_collaborators"],
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     uuid = Column(String, unique=True, default=lambda: str(uuid.uuid4()))
     
-    # Project info
+    # Project info - tech_stack/tags are also indexed in project_technologies/project_tags
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     difficulty_level = Column(String, nullable=True)
@@ -77,9 +131,11 @@ class Project(Base):
     is_published = Column(Boolean, default=False)
     looking_for_collaborators = Column(Boolean, default=True)
     max_team_size = Column(Integer, default=4)
+    # Owner plus collaborators, maintained by services/membership.py
+    member_count = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Owner
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     owner = relationship("User", back_populates="owned_projects")
     
     # Collaborators
@@ -90,12 +146,12 @@ class Project(Base):
     )
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(PaginationTimestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     @property
     def current_members(self):
-        return len(self.collaborators) + 1  # +1 for owner
+        return self.member_count
 
 
 class Recommendation(Base):
@@ -124,6 +180,10 @@ class UserProject(Base):
     Tracks user's active/completed projects (started from recommendations)
     """
     __tablename__ = "user_projects"
+    __table_args__ = (
+        # "My projects": one user's projects, most recently started first
+        Index("ix_user_projects_user_started", "user_id", "started_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     uuid = Column(String, unique=True, default=lambda: str(uuid.uuid4()))
@@ -157,6 +217,6 @@ class UserProject(Base):
     estimated_hours = Column(Integer, nullable=True)
     
     # Timestamps
-    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(PaginationTimestamp, server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
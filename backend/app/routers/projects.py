@@ -1,20 +1,28 @@
 """
 API router for user projects (started projects from recommendations)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections import Counter
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 import json
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.user import User, UserProject
+from ..models.survey import RoadmapRegenerateRequest
 from ..services.auth import get_current_user
+from ..services.regeneration import regenerate_roadmap
+from ..services.deadline import Deadline, request_deadline
+from ..services.pagination import before_cursor, fetch_page
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+# "My projects" page size when a cursor is given without a limit
+DEFAULT_PAGE_SIZE = 20
+
 
 # Pydantic models
 class RoadmapWeek(BaseModel):
@@ -72,6 +80,7 @@ class ProjectListResponse(BaseModel):
     total: int
     active_count: int
     completed_count: int
+    next_cursor: Optional[str] = None
 
 
 # Demo project templates for when user is not authenticated
@@ -158,24 +167,37 @@ async def start_project(
 @router.get("/my-projects", response_model=ProjectListResponse)
 async def get_my_projects(
     status_filter: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size; omit to get every project"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all projects for current user
+    Get all projects for current user, most recently started first.
+    With ``limit`` (or ``cursor``) one page is returned, plus the cursor of the next.
     """
-    query = select(UserProject).where(UserProject.user_id == current_user.id)
+    conditions = [UserProject.user_id == current_user.id]
     
     if status_filter:
-        query = query.where(UserProject.status == status_filter)
+        conditions.append(UserProject.status == status_filter)
     
-    query = query.order_by(UserProject.started_at.desc())
+    query = select(UserProject).where(*conditions).order_by(UserProject.started_at.desc(), UserProject.id.desc())
     
-    result = await db.execute(query)
-    projects = result.scalars().all()
-    
-    active_count = sum(1 for p in projects if p.status == "active")
-    completed_count = sum(1 for p in projects if p.status == "completed")
+    next_cursor = None
+    if limit is None and cursor is None:
+        result = await db.execute(query)
+        projects = result.scalars().all()
+        counts = Counter(p.status for p in projects)
+    else:
+        if cursor:
+            query = query.where(before_cursor(UserProject.started_at, UserProject.id, cursor))
+        projects, next_cursor = await fetch_page(
+            db, query, limit or DEFAULT_PAGE_SIZE, lambda p: (p.started_at, p.id)
+        )
+        # Counts cover every project, not just this page
+        counts = Counter(dict((await db.execute(
+            select(UserProject.status, func.count()).where(*conditions).group_by(UserProject.status)
+        )).all()))
     
     return ProjectListResponse(
         projects=[
@@ -201,16 +223,17 @@ async def get_my_projects(
             )
             for p in projects
         ],
-        total=len(projects),
-        active_count=active_count,
-        completed_count=completed_count
+        total=sum(counts.values()),
+        active_count=counts["active"],
+        completed_count=counts["completed"],
+        next_cursor=next_cursor
     )
 
 
 @router.get("/{project_uuid}", response_model=ProjectResponse)
 async def get_project(
     project_uuid: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -325,6 +348,69 @@ async def update_project(
     )
 
 
+@router.post("/{project_uuid}/regenerate", response_model=ProjectResponse)
+async def regenerate_project_roadmap(
+    project_uuid: str,
+    request: RoadmapRegenerateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    deadline: Deadline = Depends(request_deadline("roadmap_regenerate"))
+):
+    """
+    Regenerate a single roadmap week (or one task of it) and patch it in place
+    """
+    result = await db.execute(
+        select(UserProject).where(
+            UserProject.uuid == project_uuid,
+            UserProject.user_id == current_user.id
+        )
+    )
+    project = result.scalar_one_or_none()
+    
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    context = {
+        "title": project.title,
+        "description": project.description,
+        "difficulty": project.difficulty,
+        "tech_stack": project.tech_stack or [],
+    }
+    try:
+        project.roadmap = await regenerate_roadmap(
+            context, project.roadmap or [], request.week, request.task_index, request.instructions, deadline
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    
+    await db.commit()
+    await db.refresh(project)
+    
+    return ProjectResponse(
+        id=project.id,
+        uuid=project.uuid,
+        title=project.title,
+        description=project.description,
+        category=project.category,
+        difficulty=project.difficulty,
+        tech_stack=project.tech_stack or [],
+        learning_goals=project.learning_goals or [],
+        skills_gained=project.skills_gained or [],
+        roadmap=project.roadmap or [],
+        status=project.status,
+        progress_percent=project.progress_percent,
+        current_week=project.current_week,
+        completed_tasks=project.completed_tasks or [],
+        total_hours_spent=project.total_hours_spent,
+        estimated_hours=project.estimated_hours,
+        started_at=project.started_at,
+        completed_at=project.completed_at
+    )
+
+
 @router.delete("/{project_uuid}")
 async def delete_project(
     project_uuid: str,
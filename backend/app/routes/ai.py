@@ -0,0 +1,97 @@
+"""
+AI assistant routes - project help over the student's roadmap and quick project ideas
+"""
+import json
+from typing import List, Union
+
+import msgspec
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_read_db
+from ..models.user import User, UserProject
+from ..services.assistant import generate_idea, retrieve, stream_help
+from ..services.auth import get_current_user
+from ..services.deadline import Deadline, request_deadline
+
+router = APIRouter(prefix="/api/ai", tags=["AI"])
+
+
+class ProjectHelpRequest(BaseModel):
+    project_id: Union[int, str]
+    question: str = Field(..., min_length=1, max_length=1000)
+
+
+class ProjectIdeaRequest(BaseModel):
+    interests: List[str] = Field(default_factory=list, max_length=10)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/help")
+async def project_help(
+    request: ProjectHelpRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    deadline: Deadline = Depends(request_deadline("ai_assistant"))
+):
+    """
+    Answer a question about one of the user's projects using the relevant parts of its roadmap.
+    Streams Server-Sent Events (sources, token..., done) when the client accepts text/event-stream.
+    """
+    project_filter = UserProject.uuid == str(request.project_id)
+    if str(request.project_id).isdigit():
+        project_filter = or_(project_filter, UserProject.id == int(request.project_id))
+    result = await db.execute(
+        select(UserProject).where(project_filter, UserProject.user_id == current_user.id)
+    )
+    project = result.scalar_one_or_none()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    context = {
+        "title": project.title,
+        "description": project.description,
+        "tech_stack": project.tech_stack or [],
+    }
+    passages = retrieve(project.uuid, project.roadmap or [], request.question)
+    sources = [passage.to_dict() for passage in passages]
+    answer = stream_help(context, passages, request.question, deadline)
+
+    if "text/event-stream" not in http_request.headers.get("accept", ""):
+        return {"answer": "".join([chunk async for chunk in answer]), "sources": sources}
+
+    async def events():
+        yield _sse("sources", sources)
+        try:
+            async for chunk in answer:
+                yield _sse("token", {"text": chunk})
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/generate-idea")
+async def generate_project_idea(
+    request: ProjectIdeaRequest,
+    deadline: Deadline = Depends(request_deadline("ai_assistant"))
+):
+    """
+    Suggest one project idea (with a roadmap) for the given interests.
+    """
+    idea = await generate_idea(request.interests, deadline)
+    return Response(content=msgspec.json.encode(idea), media_type="application/json")
+
@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from datetime import timedelta
+from datetime import datetime, timedelta
+from typing import Optional
 import httpx
 
 from ..config import settings
 from ..database import get_db
 from ..models.user import User
-from ..services.auth import create_access_token, get_current_user
+from ..services.auth import create_access_token, get_current_user, security, verify_token
+from ..services.revocation import revocation_list
 from ..services.oauth import oauth
+from ..services.http_client import get_http_client
+from ..services.firebase import FirebaseTokenError, verify_firebase_token
+from ..services.users import upsert_login_user
 from pydantic import BaseModel, EmailStr
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
@@ -28,35 +33,39 @@ class FirebaseVerifyRequest(BaseModel):
 @router.post("/firebase/verify")
 async def firebase_verify(request: FirebaseVerifyRequest, db: AsyncSession = Depends(get_db)):
     """Verify Firebase token and create/get user in our database"""
-    # In production, you should verify the Firebase token with Firebase Admin SDK
-    # For now, we trust the token since it comes from Firebase client
+    email = request.email
+    avatar_url = request.avatar_url
+    if settings.FIREBASE_PROJECT_ID:
+        # Signature and claims are checked locally against Google's cached public keys
+        try:
+            claims = await verify_firebase_token(request.token)
+        except FirebaseTokenError as e:
+            raise HTTPException(status_code=401, detail=f"Invalid Firebase token: {str(e)}")
+        if not claims.get("email"):
+            raise HTTPException(status_code=401, detail="Firebase token has no email")
+        # The token is the source of truth for identity, not the request body
+        email = claims["email"]
+        avatar_url = avatar_url or claims.get("picture")
+    elif not settings.DEMO_MODE:
+        # Without a project id the client-supplied identity is only trusted in demo mode
+        raise HTTPException(status_code=503, detail="Firebase verification is not configured")
     
-    # Find or create user by email
-    result = await db.execute(select(User).where(User.email == request.email))
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        # Create new user
-        user = User(
-            email=request.email,
-            name=request.name,
-            avatar_url=request.avatar_url or f"https://api.dicebear.com/7.x/avataaars/svg?seed={request.email}",
-            provider=request.provider,
-            provider_id=f"firebase_{request.email}"
-        )
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-    else:
-        # Update user info if needed
-        if request.name and request.name != user.name:
-            user.name = request.name
-        if request.avatar_url and request.avatar_url != user.avatar_url:
-            user.avatar_url = request.avatar_url
-        if request.provider and request.provider != user.provider:
-            user.provider = request.provider
-        await db.commit()
-        await db.refresh(user)
+    # One SELECT for a returning user; a single upsert when the profile changed
+    user = await upsert_login_user(
+        db,
+        email,
+        create={
+            "name": request.name,
+            "avatar_url": avatar_url or f"https://api.dicebear.com/7.x/avataaars/svg?seed={email}",
+            "provider": request.provider,
+            "provider_id": f"firebase_{email}",
+        },
+        update={
+            key: value
+            for key, value in (("name", request.name), ("avatar_url", avatar_url), ("provider", request.provider))
+            if value
+        },
+    )
     
     # Create JWT token for our backend
     access_token = create_access_token(
@@ -94,62 +103,49 @@ async def login_google(request: Request):
 
 
 @router.get("/callback/github")
-async def callback_github(request: Request, db: AsyncSession = Depends(get_db)):
+async def callback_github(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
     """Handle GitHub OAuth callback"""
     try:
         token = await oauth.github.authorize_access_token(request)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"OAuth error: {str(e)}")
     
-    # Get user info from GitHub
-    async with httpx.AsyncClient() as client:
+    # Get user info from GitHub (shared client - the connection is reused across logins)
+    resp = await client.get(
+        "https://api.github.com/user",
+        headers={"Authorization": f"Bearer {token['access_token']}"}
+    )
+    github_user = resp.json()
+    
+    # Get email (might need separate request if private)
+    email = github_user.get("email")
+    if not email:
         resp = await client.get(
-            "https://api.github.com/user",
+            "https://api.github.com/user/emails",
             headers={"Authorization": f"Bearer {token['access_token']}"}
         )
-        github_user = resp.json()
-        
-        # Get email (might need separate request if private)
-        email = github_user.get("email")
-        if not email:
-            resp = await client.get(
-                "https://api.github.com/user/emails",
-                headers={"Authorization": f"Bearer {token['access_token']}"}
-            )
-            emails = resp.json()
-            primary_email = next((e for e in emails if e.get("primary")), None)
-            email = primary_email["email"] if primary_email else f"{github_user['id']}@github.local"
+        emails = resp.json()
+        primary_email = next((e for e in emails if e.get("primary")), None)
+        email = primary_email["email"] if primary_email else f"{github_user['id']}@github.local"
     
-    # Find or create user
-    result = await db.execute(
-        select(User).where(User.provider == "github", User.provider_id == str(github_user["id"]))
+    # Find, link (same email, other provider) or create the user
+    github_id = str(github_user["id"])
+    user = await upsert_login_user(
+        db,
+        email,
+        create={
+            "name": github_user.get("name") or github_user.get("login"),
+            "avatar_url": github_user.get("avatar_url"),
+            "provider": "github",
+            "provider_id": github_id,
+        },
+        update={"provider": "github", "provider_id": github_id, "avatar_url": github_user.get("avatar_url")},
+        provider_identity=("github", github_id),
     )
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        # Check if email already exists with different provider
-        result = await db.execute(select(User).where(User.email == email))
-        existing_user = result.scalar_one_or_none()
-        
-        if existing_user:
-            # Link accounts - update provider info
-            existing_user.provider = "github"
-            existing_user.provider_id = str(github_user["id"])
-            existing_user.avatar_url = github_user.get("avatar_url")
-            user = existing_user
-        else:
-            # Create new user
-            user = User(
-                email=email,
-                name=github_user.get("name") or github_user.get("login"),
-                avatar_url=github_user.get("avatar_url"),
-                provider="github",
-                provider_id=str(github_user["id"])
-            )
-            db.add(user)
-        
-        await db.commit()
-        await db.refresh(user)
     
     # Create JWT token
     access_token = create_access_token(
@@ -164,7 +160,11 @@ async def callback_github(request: Request, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/callback/google")
-async def callback_google(request: Request, db: AsyncSession = Depends(get_db)):
+async def callback_google(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
     """Handle Google OAuth callback"""
     try:
         token = await oauth.google.authorize_access_token(request)
@@ -174,46 +174,25 @@ async def callback_google(request: Request, db: AsyncSession = Depends(get_db)):
     # Get user info from token (Google includes it in the id_token)
     user_info = token.get("userinfo")
     if not user_info:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                "https://www.googleapis.com/oauth2/v3/userinfo",
-                headers={"Authorization": f"Bearer {token['access_token']}"}
-            )
-            user_info = resp.json()
+        resp = await client.get(
+            "https://www.googleapis.com/oauth2/v3/userinfo",
+            headers={"Authorization": f"Bearer {token['access_token']}"}
+        )
+        user_info = resp.json()
     
     google_id = user_info.get("sub")
     email = user_info.get("email")
     name = user_info.get("name")
     picture = user_info.get("picture")
     
-    # Find or create user
-    result = await db.execute(
-        select(User).where(User.provider == "google", User.provider_id == str(google_id))
+    # Find, link (same email, other provider) or create the user
+    user = await upsert_login_user(
+        db,
+        email,
+        create={"name": name, "avatar_url": picture, "provider": "google", "provider_id": str(google_id)},
+        update={"provider": "google", "provider_id": str(google_id), "avatar_url": picture},
+        provider_identity=("google", str(google_id)),
     )
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        # Check if email already exists
-        result = await db.execute(select(User).where(User.email == email))
-        existing_user = result.scalar_one_or_none()
-        
-        if existing_user:
-            existing_user.provider = "google"
-            existing_user.provider_id = str(google_id)
-            existing_user.avatar_url = picture
-            user = existing_user
-        else:
-            user = User(
-                email=email,
-                name=name,
-                avatar_url=picture,
-                provider="google",
-                provider_id=str(google_id)
-            )
-            db.add(user)
-        
-        await db.commit()
-        await db.refresh(user)
     
     # Create JWT token
     access_token = create_access_token(
@@ -250,8 +229,14 @@ async def get_me(user: User = Depends(get_current_user)):
 
 
 @router.post("/logout")
-async def logout():
-    """Logout (client should remove the token)"""
+async def logout(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: AsyncSession = Depends(get_db)
+):
+    """Logout - revokes the bearer token if one is sent (client should still remove it)"""
+    payload = verify_token(credentials.credentials) if credentials else None
+    if payload and payload.get("jti"):
+        await revocation_list.revoke(db, payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
     return {"message": "Logged out successfully"}
 
 
@@ -270,21 +255,18 @@ async def demo_login(request: DemoLoginRequest, db: AsyncSession = Depends(get_d
     if not settings.DEMO_MODE:
         raise HTTPException(status_code=403, detail="Demo mode is disabled")
     
-    # Find or create demo user
-    result = await db.execute(select(User).where(User.email == request.email))
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        user = User(
-            email=request.email,
-            name=request.name,
-            provider="demo",
-            provider_id=f"demo_{request.email}",
-            avatar_url=f"https://api.dicebear.com/7.x/avataaars/svg?seed={request.email}"
-        )
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
+    # Find or create demo user - an existing user is never modified
+    user = await upsert_login_user(
+        db,
+        request.email,
+        create={
+            "name": request.name,
+            "provider": "demo",
+            "provider_id": f"demo_{request.email}",
+            "avatar_url": f"https://api.dicebear.com/7.x/avataaars/svg?seed={request.email}",
+        },
+        update={},
+    )
     
     # Create JWT token
     access_token = create_access_token(
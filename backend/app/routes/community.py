@@ -3,17 +3,22 @@ Community routes - persistent storage using database
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 import json
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.user import Project, User, project_collaborators
 from ..models.survey import ProjectRecommendation, LinkedInPostRequest
 from ..services.ai_engine import generate_linkedin_post
 from ..services.auth import get_current_user, get_current_user_optional
+from ..services.counts import community_total, published_total
+from ..services.pagination import before_cursor, fetch_page
+from ..services.membership import add_member, remove_member
+from ..services.search import ProjectSearch
+from ..services.terms import index_project_terms, parse_terms, term_filter
 
 router = APIRouter(prefix="/api/community", tags=["Community"])
 
@@ -44,6 +49,7 @@ class CommunityProjectResponse(BaseModel):
     owner_name: str
     owner_email: str
     created_at: str
+    snippet: Optional[str] = None  # search results only: HTML with <mark>ed matches
     
     class Config:
         from_attributes = True
@@ -54,6 +60,7 @@ class CommunityProjectsListResponse(BaseModel):
     total: int
     page: int
     per_page: int
+    next_cursor: Optional[str] = None
 
 
 @router.post("/publish", response_model=CommunityProjectResponse)
@@ -80,7 +87,10 @@ async def publish_project(
     )
     
     db.add(project)
+    await db.flush()
+    await index_project_terms(db, project)
     await db.commit()
+    published_total.invalidate()
     await db.refresh(project)
     
     return CommunityProjectResponse(
@@ -103,61 +113,66 @@ async def publish_project(
 @router.get("/projects", response_model=CommunityProjectsListResponse)
 async def get_community_projects(
     difficulty: Optional[str] = Query(None, description="Filter by difficulty level"),
-    tech_stack: Optional[str] = Query(None, description="Filter by technology"),
+    tech_stack: Optional[str] = Query(None, description="Filter by technologies (comma-separated)"),
+    tags: Optional[str] = Query(None, description="Filter by tags (comma-separated)"),
+    match: str = Query("any", pattern="^(any|all)$", description="Projects with any or all of the given technologies/tags"),
     looking_for_collaborators: Optional[bool] = Query(None, description="Filter by collaboration status"),
-    search: Optional[str] = Query(None, description="Search in title and description"),
-    page: int = Query(1, ge=1, description="Page number"),
+    search: Optional[str] = Query(None, description="Full-text search in title and description, best match first"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     per_page: int = Query(10, ge=1, le=50, description="Items per page"),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all published community projects with optional filtering and pagination.
+    
+    Pass the returned ``next_cursor`` back as ``cursor`` to get the next page:
+    unlike ``page``, it costs the same at any depth and does not skip or repeat
+    projects published in the meantime. Search results are ranked by relevance,
+    carry a highlighted ``snippet`` and are paged with ``page`` only.
     """
-    # Build query
-    query = select(Project).where(Project.is_published == True).options(
-        selectinload(Project.owner),
-        selectinload(Project.collaborators)
-    )
+    project_search = ProjectSearch.parse(db, search)
+    if project_search is not None and cursor:
+        raise HTTPException(status_code=400, detail="Search results are paged with page, not cursor")
     
     # Apply filters
+    conditions = []
     if difficulty:
-        query = query.where(Project.difficulty_level.ilike(f"%{difficulty}%"))
+        conditions.append(Project.difficulty_level.ilike(f"%{difficulty}%"))
     
     if looking_for_collaborators is not None:
-        query = query.where(Project.looking_for_collaborators == looking_for_collaborators)
+        conditions.append(Project.looking_for_collaborators == looking_for_collaborators)
     
-    if search:
-        query = query.where(
-            or_(
-                Project.title.ilike(f"%{search}%"),
-                Project.description.ilike(f"%{search}%")
-            )
-        )
+    # Technology/tag membership is filtered in SQL, before pagination
+    for kind, value in (("tech", tech_stack), ("tag", tags)):
+        names = parse_terms(value)
+        if names:
+            condition = await term_filter(db, kind, names, match)
+            if condition is None:
+                return CommunityProjectsListResponse(projects=[], total=0, page=page, per_page=per_page)
+            conditions.append(condition)
     
-    # Order by newest first
-    query = query.order_by(Project.created_at.desc())
-    
-    # Get total count
-    count_result = await db.execute(
-        select(Project.id).where(Project.is_published == True)
+    # Build query, newest first (best match first when searching)
+    query = select(Project).where(Project.is_published == True, *conditions).options(
+        selectinload(Project.owner)
     )
-    total = len(count_result.all())
+    if project_search is not None:
+        query = project_search.apply(query).order_by(*project_search.order_by())
+    else:
+        query = query.order_by(Project.created_at.desc(), Project.id.desc())
     
-    # Apply pagination
-    offset = (page - 1) * per_page
-    query = query.offset(offset).limit(per_page)
+    # Total over the same filters
+    total = await community_total(db, *conditions, search=project_search)
     
-    result = await db.execute(query)
-    projects = result.scalars().all()
+    # Apply pagination
+    if cursor:
+        query = query.where(before_cursor(Project.created_at, Project.id, cursor))
+    else:
+        query = query.offset((page - 1) * per_page)
     
-    # Filter by tech_stack (JSON field - need to check after fetch)
-    if tech_stack:
-        projects = [
-            p for p in projects 
-            if p.tech_stack and any(
-                tech_stack.lower() in t.lower() for t in p.tech_stack
-            )
-        ]
+    key = None if project_search is not None else (lambda p: (p.created_at, p.id))
+    projects, next_cursor = await fetch_page(db, query, per_page, key)
+    snippets = await project_search.snippets(db, [p.id for p in projects]) if project_search else {}
     
     # Build response
     project_responses = []
@@ -172,24 +187,26 @@ async def get_community_projects(
             tags=project.tags or [],
             looking_for_collaborators=project.looking_for_collaborators,
             max_team_size=project.max_team_size,
-            current_members=len(project.collaborators) + 1,
+            current_members=project.member_count,
             owner_name=project.owner.name or project.owner.email if project.owner else "Unknown",
             owner_email=project.owner.email if project.owner else "",
-            created_at=project.created_at.isoformat() if project.created_at else ""
+            created_at=project.created_at.isoformat() if project.created_at else "",
+            snippet=snippets.get(project.id)
         ))
     
     return CommunityProjectsListResponse(
         projects=project_responses,
         total=total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=next_cursor
     )
 
 
 @router.get("/projects/{project_uuid}", response_model=CommunityProjectResponse)
 async def get_project(
     project_uuid: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get a specific community project by UUID.
@@ -197,7 +214,7 @@ async def get_project(
     result = await db.execute(
         select(Project)
         .where(Project.uuid == project_uuid, Project.is_published == True)
-        .options(selectinload(Project.owner), selectinload(Project.collaborators))
+        .options(selectinload(Project.owner))
     )
     project = result.scalar_one_or_none()
     
@@ -214,7 +231,7 @@ async def get_project(
         tags=project.tags or [],
         looking_for_collaborators=project.looking_for_collaborators,
         max_team_size=project.max_team_size,
-        current_members=len(project.collaborators) + 1,
+        current_members=project.member_count,
         owner_name=project.owner.name or project.owner.email if project.owner else "Unknown",
         owner_email=project.owner.email if project.owner else "",
         created_at=project.created_at.isoformat() if project.created_at else ""
@@ -231,11 +248,7 @@ async def join_project(
     Request to join a community project.
     Requires authentication.
     """
-    result = await db.execute(
-        select(Project)
-        .where(Project.uuid == project_uuid)
-        .options(selectinload(Project.collaborators))
-    )
+    result = await db.execute(select(Project).where(Project.uuid == project_uuid))
     project = result.scalar_one_or_none()
     
     if not project:
@@ -244,24 +257,17 @@ async def join_project(
     if not project.looking_for_collaborators:
         raise HTTPException(status_code=400, detail="Project is not looking for collaborators")
     
-    current_members = len(project.collaborators) + 1
-    if current_members >= project.max_team_size:
-        raise HTTPException(status_code=400, detail="Project team is full")
-    
     # Check if already a member
     if current_user.id == project.owner_id:
         raise HTTPException(status_code=400, detail="You are the owner of this project")
     
-    if any(c.id == current_user.id for c in project.collaborators):
-        raise HTTPException(status_code=400, detail="You are already a member of this project")
-    
-    # Add user as collaborator
-    project.collaborators.append(current_user)
+    # Add user as collaborator - fails if already a member or the team is full
+    current_members = await add_member(db, project, current_user)
     await db.commit()
     
     return {
         "message": f"Successfully joined project: {project.title}",
-        "current_members": current_members + 1
+        "current_members": current_members
     }
 
 
@@ -274,11 +280,7 @@ async def leave_project(
     """
     Leave a community project.
     """
-    result = await db.execute(
-        select(Project)
-        .where(Project.uuid == project_uuid)
-        .options(selectinload(Project.collaborators))
-    )
+    result = await db.execute(select(Project).where(Project.uuid == project_uuid))
     project = result.scalar_one_or_none()
     
     if not project:
@@ -287,11 +289,8 @@ async def leave_project(
     if current_user.id == project.owner_id:
         raise HTTPException(status_code=400, detail="Owner cannot leave the project. Delete it instead.")
     
-    if not any(c.id == current_user.id for c in project.collaborators):
-        raise HTTPException(status_code=400, detail="You are not a member of this project")
-    
     # Remove user from collaborators
-    project.collaborators = [c for c in project.collaborators if c.id != current_user.id]
+    await remove_member(db, project, current_user)
     await db.commit()
     
     return {"message": f"Successfully left project: {project.title}"}
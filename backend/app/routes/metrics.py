@@ -0,0 +1,100 @@
+"""
+Operational metrics - token usage, cache hit rates and pool statistics
+"""
+from fastapi import APIRouter
+
+from ..database import engine, read_engine, read_your_writes
+from ..services.prompts import prompt_registry, token_accountant
+from ..services.deadline import stage_recorder
+from ..services.retrieval import retrieval_cache
+from ..services.tiering import tier_report
+from ..services.http_client import outbound_http
+from ..services.users import user_cache
+from ..services.auth import token_cache
+from ..services.revocation import revocation_list
+from ..services.counts import published_total
+
+router = APIRouter(prefix="/api/metrics", tags=["Metrics"])
+
+
+@router.get("/prompts")
+async def prompt_metrics():
+    """
+    Active prompt versions with their estimated size and budget, plus per-call token usage.
+    """
+    return {
+        "prompts": [
+            {
+                "name": prompt.name,
+                "version": prompt.version,
+                "versions": prompt_registry.versions(prompt.name),
+                "estimated_tokens": prompt.tokens,
+                "budget_tokens": prompt_registry.budget_for(prompt),
+            }
+            for prompt in prompt_registry.active()
+        ],
+        "usage": token_accountant.snapshot(),
+    }
+
+
+@router.get("/deadlines")
+async def deadline_metrics():
+    """
+    Outcome counts (ok / timeout / error / skipped) per endpoint and stage.
+    """
+    return {"stages": stage_recorder.snapshot()}
+
+
+@router.get("/retrieval")
+async def retrieval_metrics():
+    """
+    Hit rate of the per-project roadmap retrieval cache used by the AI assistant.
+    """
+    return retrieval_cache.snapshot()
+
+
+@router.get("/tiers")
+async def tier_metrics():
+    """
+    Model tier choices and their latency and estimated cost, per tier and per model.
+    """
+    return tier_report()
+
+
+@router.get("/http")
+async def http_metrics():
+    """
+    Shared outbound HTTP client: requests sent, connections and TLS handshakes they needed.
+    """
+    return outbound_http.snapshot()
+
+
+@router.get("/users")
+async def user_cache_metrics():
+    """
+    Hit rate of the authenticated-user cache in front of get_current_user.
+    """
+    return user_cache.snapshot()
+
+
+@router.get("/tokens")
+async def token_cache_metrics():
+    """
+    Hit rate of the verified-JWT cache and how often revocation checks reached the database.
+    """
+    return {**token_cache.snapshot(), "revocation": revocation_list.snapshot()}
+
+
+@router.get("/database")
+async def database_metrics():
+    """
+    Reads served by the read engine vs the primary (read-your-writes), pool status and
+    the hit rate of the cached community total.
+    """
+    return {
+        "reads": dict(read_your_writes.stats),
+        "primary_pool": engine.pool.status(),
+        "read_pool": read_engine.pool.status(),
+        "replica": read_engine.url != engine.url,
+        "community_total": published_total.snapshot(),
+    }
@@ -1,20 +1,127 @@
-from fastapi import APIRouter, HTTPException
-from ..models.survey import SurveyResponse, RecommendationResponse
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Depends, Request
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from ..config import settings
+from ..database import get_db
+from ..models.survey import (
+    SurveyResponse, PartialSurveyResponse, RecommendationResponse, RecommendationRegenerateRequest
+)
+from ..models.user import User, Recommendation
+from ..services.auth import get_current_user
+from ..services.regeneration import regenerate_roadmap, stored_projects
 from ..services.ai_engine import get_recommendations
+from ..services.codec import encode_recommendations
+from ..services.speculation import (
+    speculation_store, survey_fingerprint, complete_partial_survey, submit_plan
+)
+from ..services.deadline import Deadline, request_deadline
 
 router = APIRouter(prefix="/api/survey", tags=["Survey"])
 
+@router.post("/prefetch", status_code=202)
+async def prefetch_recommendations(survey: PartialSurveyResponse, request: Request):
+    """
+    Start generating recommendations speculatively from the answers known after step 4.
+    Pass the returned fingerprint as ``X-Speculation-Id`` when submitting the full survey.
+    """
+    fingerprint = survey_fingerprint(survey)
+    if not settings.SPECULATION_ENABLED:
+        return {"fingerprint": fingerprint, "started": False}
+    
+    full_survey = complete_partial_survey(survey)
+    # Sized like the submit it stands in for, but with its own budget - it is not bound to this request
+    plan = submit_plan(full_survey)
+    started = speculation_store.start(
+        fingerprint,
+        lambda: get_recommendations(full_survey, Deadline.for_endpoint("survey_prefetch"), plan),
+        plan.shape if plan else None,
+        # Anonymous, so limited per address: a new fingerprint supersedes the oldest
+        client=request.client.host if request.client else None
+    )
+    return {"fingerprint": fingerprint, "started": started}
+
+
+@router.get("/prefetch/stats")
+async def prefetch_stats():
+    """
+    Hit rate and latency saved by speculative pre-generation.
+    """
+    return speculation_store.snapshot()
+
+
 @router.post("/submit", response_model=RecommendationResponse)
-async def submit_survey(survey: SurveyResponse):
+async def submit_survey(
+    survey: SurveyResponse,
+    speculation_id: Optional[str] = Header(None, alias="X-Speculation-Id"),
+    deadline: Deadline = Depends(request_deadline("survey_submit"))
+):
     """
     Submit the 15-question survey and receive 5 personalized AI project recommendations.
     """
     try:
-        recommendations = await get_recommendations(survey)
-        return recommendations
+        fingerprint = survey_fingerprint(survey)
+        if speculation_id and speculation_id != fingerprint:
+            # Answers changed after the prefetch - the speculative result is stale
+            speculation_store.discard(speculation_id)
+        
+        recommendations = None
+        if settings.SPECULATION_ENABLED:
+            # Wait for an in-flight speculation only within the submit's deadline
+            plan = submit_plan(survey, deadline)
+            recommendations = await speculation_store.adopt(
+                fingerprint, timeout=max(0.0, deadline.stage_budget()), shape=plan.shape if plan else None
+            )
+        if recommendations is None:
+            recommendations = await get_recommendations(survey, deadline)
+        # Already validated by the codec - skip the response_model round trip
+        return Response(content=encode_recommendations(recommendations), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
 
+@router.post("/recommendations/{recommendation_uuid}/regenerate")
+async def regenerate_recommendation_roadmap(
+    recommendation_uuid: str,
+    request: RecommendationRegenerateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    deadline: Deadline = Depends(request_deadline("roadmap_regenerate"))
+):
+    """
+    Regenerate one week (or one task) of a stored recommendation instead of resubmitting the survey.
+    """
+    result = await db.execute(
+        select(Recommendation).where(
+            Recommendation.uuid == recommendation_uuid,
+            Recommendation.user_id == current_user.id
+        )
+    )
+    recommendation = result.scalar_one_or_none()
+    if not recommendation:
+        raise HTTPException(status_code=404, detail="Recommendation not found")
+    
+    try:
+        payload, projects = stored_projects(recommendation.recommendations_json)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Stored recommendation cannot be edited")
+    if request.project_index >= len(projects):
+        raise HTTPException(status_code=404, detail="Project not found in recommendation")
+    
+    project = projects[request.project_index]
+    try:
+        project["roadmap"] = await regenerate_roadmap(
+            project, project.get("roadmap", []), request.week, request.task_index, request.instructions, deadline
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    recommendation.recommendations_json = json.dumps(payload)
+    await db.commit()
+    
+    return {"recommendation_id": recommendation.uuid, "project_index": request.project_index, "project": project}
+
 @router.get("/questions")
 async def get_survey_questions():
     """
@@ -1,72 +1,21 @@
-import json
-from typing import List
-from openai import OpenAI
-from anthropic import Anthropic
+import asyncio
+import time
+from typing import AsyncIterator, List, Optional
+from openai import AsyncOpenAI, OpenAI
+from anthropic import Anthropic, AsyncAnthropic
 import google.generativeai as genai
 from ..config import settings
 from ..models.survey import SurveyResponse, ProjectRecommendation, ProjectRoadmapWeek, RecommendationResponse
+from .codec import CodecError, RecommendationStruct, decode_provider_json, from_model, salvage_provider_json
+from .deadline import Deadline, DeadlineExceeded, run_stage, stage_recorder
+from .tiering import GenerationPlan, generation_load, plan_recommendations, tier_stats
+from .prompts import PromptTemplate, prompt_registry, check_budget, record_usage
+from .prompt_cache import anthropic_system_blocks, openai_cache_options
 
-SYSTEM_PROMPT = """You are an expert AI career counselor and project recommendation engine for the SanaPath AI platform, serving 60,000 students in the AI-Sana ecosystem.
 
-Your role is to analyze student profiles and recommend personalized AI/ML project ideas that match their skills, interests, and career goals.
-
-For each recommendation, you must provide:
-1. A compelling project title
-2. A detailed description (2-3 sentences)
-3. Difficulty level (Beginner, Intermediate, Advanced, Expert)
-4. Complete tech stack (programming languages, frameworks, tools)
-5. Estimated duration
-6. Key learning outcomes (3-5 bullet points)
-7. A DETAILED 4-week implementation roadmap where EACH TASK includes:
-   - Clear step-by-step instructions
-   - Helpful resources (YouTube tutorials, documentation links, articles)
-   - Estimated time for completion
-8. Relevant tags for discoverability
-
-IMPORTANT: Your response must be valid JSON matching this exact structure:
-{
-    "recommendations": [
-        {
-            "title": "Project Title",
-            "description": "Detailed description...",
-            "difficulty_level": "Intermediate",
-            "tech_stack": ["Python", "TensorFlow", "FastAPI"],
-            "estimated_duration": "4 weeks",
-            "learning_outcomes": ["outcome1", "outcome2", "outcome3"],
-            "roadmap": [
-                {
-                    "week": 1,
-                    "title": "Week 1: Foundation",
-                    "tasks": [
-                        {
-                            "name": "Set up development environment",
-                            "description": "Install Python, create virtual environment, install required packages",
-                            "steps": [
-                                "Install Python 3.10+ from python.org",
-                                "Create virtual environment: python -m venv venv",
-                                "Install packages: pip install tensorflow numpy pandas"
-                            ],
-                            "resources": [
-                                {"title": "Python Installation Guide", "url": "https://www.python.org/downloads/", "type": "docs"},
-                                {"title": "TensorFlow Setup Tutorial", "url": "https://www.tensorflow.org/install", "type": "docs"},
-                                {"title": "Python Virtual Environments", "url": "https://www.youtube.com/watch?v=APOPm01BVrk", "type": "video"}
-                            ],
-                            "estimated_time": "2 hours"
-                        }
-                    ],
-                    "deliverables": ["Working development environment", "Project repository on GitHub"]
-                }
-            ],
-            "tags": ["NLP", "Deep Learning", "Healthcare"]
-        }
-    ],
-    "personalization_summary": "Summary of why these projects match the student..."
-}
-
-CRITICAL: Each task MUST have detailed steps and real working resource links (YouTube, official docs, tutorials). Generate exactly 5 unique project recommendations."""
-
-
-def build_user_prompt(survey: SurveyResponse) -> str:
+def build_user_prompt(survey: SurveyResponse, plan: Optional[GenerationPlan] = None) -> str:
+    weeks = plan.weeks if plan else 4
+    tasks = f" with {plan.tasks_per_week} tasks per week" if plan and plan.tasks_per_week else ""
     return f"""
 Student Profile:
 - Name: {survey.name}
@@ -84,133 +33,323 @@ Student Profile:
 - Team Preference: {survey.team_preference}
 - Collaboration Tools: {', '.join(survey.collaboration_tools)}
 
-Based on this comprehensive profile, generate 5 personalized AI project recommendations with detailed 4-week roadmaps. Ensure projects align with the student's skill level, interests, and career goals.
+Based on this comprehensive profile, generate 5 personalized AI project recommendations with detailed {weeks}-week roadmaps{tasks}. Ensure projects align with the student's skill level, interests, and career goals.
 """
 
 
-async def get_recommendations_openai(survey: SurveyResponse) -> RecommendationResponse:
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+def _strip_code_fences(text: str) -> str:
+    """Remove a markdown code block wrapped around a JSON answer"""
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0]
+    return text.strip()
+
+
+def _timeout_kwargs(timeout: Optional[float]) -> dict:
+    return {"timeout": timeout} if timeout is not None else {}
+
+
+async def complete_openai(
+    prompt: PromptTemplate,
+    user_prompt: str,
+    max_tokens: int = 4000,
+    timeout: Optional[float] = None,
+    model: Optional[str] = None
+) -> str:
+    model = model or "gpt-4o"
+    # Retries are a separate deadline-aware stage, not hidden inside the client
+    client = OpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL or None, max_retries=0)
+    started_at = time.monotonic()
     
-    response = client.chat.completions.create(
-        model="gpt-4o",
+    # Static system prompt first so the provider can reuse the cached prefix
+    response = await asyncio.to_thread(
+        client.chat.completions.create,
+        model=model,
         messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": build_user_prompt(survey)}
+            {"role": "system", "content": prompt.text},
+            {"role": "user", "content": user_prompt}
         ],
         response_format={"type": "json_object"},
         temperature=0.7,
-        max_tokens=4000
+        max_tokens=max_tokens,
+        **openai_cache_options(prompt),
+        **_timeout_kwargs(timeout)
     )
     
-    result = json.loads(response.choices[0].message.content)
-    
-    recommendations = []
-    for rec in result["recommendations"]:
-        roadmap = [ProjectRoadmapWeek(**week) for week in rec["roadmap"]]
-        recommendations.append(ProjectRecommendation(
-            title=rec["title"],
-            description=rec["description"],
-            difficulty_level=rec["difficulty_level"],
-            tech_stack=rec["tech_stack"],
-            estimated_duration=rec["estimated_duration"],
-            learning_outcomes=rec["learning_outcomes"],
-            roadmap=roadmap,
-            tags=rec["tags"]
-        ))
-    
-    return RecommendationResponse(
-        student_name=survey.name,
-        recommendations=recommendations,
-        personalization_summary=result["personalization_summary"]
+    text = response.choices[0].message.content
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    record_usage(
+        prompt, "openai", user_prompt, text, started_at,
+        getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None),
+        cached_input_tokens=getattr(details, "cached_tokens", None),
+        model=model
     )
+    return text
 
 
-async def get_recommendations_anthropic(survey: SurveyResponse) -> RecommendationResponse:
-    client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+async def complete_anthropic(
+    prompt: PromptTemplate,
+    user_prompt: str,
+    max_tokens: int = 4000,
+    timeout: Optional[float] = None,
+    model: Optional[str] = None
+) -> str:
+    model = model or "claude-3-5-sonnet-20241022"
+    client = Anthropic(api_key=settings.ANTHROPIC_API_KEY, base_url=settings.ANTHROPIC_BASE_URL or None, max_retries=0)
+    started_at = time.monotonic()
     
-    response = client.messages.create(
-        model="claude-3-5-sonnet-20241022",
-        max_tokens=4000,
-        system=SYSTEM_PROMPT,
+    response = await asyncio.to_thread(
+        client.messages.create,
+        model=model,
+        max_tokens=max_tokens,
+        system=anthropic_system_blocks(prompt),
         messages=[
-            {"role": "user", "content": build_user_prompt(survey)}
-        ]
+            {"role": "user", "content": user_prompt}
+        ],
+        **_timeout_kwargs(timeout)
     )
     
-    result = json.loads(response.content[0].text)
-    
-    recommendations = []
-    for rec in result["recommendations"]:
-        roadmap = [ProjectRoadmapWeek(**week) for week in rec["roadmap"]]
-        recommendations.append(ProjectRecommendation(
-            title=rec["title"],
-            description=rec["description"],
-            difficulty_level=rec["difficulty_level"],
-            tech_stack=rec["tech_stack"],
-            estimated_duration=rec["estimated_duration"],
-            learning_outcomes=rec["learning_outcomes"],
-            roadmap=roadmap,
-            tags=rec["tags"]
-        ))
-    
-    return RecommendationResponse(
-        student_name=survey.name,
-        recommendations=recommendations,
-        personalization_summary=result["personalization_summary"]
+    text = response.content[0].text
+    usage = getattr(response, "usage", None)
+    # Anthropic reports cache reads/writes separately from the uncached input tokens
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    input_tokens = getattr(usage, "input_tokens", None)
+    record_usage(
+        prompt, "anthropic", user_prompt, text, started_at,
+        input_tokens + cache_read + cache_write if input_tokens is not None else None,
+        getattr(usage, "output_tokens", None),
+        cached_input_tokens=cache_read,
+        cache_write_tokens=cache_write,
+        model=model
     )
+    return _strip_code_fences(text)
 
 
-async def get_recommendations_gemini(survey: SurveyResponse) -> RecommendationResponse:
-    """Get recommendations using Google Gemini AI"""
-    genai.configure(api_key=settings.GEMINI_API_KEY)
-    
-    model = genai.GenerativeModel('gemini-1.5-flash')
+def _configure_gemini() -> None:
+    if settings.GEMINI_API_ENDPOINT:
+        genai.configure(
+            api_key=settings.GEMINI_API_KEY,
+            transport="rest",
+            client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT}
+        )
+    else:
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+
+
+async def complete_gemini(
+    prompt: PromptTemplate,
+    user_prompt: str,
+    max_tokens: int = 4000,
+    timeout: Optional[float] = None,
+    model: Optional[str] = None
+) -> str:
+    model_name = model or settings.GEMINI_MODEL
+    _configure_gemini()
+    started_at = time.monotonic()
     
-    prompt = f"""{SYSTEM_PROMPT}
+    model = genai.GenerativeModel(model_name)
+    contents = f"""{prompt.text}
 
-{build_user_prompt(survey)}
+{user_prompt}
 
 IMPORTANT: Respond ONLY with valid JSON, no additional text or markdown."""
     
-    response = model.generate_content(
-        prompt,
+    response = await asyncio.to_thread(
+        model.generate_content,
+        contents,
         generation_config=genai.types.GenerationConfig(
             temperature=0.7,
-            max_output_tokens=4000,
-        )
+            max_output_tokens=max_tokens,
+        ),
+        request_options=_timeout_kwargs(timeout)
     )
     
-    # Extract JSON from response
-    response_text = response.text
-    # Clean up if wrapped in markdown code block
-    if "```json" in response_text:
-        response_text = response_text.split("```json")[1].split("```")[0]
-    elif "```" in response_text:
-        response_text = response_text.split("```")[1].split("```")[0]
-    
-    result = json.loads(response_text.strip())
-    
-    recommendations = []
-    for rec in result["recommendations"]:
-        roadmap = [ProjectRoadmapWeek(**week) for week in rec["roadmap"]]
-        recommendations.append(ProjectRecommendation(
-            title=rec["title"],
-            description=rec["description"],
-            difficulty_level=rec["difficulty_level"],
-            tech_stack=rec["tech_stack"],
-            estimated_duration=rec["estimated_duration"],
-            learning_outcomes=rec["learning_outcomes"],
-            roadmap=roadmap,
-            tags=rec["tags"]
-        ))
+    text = response.text
+    usage = getattr(response, "usage_metadata", None)
+    record_usage(
+        prompt, "gemini", user_prompt, text, started_at,
+        getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None),
+        cached_input_tokens=getattr(usage, "cached_content_token_count", None),
+        model=model_name
+    )
+    # Extract JSON from response (cleaning up a markdown code block if present)
+    return _strip_code_fences(text)
+
+
+def configured_provider() -> Optional[str]:
+    """Provider that will serve requests, in the same order get_recommendations has always used"""
+    if settings.AI_PROVIDER == "gemini" and settings.GEMINI_API_KEY:
+        return "gemini"
+    if settings.AI_PROVIDER == "anthropic" and settings.ANTHROPIC_API_KEY:
+        return "anthropic"
+    if settings.OPENAI_API_KEY:
+        return "openai"
+    return None
+
+
+async def complete_json(
+    prompt: PromptTemplate,
+    user_prompt: str,
+    max_tokens: int = 4000,
+    timeout: Optional[float] = None,
+    model: Optional[str] = None
+) -> str:
+    """Run a JSON completion on the configured provider and return the raw JSON text.
     
-    return RecommendationResponse(
-        student_name=survey.name,
-        recommendations=recommendations,
-        personalization_summary=result["personalization_summary"]
+    Raises RuntimeError when no provider is configured so callers can fall back to demo content.
+    """
+    check_budget(prompt, user_prompt)
+    provider = configured_provider()
+    if provider is None:
+        raise RuntimeError("No AI provider configured")
+    return await PROVIDERS[provider](prompt, user_prompt, max_tokens, timeout, model)
+
+
+async def _stream_openai(prompt: PromptTemplate, user_prompt: str, max_tokens: int) -> AsyncIterator[str]:
+    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL or None, max_retries=0)
+    started_at = time.monotonic()
+    stream = await client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": prompt.text},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=0.7,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+        **openai_cache_options(prompt)
+    )
+    parts, usage = [], None
+    async for chunk in stream:
+        # The final chunk carries usage and no choices
+        usage = chunk.usage or usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield chunk.choices[0].delta.content
+    details = getattr(usage, "prompt_tokens_details", None)
+    record_usage(
+        prompt, "openai", user_prompt, "".join(parts), started_at,
+        getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None),
+        cached_input_tokens=getattr(details, "cached_tokens", None)
     )
 
 
+async def _stream_anthropic(prompt: PromptTemplate, user_prompt: str, max_tokens: int) -> AsyncIterator[str]:
+    client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY, base_url=settings.ANTHROPIC_BASE_URL or None, max_retries=0)
+    started_at = time.monotonic()
+    async with client.messages.stream(
+        model="claude-3-5-sonnet-20241022",
+        max_tokens=max_tokens,
+        system=anthropic_system_blocks(prompt),
+        messages=[{"role": "user", "content": user_prompt}]
+    ) as stream:
+        parts = []
+        async for text in stream.text_stream:
+            parts.append(text)
+            yield text
+        usage = (await stream.get_final_message()).usage
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    record_usage(
+        prompt, "anthropic", user_prompt, "".join(parts), started_at,
+        usage.input_tokens + cache_read + cache_write, usage.output_tokens,
+        cached_input_tokens=cache_read,
+        cache_write_tokens=cache_write
+    )
+
+
+async def _stream_gemini(prompt: PromptTemplate, user_prompt: str, max_tokens: int) -> AsyncIterator[str]:
+    _configure_gemini()
+    started_at = time.monotonic()
+    model = genai.GenerativeModel(settings.GEMINI_MODEL, system_instruction=prompt.text)
+    response = await model.generate_content_async(
+        user_prompt,
+        generation_config=genai.types.GenerationConfig(temperature=0.7, max_output_tokens=max_tokens),
+        stream=True
+    )
+    parts, usage = [], None
+    async for chunk in response:
+        usage = getattr(chunk, "usage_metadata", None) or usage
+        if chunk.text:
+            parts.append(chunk.text)
+            yield chunk.text
+    record_usage(
+        prompt, "gemini", user_prompt, "".join(parts), started_at,
+        getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None)
+    )
+
+
+def stream_completion(prompt: PromptTemplate, user_prompt: str, max_tokens: int = 800) -> AsyncIterator[str]:
+    """Stream a plain-text completion from the configured provider as text chunks.
+    
+    Raises RuntimeError when no provider is configured so callers can fall back to local answers.
+    """
+    check_budget(prompt, user_prompt)
+    provider = configured_provider()
+    if provider is None:
+        raise RuntimeError("No AI provider configured")
+    return STREAMING_PROVIDERS[provider](prompt, user_prompt, max_tokens)
+
+
+STREAMING_PROVIDERS = {
+    "openai": _stream_openai,
+    "anthropic": _stream_anthropic,
+    "gemini": _stream_gemini,
+}
+
+
+PROVIDERS = {
+    "openai": complete_openai,
+    "anthropic": complete_anthropic,
+    "gemini": complete_gemini,
+}
+
+
+async def _recommend(
+    provider: str,
+    survey: SurveyResponse,
+    timeout: Optional[float] = None,
+    deadline: Optional[Deadline] = None,
+    plan: Optional[GenerationPlan] = None
+) -> RecommendationStruct:
+    user_prompt = build_user_prompt(survey, plan)
+    prompt = prompt_registry.get("recommendations")
+    check_budget(prompt, user_prompt)
+    if plan is None:
+        raw = await PROVIDERS[provider](prompt, user_prompt, timeout=timeout)
+    else:
+        raw = await PROVIDERS[provider](prompt, user_prompt, plan.max_tokens, timeout, plan.model)
+    try:
+        return decode_provider_json(raw, survey.name)
+    except CodecError as e:
+        # Salvage stage: keep the projects that are valid instead of paying for a retry
+        try:
+            salvaged = salvage_provider_json(raw, survey.name)
+        except CodecError:
+            stage_recorder.record(deadline, "salvage", "error")
+            raise e
+        stage_recorder.record(deadline, "salvage", "ok")
+        print(f"{provider} answer partially invalid ({e}), kept {len(salvaged.recommendations)} projects")
+        return salvaged
+
+
+async def get_recommendations_openai(survey: SurveyResponse, timeout: Optional[float] = None) -> RecommendationStruct:
+    return await _recommend("openai", survey, timeout)
+
+
+async def get_recommendations_anthropic(survey: SurveyResponse, timeout: Optional[float] = None) -> RecommendationStruct:
+    return await _recommend("anthropic", survey, timeout)
+
+
+async def get_recommendations_gemini(survey: SurveyResponse, timeout: Optional[float] = None) -> RecommendationStruct:
+    """Get recommendations using Google Gemini AI"""
+    return await _recommend("gemini", survey, timeout)
+
+
 def generate_demo_recommendations(survey: SurveyResponse) -> RecommendationResponse:
     """Generate smart demo recommendations based on user interests without API"""
     from ..models.survey import TaskDetail, TaskResource
@@ -1450,42 +1589,47 @@ def generate_demo_recommendations(survey: SurveyResponse) -> RecommendationRespo
     )
 
 
-async def get_recommendations(survey: SurveyResponse) -> RecommendationResponse:
-    """Get AI recommendations - uses real AI if API key available, otherwise demo mode"""
+async def get_recommendations(
+    survey: SurveyResponse, deadline: Optional[Deadline] = None, plan: Optional[GenerationPlan] = None
+) -> RecommendationStruct:
+    """Get AI recommendations - uses real AI if API key available, otherwise demo mode
+    
+    With a deadline the provider call and a single retry each get the remaining
+    budget; whatever is left when they time out or fail goes to the demo catalog.
+    The model tier, roadmap shape and max_tokens come from ``plan_recommendations``
+    unless a ``plan`` is given.
+    """
     
     # Check if demo mode is enabled
     if settings.AI_DEMO_MODE:
         print("AI Demo mode enabled, using demo recommendations")
-        return generate_demo_recommendations(survey)
+        return from_model(generate_demo_recommendations(survey))
     
-    # Try Gemini first (default provider)
-    if settings.AI_PROVIDER == "gemini" and settings.GEMINI_API_KEY:
-        try:
-            print("Using Gemini AI for recommendations...")
-            return await get_recommendations_gemini(survey)
-        except Exception as e:
-            print(f"Gemini API error: {e}, falling back to demo mode")
-            return generate_demo_recommendations(survey)
+    provider = configured_provider()
+    if provider is None:
+        # No API keys - use demo mode
+        print("No AI API keys configured, using demo recommendations")
+        return from_model(generate_demo_recommendations(survey))
     
-    # Try Anthropic
-    if settings.AI_PROVIDER == "anthropic" and settings.ANTHROPIC_API_KEY:
-        try:
-            return await get_recommendations_anthropic(survey)
-        except Exception as e:
-            print(f"Anthropic API error: {e}, falling back to demo mode")
-            return generate_demo_recommendations(survey)
+    plan = plan or plan_recommendations(survey, provider, deadline)
+    tier_stats.record(plan)
     
-    # Try OpenAI
-    if settings.OPENAI_API_KEY:
-        try:
-            return await get_recommendations_openai(survey)
-        except Exception as e:
-            print(f"OpenAI API error: {e}, falling back to demo mode")
-            return generate_demo_recommendations(survey)
+    # Without a deadline there is no budget to decide whether a retry still fits
+    stages = ("provider", "retry") if deadline else ("provider",)
+    with generation_load.track():
+        for stage in stages:
+            try:
+                return await run_stage(
+                    stage, deadline, lambda timeout: _recommend(provider, survey, timeout, deadline, plan)
+                )
+            except DeadlineExceeded as e:
+                print(f"{e}, falling back to demo mode")
+                break
+            except Exception as e:
+                print(f"{provider} API error during {stage}: {e}")
     
-    # No API keys - use demo mode
-    print("No AI API keys configured, using demo recommendations")
-    return generate_demo_recommendations(survey)
+    stage_recorder.record(deadline, "fallback", "ok")
+    return from_model(generate_demo_recommendations(survey))
 
 
 def generate_linkedin_post(project_title: str, tech_stack: List[str], student_name: str, difficulty_level: str) -> str:
@@ -0,0 +1,152 @@
+"""
+AI assistant: project help grounded in the student's roadmap, and quick project ideas.
+
+Help answers are built from the few roadmap passages that match the question
+(see ``retrieval``), streamed from the provider as they are generated, and fall
+back to an answer assembled from those passages when no provider is available
+or the request runs out of time.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import msgspec
+
+from ..config import settings
+from ..models.survey import SurveyResponse
+from .ai_engine import complete_json, generate_demo_recommendations, stream_completion
+from .codec import ProjectRecommendationStruct
+from .deadline import Deadline, run_stage, stage_recorder
+from .prompts import prompt_registry
+from .retrieval import Passage, retrieval_cache
+
+HELP_MAX_TOKENS = 600
+IDEA_MAX_TOKENS = 1500
+
+# Passage text is clipped so one long task cannot dominate the prompt
+PASSAGE_CHARS = 300
+
+_idea_decoder = msgspec.json.Decoder(ProjectRecommendationStruct)
+
+
+def retrieve(project_key: str, roadmap: List[Dict[str, Any]], question: str) -> List[Passage]:
+    """Roadmap passages relevant to ``question``, best match first."""
+    return [passage for passage, _ in retrieval_cache.search(
+        project_key, roadmap, question, settings.ASSISTANT_MAX_PASSAGES
+    )]
+
+
+def _label(passage: Passage) -> str:
+    title = passage.title
+    if passage.kind == "week" or passage.week is None or title.lower().startswith("week"):
+        return title
+    return f"Week {passage.week} - {title}"
+
+
+def build_help_prompt(project: Dict[str, Any], passages: List[Passage], question: str) -> str:
+    excerpts = []
+    for passage in passages:
+        line = f"- [{passage.kind}] {_label(passage)}"
+        if passage.text:
+            line += f": {passage.text[:PASSAGE_CHARS]}"
+        if passage.url:
+            line += f" ({passage.url})"
+        excerpts.append(line)
+    return f"""
+Project: {project.get('title', '')}
+Description: {project.get('description') or ''}
+Tech Stack: {', '.join(project.get('tech_stack') or [])}
+
+Relevant roadmap excerpts:
+{chr(10).join(excerpts) or '- none matched'}
+
+Question: {question}
+"""
+
+
+def local_answer(passages: List[Passage]) -> List[str]:
+    """Answer assembled from the retrieved passages, as a list of chunks to stream."""
+    if not passages:
+        return ["I couldn't find anything about that in your roadmap. ",
+                "Try naming the week, task or technology you're working on."]
+    chunks = ["Here's what your roadmap covers on this:\n"]
+    for passage in passages:
+        if passage.kind == "resource":
+            chunks.append(f"\n- Resource: {passage.title}{f' ({passage.url})' if passage.url else ''}")
+        else:
+            detail = f": {passage.text[:PASSAGE_CHARS]}" if passage.text else ""
+            chunks.append(f"\n- {_label(passage)}{detail}")
+    return chunks
+
+
+async def stream_help(
+    project: Dict[str, Any],
+    passages: List[Passage],
+    question: str,
+    deadline: Optional[Deadline] = None
+) -> AsyncIterator[str]:
+    """Stream the answer to a project question chunk by chunk."""
+    if not settings.AI_DEMO_MODE:
+        stream = None
+        try:
+            stream = stream_completion(
+                prompt_registry.get("project_help"), build_help_prompt(project, passages, question), HELP_MAX_TOKENS
+            )
+            # Time to first token is the stage that can still fall back
+            first = await run_stage("provider", deadline, lambda timeout: anext(stream))
+        except Exception as e:
+            print(f"Assistant provider error: {e}, answering from the roadmap")
+            if stream is not None:
+                await stream.aclose()
+        else:
+            yield first
+            try:
+                while True:
+                    remaining = deadline.remaining() if deadline else None
+                    yield await asyncio.wait_for(anext(stream), remaining)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                stage_recorder.record(deadline, "stream", "timeout")
+                yield "\n\n(Answer cut short - ask a narrower question for a complete answer.)"
+                return
+            finally:
+                await stream.aclose()
+
+    stage_recorder.record(deadline, "fallback", "ok")
+    for chunk in local_answer(passages):
+        yield chunk
+
+
+def _demo_idea(interests: List[str]) -> ProjectRecommendationStruct:
+    catalog = generate_demo_recommendations(SurveyResponse(
+        name="SanaPath",
+        email="",
+        programming_languages=[],
+        skill_level="intermediate",
+        ai_ml_experience="",
+        interest_areas=interests or ["Machine Learning"],
+        preferred_project_type="",
+        industry_interest=[],
+        career_goal="",
+        learning_style="",
+        time_commitment="",
+        project_duration="",
+        team_preference="",
+        collaboration_tools=[],
+    ))
+    return msgspec.convert(catalog.recommendations[0].model_dump(), ProjectRecommendationStruct)
+
+
+async def generate_idea(interests: List[str], deadline: Optional[Deadline] = None) -> ProjectRecommendationStruct:
+    """One project idea for the given interests."""
+    if not settings.AI_DEMO_MODE:
+        try:
+            raw = await run_stage("provider", deadline, lambda timeout: complete_json(
+                prompt_registry.get("project_idea"), f"Student interests: {', '.join(interests) or 'AI in general'}",
+                IDEA_MAX_TOKENS, timeout
+            ))
+            return _idea_decoder.decode(raw)
+        except Exception as e:
+            print(f"Project idea error: {e}, falling back to demo mode")
+        stage_recorder.record(deadline, "fallback", "ok")
+    return _demo_idea(interests)
@@ -1,14 +1,22 @@
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from ..config import settings
 from ..database import get_db
 from ..models.user import User
+from .revocation import revocation_list
+from .users import load_user
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer(auto_error=False)
@@ -21,19 +29,94 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti identifies the token for revocation on logout
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[dict]:
+class TokenCache:
+    """
+    Verified JWT payloads by token digest, each valid until the token's ``exp``.
+
+    The same bearer token arrives on every request of a session; a hit skips
+    the HMAC check and claim parsing. Entries are tied to the signing key they
+    were verified with, so changing SECRET_KEY or ALGORITHM flushes the cache.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._signing_key: Tuple[str, str] = (settings.SECRET_KEY, settings.ALGORITHM)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0, "flushes": 0}
+
+    def _check_signing_key(self) -> None:
+        signing_key = (settings.SECRET_KEY, settings.ALGORITHM)
+        if signing_key != self._signing_key:
+            self._entries.clear()
+            self._signing_key = signing_key
+            self.stats["flushes"] += 1
+
+    def get(self, digest: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._check_signing_key()
+            entry = self._entries.get(digest)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[digest]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.stats["hits"] += 1
+            # Callers get their own copy to mutate
+            return dict(entry[1])
+
+    def put(self, digest: bytes, payload: Dict[str, Any]) -> None:
+        # Tokens without an expiry are verified every time
+        if self.max_entries <= 0 or not isinstance(payload.get("exp"), (int, float)):
+            return
+        with self._lock:
+            self._check_signing_key()
+            self._entries[digest] = (payload["exp"], dict(payload))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache(max_entries=settings.TOKEN_CACHE_SIZE)
+
+
+def _decode_token(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
         return None
 
 
+def verify_token(token: str) -> Optional[dict]:
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is None:
+        payload = _decode_token(token)
+        if payload is not None:
+            token_cache.put(digest, payload)
+    return payload
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -44,6 +127,26 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# bcrypt spends a few hundred ms of CPU per call and releases the GIL while doing
+# so. Async handlers run it on this pool, whose size caps concurrent hashing so a
+# burst of logins queues here instead of blocking the event loop or every core.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password-hashing pool, for use in request handlers."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the password-hashing pool, for use in request handlers."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security_required),
     db: AsyncSession = Depends(get_db)
@@ -70,8 +173,14 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    result = await db.execute(select(User).where(User.uuid == user_id))
-    user = result.scalar_one_or_none()
+    if await revocation_list.is_revoked(db, payload.get("jti")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user = await load_user(db, user_id)
     
     if not user:
         raise HTTPException(
@@ -101,11 +210,8 @@ async def get_current_user_optional(
         return None
     
     user_id = payload.get("sub")
-    if not user_id:
+    if not user_id or await revocation_list.is_revoked(db, payload.get("jti")):
         return None
     
-    result = await db.execute(select(User).where(User.uuid == user_id))
-    user = result.scalar_one_or_none()
-    
-    return user
+    return await load_user(db, user_id)
 
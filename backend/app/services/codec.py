@@ -0,0 +1,130 @@
+"""
+Fast codec for the recommendation tree.
+
+A recommendation response is a deep tree (projects -> weeks -> tasks -> resources).
+Building it through Pydantic constructors and then letting FastAPI re-validate it
+for ``response_model`` means the same data is validated twice. The structs below
+mirror the Pydantic models in ``models/survey.py`` field for field, so provider
+JSON is decoded and type-checked in one pass and responses are encoded straight
+to bytes.
+"""
+from typing import List, Union
+
+import msgspec
+
+from ..models.survey import RecommendationResponse
+
+
+class TaskResourceStruct(msgspec.Struct, gc=False):
+    title: str
+    url: str
+    type: str
+
+
+class TaskDetailStruct(msgspec.Struct, gc=False):
+    name: str
+    description: str
+    steps: List[str]
+    resources: List[TaskResourceStruct]
+    estimated_time: str
+
+
+class RoadmapWeekStruct(msgspec.Struct, gc=False):
+    week: int
+    title: str
+    tasks: List[TaskDetailStruct]
+    deliverables: List[str]
+
+
+class ProjectRecommendationStruct(msgspec.Struct, gc=False):
+    title: str
+    description: str
+    difficulty_level: str
+    tech_stack: List[str]
+    estimated_duration: str
+    learning_outcomes: List[str]
+    roadmap: List[RoadmapWeekStruct]
+    tags: List[str]
+
+
+class ProviderPayload(msgspec.Struct):
+    """Shape of the JSON object the providers are asked to return."""
+    recommendations: List[ProjectRecommendationStruct]
+    personalization_summary: str
+
+
+class RecommendationStruct(msgspec.Struct):
+    """Struct twin of ``RecommendationResponse``."""
+    student_name: str
+    recommendations: List[ProjectRecommendationStruct]
+    personalization_summary: str
+
+
+# DecodeError covers malformed/truncated JSON as well as ValidationError (its subclass)
+CodecError = msgspec.DecodeError
+
+# Lax like the Pydantic models it replaced: providers sometimes quote numbers ("week": "1")
+_provider_decoder = msgspec.json.Decoder(ProviderPayload, strict=False)
+_response_decoder = msgspec.json.Decoder(RecommendationStruct)
+_encoder = msgspec.json.Encoder()
+
+
+def decode_provider_json(raw: Union[str, bytes], student_name: str) -> RecommendationStruct:
+    """Decode and validate a provider's JSON answer in a single pass."""
+    payload = _provider_decoder.decode(raw)
+    return RecommendationStruct(
+        student_name=student_name,
+        recommendations=payload.recommendations,
+        personalization_summary=payload.personalization_summary,
+    )
+
+
+def salvage_provider_json(raw: Union[str, bytes], student_name: str) -> RecommendationStruct:
+    """Keep the projects that validate on their own when the full answer does not.
+
+    Providers occasionally return one malformed project (a missing field, a
+    string where a list belongs); dropping it is cheaper than another round-trip.
+    Raises ``CodecError`` when nothing usable is left.
+    """
+    try:
+        payload = msgspec.json.decode(raw)
+    except msgspec.DecodeError as e:
+        raise CodecError(f"Unparseable provider answer: {e}") from e
+    if not isinstance(payload, dict):
+        raise CodecError("Provider answer is not a JSON object")
+    recommendations = []
+    for item in payload.get("recommendations") or []:
+        try:
+            recommendations.append(msgspec.convert(item, ProjectRecommendationStruct, strict=False))
+        except msgspec.ValidationError:
+            continue
+    if not recommendations:
+        raise CodecError("No valid recommendations in provider answer")
+    summary = payload.get("personalization_summary")
+    return RecommendationStruct(
+        student_name=student_name,
+        recommendations=recommendations,
+        personalization_summary=summary if isinstance(summary, str) else "",
+    )
+
+
+def decode_recommendations(raw: Union[str, bytes]) -> RecommendationStruct:
+    """Decode a previously encoded ``RecommendationStruct``."""
+    return _response_decoder.decode(raw)
+
+
+def from_model(model: RecommendationResponse) -> RecommendationStruct:
+    """Convert a Pydantic ``RecommendationResponse`` into its struct twin."""
+    return msgspec.convert(model.model_dump(), RecommendationStruct)
+
+
+def to_model(struct: RecommendationStruct) -> RecommendationResponse:
+    """Convert a struct back into the Pydantic model (for callers that need it)."""
+    return RecommendationResponse.model_validate(msgspec.to_builtins(struct))
+
+
+def encode_recommendations(recommendations: Union[RecommendationStruct, RecommendationResponse]) -> bytes:
+    """Encode a recommendation tree straight to JSON bytes."""
+    if isinstance(recommendations, RecommendationResponse):
+        return recommendations.model_dump_json().encode()
+    return _encoder.encode(recommendations)
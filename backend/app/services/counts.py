@@ -0,0 +1,85 @@
+"""
+Totals for the community project listing.
+
+A filtered listing is counted with ``COUNT(*)`` over the same conditions as
+the page it returns, so ``total`` always agrees with what paging will find.
+
+The unfiltered total - the first page of the community board - is the same
+for every visitor. With ``COMMUNITY_TOTAL_MODE=cached`` it is kept in process
+for ``COMMUNITY_TOTAL_TTL_SECONDS`` and dropped when a project is published
+here, so that page costs no count at all on a hit. A publish in another worker
+shows up once the TTL expires. ``exact`` (the default) counts on every request.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.user import Project
+
+
+async def count_projects(db: AsyncSession, *conditions, search=None) -> int:
+    query = select(func.count()).select_from(Project)
+    if search is not None:
+        query = search.apply(query)
+    return await db.scalar(query.where(*conditions))
+
+
+class PublishedTotal:
+    """The cached number of published projects."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value: Optional[int] = None
+        self._expires_at = 0.0
+        # Bumped on invalidate, so a count that started before a publish is not stored after it
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = None
+            self._generation += 1
+            self.stats["invalidations"] += 1
+
+    async def get(self, db: AsyncSession) -> int:
+        with self._lock:
+            if self._value is not None and self._expires_at > time.monotonic():
+                self.stats["hits"] += 1
+                return self._value
+            self.stats["misses"] += 1
+            generation = self._generation
+        value = await count_projects(db, Project.is_published == True)
+        with self._lock:
+            if generation == self._generation:
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+        return value
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "mode": settings.COMMUNITY_TOTAL_MODE,
+            "value": self._value,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+published_total = PublishedTotal(ttl=settings.COMMUNITY_TOTAL_TTL_SECONDS)
+
+
+async def community_total(db: AsyncSession, *conditions, search=None) -> int:
+    """
+    Total for a listing; ``conditions`` beyond ``is_published`` or a full-text
+    ``search`` (a ``ProjectSearch``) make it a filtered count.
+    """
+    if search is not None:
+        return await count_projects(db, search.published(), *conditions, search=search)
+    if conditions or settings.COMMUNITY_TOTAL_MODE != "cached":
+        return await count_projects(db, Project.is_published == True, *conditions, search=search)
+    return await published_total.get(db)
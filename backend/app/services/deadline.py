@@ -0,0 +1,119 @@
+"""
+End-to-end request deadlines with per-stage budgets.
+
+Each endpoint that calls a provider gets a deadline. Every stage on the way
+(provider call, retry, salvage, fallback) runs with whatever budget is left,
+minus a small reserve that keeps the demo-catalog fallback inside the SLO. The
+outcome of every stage is counted so timeouts are visible per stage.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import anthropic
+import httpx
+import openai
+import requests
+from google.api_core import exceptions as google_exceptions
+
+from ..config import settings
+
+T = TypeVar("T")
+
+# Per-endpoint budgets in seconds, overridable with REQUEST_DEADLINES
+DEFAULT_DEADLINES = {
+    "survey_submit": 30.0,
+    "survey_prefetch": 60.0,
+    "roadmap_regenerate": 20.0,
+    "ai_assistant": 20.0,
+}
+
+# Don't start a stage that has less than this left - it cannot finish in time
+MIN_STAGE_SECONDS = 1.0
+
+# Provider clients get the stage budget as their own timeout (and no retries),
+# so these usually fire before asyncio's and mean the same thing
+CLIENT_TIMEOUTS = (
+    httpx.TimeoutException,
+    openai.APITimeoutError,
+    anthropic.APITimeoutError,
+    google_exceptions.DeadlineExceeded,  # Gemini over gRPC
+    requests.Timeout,                    # Gemini over REST
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage is skipped or cut off because the request ran out of time."""
+
+
+class Deadline:
+    def __init__(self, budget_seconds: float, name: str = "request"):
+        self.name = name
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    @classmethod
+    def for_endpoint(cls, name: str) -> "Deadline":
+        budget = settings.request_deadlines.get(name, DEFAULT_DEADLINES.get(name, settings.REQUEST_DEADLINE_SECONDS))
+        return cls(float(budget), name)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def stage_budget(self) -> float:
+        """Time a stage may use while still leaving room for the fallback."""
+        return self.remaining() - settings.DEADLINE_FALLBACK_RESERVE_SECONDS
+
+
+class StageRecorder:
+    """Counts stage outcomes (ok / timeout / error / skipped) per endpoint and stage."""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, deadline: Optional[Deadline], stage: str, outcome: str) -> None:
+        key = f"{deadline.name if deadline else 'none'}.{stage}"
+        counts = self._counts.setdefault(key, {"ok": 0, "timeout": 0, "error": 0, "skipped": 0})
+        counts[outcome] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {key: dict(counts) for key, counts in self._counts.items()}
+
+
+stage_recorder = StageRecorder()
+
+
+async def run_stage(
+    stage: str,
+    deadline: Optional[Deadline],
+    make_call: Callable[[Optional[float]], Awaitable[T]]
+) -> T:
+    """Run one stage with the remaining budget.
+
+    ``make_call`` receives the timeout to hand to the underlying client (None
+    without a deadline) and returns the awaitable to run.
+    """
+    if deadline is None:
+        return await make_call(None)
+
+    budget = deadline.stage_budget()
+    if budget < MIN_STAGE_SECONDS:
+        stage_recorder.record(deadline, stage, "skipped")
+        raise DeadlineExceeded(f"{deadline.name}: no time left for {stage}")
+    try:
+        result = await asyncio.wait_for(make_call(budget), timeout=budget)
+    except (asyncio.TimeoutError, *CLIENT_TIMEOUTS):
+        stage_recorder.record(deadline, stage, "timeout")
+        raise DeadlineExceeded(f"{deadline.name}: {stage} timed out after {budget:.1f}s")
+    except Exception:
+        stage_recorder.record(deadline, stage, "error")
+        raise
+    stage_recorder.record(deadline, stage, "ok")
+    return result
+
+
+def request_deadline(name: str) -> Callable[[], Deadline]:
+    """FastAPI dependency factory that starts the deadline for an endpoint."""
+    async def dependency() -> Deadline:
+        return Deadline.for_endpoint(name)
+    return dependency
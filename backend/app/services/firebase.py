@@ -0,0 +1,126 @@
+"""
+Local verification of Firebase ID tokens.
+
+Firebase ID tokens are RS256 JWTs signed with Google's rotating keys. The
+public certificates are fetched once over the shared outbound client, turned
+into key objects and kept in memory for as long as Google's ``Cache-Control``
+header allows, so verifying a login is a local signature check instead of a
+network round trip. A token signed with a key we have not seen yet triggers one
+early refresh (rate limited) to pick up rotated keys.
+
+Claims are checked as documented by Firebase: RS256, known ``kid``, ``aud`` is
+the project id, ``iss`` is ``https://securetoken.google.com/<project id>``,
+``exp``/``iat``/``auth_time`` valid and a non-empty ``sub``.
+"""
+import asyncio
+import logging
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwk, jwt
+
+from ..config import settings
+from .http_client import outbound_http
+
+logger = logging.getLogger(__name__)
+
+# Used when the key endpoint sends no usable cache headers
+DEFAULT_KEY_TTL_SECONDS = 3600
+# An unknown kid refreshes the keys at most this often
+MIN_REFRESH_INTERVAL_SECONDS = 60
+CLOCK_SKEW_SECONDS = 60
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class FirebaseTokenError(Exception):
+    """The token is malformed, expired, or not signed by Firebase for this project."""
+
+
+def cache_lifetime(headers) -> float:
+    """Seconds the key response may be cached, from Cache-Control max-age or Expires."""
+    match = _MAX_AGE.search(headers.get("cache-control", ""))
+    if match:
+        return float(match.group(1))
+    if headers.get("expires"):
+        try:
+            return max(0.0, parsedate_to_datetime(headers["expires"]).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return DEFAULT_KEY_TTL_SECONDS
+
+
+class FirebaseKeyCache:
+    """Google's signing keys by kid, refreshed according to their cache headers."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._keys: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self.stats = {"fetches": 0, "hits": 0, "unknown_kid_refreshes": 0}
+
+    async def _refresh(self) -> None:
+        response = await outbound_http.client.get(self.url)
+        response.raise_for_status()
+        self._keys = {kid: jwk.construct(cert, "RS256") for kid, cert in response.json().items()}
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + cache_lifetime(response.headers)
+        self.stats["fetches"] += 1
+
+    async def key_for(self, kid: str):
+        now = time.monotonic()
+        if now < self._expires_at and kid in self._keys:
+            self.stats["hits"] += 1
+            return self._keys[kid]
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            now = time.monotonic()
+            expired = now >= self._expires_at
+            if expired or (kid not in self._keys and now - self._fetched_at >= MIN_REFRESH_INTERVAL_SECONDS):
+                if not expired:
+                    self.stats["unknown_kid_refreshes"] += 1
+                await self._refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            raise FirebaseTokenError("Token signed with an unknown key")
+        return key
+
+
+firebase_keys = FirebaseKeyCache(settings.FIREBASE_CERTS_URL)
+
+
+async def verify_firebase_token(token: str) -> Dict[str, Any]:
+    """Verify a Firebase ID token locally and return its claims."""
+    project_id = settings.FIREBASE_PROJECT_ID
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError as e:
+        raise FirebaseTokenError(f"Malformed token: {e}") from e
+    if header.get("alg") != "RS256" or not header.get("kid"):
+        raise FirebaseTokenError("Token is not an RS256 Firebase ID token")
+
+    key = await firebase_keys.key_for(header["kid"])
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=project_id,
+            issuer=f"https://securetoken.google.com/{project_id}",
+            options={"leeway": CLOCK_SKEW_SECONDS},
+        )
+    except JWTError as e:
+        raise FirebaseTokenError(str(e)) from e
+
+    if not claims.get("sub"):
+        raise FirebaseTokenError("Token has no subject")
+    if claims.get("auth_time", 0) > time.time() + CLOCK_SKEW_SECONDS:
+        raise FirebaseTokenError("Token auth_time is in the future")
+    return claims
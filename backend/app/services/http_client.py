@@ -0,0 +1,118 @@
+"""
+Application-wide outbound HTTP client.
+
+One ``httpx.AsyncClient`` is created in the app lifespan and shared by every
+outbound integration (OAuth user-info calls, Firebase key fetches, ...), so
+connections to the same host are kept alive and reused instead of paying a new
+TCP + TLS handshake per login. HTTP/2 is used when the ``h2`` package is
+installed (``httpx[http2]``).
+
+Pool usage is tracked with httpcore trace events: how many requests were sent
+versus how many new connections and TLS handshakes they needed.
+"""
+import importlib.util
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class OutboundHTTP:
+    """Owns the shared client and its pool metrics."""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "connections_opened": 0,
+            "tls_handshakes": 0,
+            "http2_requests": 0,
+            "latency_seconds": 0.0,
+        }
+
+    def _create(self) -> httpx.AsyncClient:
+        http2 = settings.HTTP2_ENABLED and HTTP2_AVAILABLE
+        if settings.HTTP2_ENABLED and not HTTP2_AVAILABLE:
+            logger.warning("HTTP2_ENABLED is set but the h2 package is missing - using HTTP/1.1")
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(
+                settings.HTTP_READ_TIMEOUT_SECONDS,
+                connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+                pool=settings.HTTP_POOL_TIMEOUT_SECONDS,
+            ),
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = self._create()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            # Outside the app lifespan (scripts, tests) - create on first use
+            self._client = self._create()
+        return self._client
+
+    async def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.stats["connections_opened"] += 1
+        elif event == "connection.start_tls.complete":
+            self.stats["tls_handshakes"] += 1
+        elif event.startswith("http2.send_request_headers.started"):
+            self.stats["http2_requests"] += 1
+        elif event.endswith(".failed"):
+            self.stats["errors"] += 1
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        request.extensions["trace"] = self._trace
+        request.extensions["sanapath_started_at"] = time.monotonic()
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self.stats["requests"] += 1
+        started_at = response.request.extensions.get("sanapath_started_at")
+        if started_at is not None:
+            self.stats["latency_seconds"] += time.monotonic() - started_at
+
+    def snapshot(self) -> Dict[str, Any]:
+        connections = []
+        if self._client is not None:
+            # httpcore keeps its pool on the default transport
+            pool = getattr(self._client._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "http2": bool(self._client and HTTP2_AVAILABLE and settings.HTTP2_ENABLED),
+            "reuse_ratio": round(1 - self.stats["connections_opened"] / requests, 4) if requests else 0.0,
+            "avg_latency_seconds": round(self.stats["latency_seconds"] / requests, 4) if requests else 0.0,
+        }
+
+
+outbound_http = OutboundHTTP()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """FastAPI dependency returning the shared outbound client."""
+    return outbound_http.client
@@ -0,0 +1,121 @@
+"""
+Community project membership and the denormalized ``Project.member_count``.
+
+Listings show how many people are on each project. Counting them used to load
+every collaborator's ``User`` row for every project on the page; the count is
+now a column (owner included) changed in the same transaction as the
+``project_collaborators`` row it reflects:
+
+- join: the membership row is inserted, then ``UPDATE ... SET member_count =
+  member_count + 1 WHERE member_count < max_team_size`` - the capacity check
+  and the increment are one statement, so concurrent joins cannot overfill a
+  team;
+- leave: the membership row is deleted, then the count decremented.
+
+A periodic job recomputes the counts from ``project_collaborators`` and fixes
+any that drifted (rows changed outside these paths, or before the column
+existed).
+"""
+import asyncio
+import logging
+
+from fastapi import HTTPException
+from sqlalchemy import and_, case, delete, exists, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import dialect_insert
+from ..models.user import Project, User, project_collaborators
+
+logger = logging.getLogger(__name__)
+
+
+def _membership(project: Project, user: User):
+    return and_(project_collaborators.c.project_id == project.id, project_collaborators.c.user_id == user.id)
+
+
+async def add_member(db: AsyncSession, project: Project, user: User) -> int:
+    """Add ``user`` to the project's collaborators; returns the new member count."""
+    values = {"project_id": project.id, "user_id": user.id}
+    dialect = dialect_insert(db)
+    if dialect is not None:
+        # The primary key makes a concurrent double join a no-op instead of an error
+        result = await db.execute(dialect(project_collaborators).values(**values).on_conflict_do_nothing())
+        inserted = bool(result.rowcount)
+    else:
+        inserted = not await db.scalar(select(exists().where(_membership(project, user))))
+        if inserted:
+            await db.execute(insert(project_collaborators).values(**values))
+    if not inserted:
+        raise HTTPException(status_code=400, detail="You are already a member of this project")
+
+    # Capacity check and increment in one statement; when full, the insert above is rolled back
+    count = await db.scalar(
+        update(Project)
+        .where(Project.id == project.id, Project.member_count < Project.max_team_size)
+        .values(member_count=Project.member_count + 1)
+        .returning(Project.member_count)
+    )
+    if count is None:
+        raise HTTPException(status_code=400, detail="Project team is full")
+    return count
+
+
+async def remove_member(db: AsyncSession, project: Project, user: User) -> int:
+    """Remove ``user`` from the project's collaborators; returns the new member count."""
+    result = await db.execute(delete(project_collaborators).where(_membership(project, user)))
+    if not result.rowcount:
+        raise HTTPException(status_code=400, detail="You are not a member of this project")
+    return await db.scalar(
+        update(Project)
+        .where(Project.id == project.id)
+        .values(member_count=case((Project.member_count > 1, Project.member_count - 1), else_=1))
+        .returning(Project.member_count)
+    )
+
+
+def actual_member_count():
+    """Owner plus collaborators, correlated to the ``Project`` row being updated."""
+    collaborators = (
+        select(func.count())
+        .select_from(project_collaborators)
+        .where(project_collaborators.c.project_id == Project.id)
+        .scalar_subquery()
+    )
+    return collaborators + 1
+
+
+async def reconcile_member_counts(session_factory, batch_size: int = 5000) -> int:
+    """Recompute ``member_count`` from ``project_collaborators``. Returns the number of projects fixed."""
+    fixed = 0
+    last_id = 0
+    while True:
+        # Small id ranges, so the write lock is only held briefly
+        async with session_factory() as db:
+            upper = await db.scalar(
+                select(func.max(Project.id)).where(Project.id.in_(
+                    select(Project.id).where(Project.id > last_id).order_by(Project.id).limit(batch_size)
+                ))
+            )
+            if upper is None:
+                return fixed
+            actual = actual_member_count()
+            result = await db.execute(
+                update(Project)
+                .where(Project.id > last_id, Project.id <= upper, Project.member_count != actual)
+                .values(member_count=actual)
+            )
+            await db.commit()
+            fixed += result.rowcount or 0
+            last_id = upper
+
+
+async def reconcile_member_counts_periodically(session_factory, interval_seconds: float) -> None:
+    """Background reconciliation of member counts, started from the application lifespan."""
+    while True:
+        try:
+            fixed = await reconcile_member_counts(session_factory)
+            if fixed:
+                logger.info(f"Reconciled member counts of {fixed} projects")
+        except Exception as e:
+            logger.warning(f"Member count reconciliation failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,62 @@
+"""
+Keyset (cursor) pagination for listings ordered newest first.
+
+``OFFSET n`` makes the database walk and discard ``n`` rows, so deep pages get
+slower linearly, and a row inserted while someone scrolls shifts every later
+page (an item is shown twice, or skipped). A cursor instead names the last row
+seen by its ``(timestamp, id)`` key; the next page is the rows strictly before
+it in the index, which costs the same on every page and is unaffected by new
+rows. The id breaks ties between rows created in the same second.
+
+Cursors are opaque to clients: URL-safe base64 of the key.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(timestamp: datetime, id: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def before_cursor(timestamp_column, id_column, cursor: str):
+    """Rows after the cursor in ``ORDER BY timestamp DESC, id DESC`` order."""
+    timestamp, id = decode_cursor(cursor)
+    # Bound with the columns' own types, so the timestamp is stored-format (see PaginationTimestamp)
+    return tuple_(timestamp_column, id_column) < tuple_(
+        literal(timestamp, timestamp_column.type), literal(id, id_column.type)
+    )
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query,
+    limit: int,
+    key: Optional[Callable[[Any], Tuple[datetime, int]]],
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Run ``query`` for one page of ``limit`` rows. Reads one extra row to tell
+    whether there is a next page; ``next_cursor`` is None on the last one, and
+    always when there is no ``key`` (a listing not ordered by one).
+    """
+    rows = (await db.execute(query.limit(limit + 1))).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1])) if key else None
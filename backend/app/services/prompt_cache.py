@@ -0,0 +1,35 @@
+"""
+Provider prompt-prefix caching for the static system prompts.
+
+The system prompt is identical on every request, so each provider is asked to
+cache it as a reusable prefix:
+
+- Anthropic: the system prompt is sent as a text block with ``cache_control``.
+- OpenAI: caching is automatic for a stable prefix; the system message always
+  comes first and a ``prompt_cache_key`` per prompt version routes requests to
+  the same cache.
+
+Providers only cache prefixes above a minimum size; below it the request is
+sent exactly as before. Gemini gets no prefix caching: its explicit cached
+content needs a prefix of at least 4096 tokens, several times the size of
+any of our system prompts.
+"""
+from typing import Any, Dict, List
+
+from ..config import settings
+from .prompts import PromptTemplate
+
+
+def anthropic_system_blocks(prompt: PromptTemplate) -> List[Dict[str, Any]]:
+    """System prompt as a cacheable content block."""
+    block: Dict[str, Any] = {"type": "text", "text": prompt.text}
+    if settings.PROMPT_CACHE_ENABLED:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+
+def openai_cache_options(prompt: PromptTemplate) -> Dict[str, Any]:
+    """Extra request body that keeps requests for one prompt version on the same cache."""
+    if not settings.PROMPT_CACHE_ENABLED:
+        return {}
+    return {"extra_body": {"prompt_cache_key": f"sanapath:{prompt.key}"}}
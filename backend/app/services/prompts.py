@@ -0,0 +1,384 @@
+"""
+Versioned prompt registry with local token accounting.
+
+Every system prompt is registered under a name and version together with an
+input-token budget for the prompt plus a typical user message. Budgets are
+checked by the test suite, so a prompt change that bloats the payload shows up
+as a failing test instead of silently slower and more expensive requests.
+Provider calls report their input/output token usage through ``record_usage``.
+"""
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Words cost roughly one token per 4 characters, every punctuation character
+# about one token and each line break plus indentation one more. This
+# overestimates BPE tokenizers slightly, which is the safe side for budgets.
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\n[ \t]*")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in ``text`` without calling a tokenizer."""
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece[0].isalnum() or piece[0] == "_":
+            tokens += (len(piece) + 3) // 4
+        else:
+            tokens += 1
+    return tokens
+
+
+# Prompt texts are static, so their estimates are memoized
+_static_tokens = lru_cache(maxsize=64)(estimate_tokens)
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    version: str
+    text: str
+    # Max estimated input tokens for this prompt plus a typical user message
+    budget_tokens: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    @property
+    def tokens(self) -> int:
+        return _static_tokens(self.text)
+
+
+class PromptRegistry:
+    """Holds every registered prompt version and which version is active per name."""
+
+    def __init__(self):
+        self._prompts: Dict[str, Dict[str, PromptTemplate]] = {}
+        self._active: Dict[str, str] = {}
+
+    def register(self, prompt: PromptTemplate, active: bool = False) -> PromptTemplate:
+        self._prompts.setdefault(prompt.name, {})[prompt.version] = prompt
+        if active or prompt.name not in self._active:
+            self._active[prompt.name] = prompt.version
+        return prompt
+
+    def get(self, name: str, version: Optional[str] = None) -> PromptTemplate:
+        versions = self._prompts[name]
+        version = version or settings.prompt_versions.get(name) or self._active[name]
+        return versions[version]
+
+    def versions(self, name: str) -> List[str]:
+        return list(self._prompts[name])
+
+    def active(self) -> List[PromptTemplate]:
+        return [self.get(name) for name in self._prompts]
+
+    def budget_for(self, prompt: PromptTemplate) -> int:
+        return settings.prompt_budgets.get(prompt.name, prompt.budget_tokens)
+
+
+prompt_registry = PromptRegistry()
+
+
+def check_budget(prompt: PromptTemplate, user_prompt: str) -> int:
+    """Estimate input tokens for a request and warn when it exceeds the prompt's budget."""
+    input_tokens = prompt.tokens + estimate_tokens(user_prompt)
+    budget = prompt_registry.budget_for(prompt)
+    if input_tokens > budget:
+        logger.warning(f"Prompt {prompt.key} is over budget: ~{input_tokens} > {budget} input tokens")
+    return input_tokens
+
+
+class TokenAccountant:
+    """Running token totals per prompt version and provider."""
+
+    def __init__(self):
+        self._totals: Dict[str, Dict[str, float]] = {}
+        # Same usage per model, for per-tier latency and cost reports
+        self._models: Dict[str, Dict[str, float]] = {}
+
+    def record(
+        self,
+        prompt: PromptTemplate,
+        provider: str,
+        input_tokens: int,
+        output_tokens: int,
+        latency_seconds: float,
+        estimated: bool = False,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        model: Optional[str] = None
+    ) -> None:
+        if model:
+            per_model = self._models.setdefault(model, {
+                "calls": 0, "input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0, "latency_seconds": 0.0,
+            })
+            per_model["calls"] += 1
+            per_model["input_tokens"] += input_tokens
+            per_model["cached_input_tokens"] += cached_input_tokens
+            per_model["output_tokens"] += output_tokens
+            per_model["latency_seconds"] += latency_seconds
+        totals = self._totals.setdefault(f"{prompt.key}:{provider}", {
+            "calls": 0,
+            "estimated_calls": 0,
+            "input_tokens": 0,
+            "cached_input_tokens": 0,
+            "cache_write_tokens": 0,
+            "output_tokens": 0,
+            "latency_seconds": 0.0,
+        })
+        totals["calls"] += 1
+        totals["estimated_calls"] += int(estimated)
+        totals["input_tokens"] += input_tokens
+        totals["cached_input_tokens"] += cached_input_tokens
+        totals["cache_write_tokens"] += cache_write_tokens
+        totals["output_tokens"] += output_tokens
+        totals["latency_seconds"] += latency_seconds
+        logger.info(
+            f"LLM call {prompt.key} via {provider}{f' ({model})' if model else ''}: {input_tokens} in ({cached_input_tokens} cached) / "
+            f"{output_tokens} out tokens{' (estimated)' if estimated else ''} in {latency_seconds:.2f}s"
+        )
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for key, totals in self._totals.items():
+            calls = totals["calls"] or 1
+            result[key] = {
+                **totals,
+                "avg_input_tokens": round(totals["input_tokens"] / calls, 1),
+                "avg_output_tokens": round(totals["output_tokens"] / calls, 1),
+                "avg_latency_seconds": round(totals["latency_seconds"] / calls, 3),
+                "cache_hit_ratio": round(totals["cached_input_tokens"] / totals["input_tokens"], 4)
+                if totals["input_tokens"] else 0.0,
+            }
+        return result
+
+    def model_totals(self) -> Dict[str, Dict[str, float]]:
+        return {model: dict(totals) for model, totals in self._models.items()}
+
+    def reset(self) -> None:
+        self._totals.clear()
+        self._models.clear()
+
+
+token_accountant = TokenAccountant()
+
+
+def record_usage(
+    prompt: PromptTemplate,
+    provider: str,
+    user_prompt: str,
+    output_text: str,
+    started_at: float,
+    input_tokens: Optional[int] = None,
+    output_tokens: Optional[int] = None,
+    cached_input_tokens: Optional[int] = None,
+    cache_write_tokens: Optional[int] = None,
+    model: Optional[str] = None
+) -> None:
+    """Record a provider call, estimating whatever usage the provider did not report.
+
+    ``input_tokens`` is the total prompt size including any part served from the
+    provider's prefix cache; ``cached_input_tokens`` is that cached part.
+    """
+    estimated = input_tokens is None or output_tokens is None
+    token_accountant.record(
+        prompt,
+        provider,
+        input_tokens if input_tokens is not None else prompt.tokens + estimate_tokens(user_prompt),
+        output_tokens if output_tokens is not None else estimate_tokens(output_text or ""),
+        time.monotonic() - started_at,
+        estimated=estimated,
+        cached_input_tokens=cached_input_tokens or 0,
+        cache_write_tokens=cache_write_tokens or 0,
+        model=model,
+    )
+
+
+# ===== RECOMMENDATIONS =====
+
+# Fixed 4-week roadmaps - only consistent with MODEL_TIERING_ENABLED=false
+RECOMMENDATIONS_V1 = prompt_registry.register(PromptTemplate(
+    name="recommendations",
+    version="v1",
+    budget_tokens=1400,
+    text="""You are an expert AI career counselor and project recommendation engine for the SanaPath AI platform, serving 60,000 students in the AI-Sana ecosystem.
+
+Your role is to analyze student profiles and recommend personalized AI/ML project ideas that match their skills, interests, and career goals.
+
+For each recommendation, you must provide:
+1. A compelling project title
+2. A detailed description (2-3 sentences)
+3. Difficulty level (Beginner, Intermediate, Advanced, Expert)
+4. Complete tech stack (programming languages, frameworks, tools)
+5. Estimated duration
+6. Key learning outcomes (3-5 bullet points)
+7. A DETAILED 4-week implementation roadmap where EACH TASK includes:
+   - Clear step-by-step instructions
+   - Helpful resources (YouTube tutorials, documentation links, articles)
+   - Estimated time for completion
+8. Relevant tags for discoverability
+
+IMPORTANT: Your response must be valid JSON matching this exact structure:
+{
+    "recommendations": [
+        {
+            "title": "Project Title",
+            "description": "Detailed description...",
+            "difficulty_level": "Intermediate",
+            "tech_stack": ["Python", "TensorFlow", "FastAPI"],
+            "estimated_duration": "4 weeks",
+            "learning_outcomes": ["outcome1", "outcome2", "outcome3"],
+            "roadmap": [
+                {
+                    "week": 1,
+                    "title": "Week 1: Foundation",
+                    "tasks": [
+                        {
+                            "name": "Set up development environment",
+                            "description": "Install Python, create virtual environment, install required packages",
+                            "steps": [
+                                "Install Python 3.10+ from python.org",
+                                "Create virtual environment: python -m venv venv",
+                                "Install packages: pip install tensorflow numpy pandas"
+                            ],
+                            "resources": [
+                                {"title": "Python Installation Guide", "url": "https://www.python.org/downloads/", "type": "docs"},
+                                {"title": "TensorFlow Setup Tutorial", "url": "https://www.tensorflow.org/install", "type": "docs"},
+                                {"title": "Python Virtual Environments", "url": "https://www.youtube.com/watch?v=APOPm01BVrk", "type": "video"}
+                            ],
+                            "estimated_time": "2 hours"
+                        }
+                    ],
+                    "deliverables": ["Working development environment", "Project repository on GitHub"]
+                }
+            ],
+            "tags": ["NLP", "Deep Learning", "Healthcare"]
+        }
+    ],
+    "personalization_summary": "Summary of why these projects match the student..."
+}
+
+CRITICAL: Each task MUST have detailed steps and real working resource links (YouTube, official docs, tutorials). Generate exactly 5 unique project recommendations.""",
+))
+
+# Roadmap length follows the user message (tiering asks for 2-8 weeks and a number
+# of tasks per week) instead of a fixed 4 weeks the message then contradicts
+RECOMMENDATIONS_V3 = prompt_registry.register(PromptTemplate(
+    name="recommendations",
+    version="v3",
+    budget_tokens=1400,
+    text=RECOMMENDATIONS_V1.text.replace(
+        "7. A DETAILED 4-week implementation roadmap where EACH TASK includes:",
+        "7. A DETAILED implementation roadmap with one entry per week, exactly as many weeks (and tasks per week) as the request asks for, where EACH TASK includes:",
+    ).replace('"estimated_duration": "4 weeks"', '"estimated_duration": "<number of roadmap weeks> weeks"'),
+), active=True)
+
+# ===== ROADMAP REGENERATION =====
+
+ROADMAP_WEEK_V1 = prompt_registry.register(PromptTemplate(
+    name="roadmap_week",
+    version="v1",
+    budget_tokens=700,
+    text="""You are the roadmap editor for the SanaPath AI platform. You rewrite ONE week of an existing AI project roadmap.
+
+Keep the week number, fit it between the surrounding weeks and the project's tech stack, and make it clearly different from the current version.
+
+Respond with valid JSON matching this exact structure:
+{
+    "week": 3,
+    "title": "Week 3: ...",
+    "tasks": [
+        {
+            "name": "Task name",
+            "description": "What and why",
+            "steps": ["step 1", "step 2", "step 3"],
+            "resources": [{"title": "Resource", "url": "https://...", "type": "docs"}],
+            "estimated_time": "3 hours"
+        }
+    ],
+    "deliverables": ["deliverable 1", "deliverable 2"]
+}""",
+), active=True)
+
+ROADMAP_TASK_V1 = prompt_registry.register(PromptTemplate(
+    name="roadmap_task",
+    version="v1",
+    budget_tokens=600,
+    text="""You are the roadmap editor for the SanaPath AI platform. You rewrite ONE task inside one week of an existing AI project roadmap.
+
+Fit the task to the week's goal and the project's tech stack, and make it clearly different from the current version.
+
+Respond with valid JSON matching this exact structure:
+{
+    "name": "Task name",
+    "description": "What and why",
+    "steps": ["step 1", "step 2", "step 3"],
+    "resources": [{"title": "Resource", "url": "https://...", "type": "docs"}],
+    "estimated_time": "3 hours"
+}""",
+), active=True)
+
+
+# ===== AI ASSISTANT =====
+
+PROJECT_HELP_V1 = prompt_registry.register(PromptTemplate(
+    name="project_help",
+    version="v1",
+    budget_tokens=600,
+    text="""You are the project mentor for the SanaPath AI platform, helping a student with the AI project they are building.
+
+You get the project summary and the roadmap excerpts most relevant to the question. Answer in plain text (short paragraphs or a short list), refer to weeks and tasks by name, and point to the listed resources when they help. If the excerpts do not cover the question, say so briefly and give general guidance.""",
+), active=True)
+
+PROJECT_IDEA_V1 = prompt_registry.register(PromptTemplate(
+    name="project_idea",
+    version="v1",
+    budget_tokens=700,
+    text="""You are an AI career advisor for the SanaPath AI platform. Suggest ONE portfolio-worthy AI project idea for the student's interests.
+
+Respond with valid JSON matching this exact structure:
+{
+    "title": "Project Title",
+    "description": "2-3 sentence description",
+    "difficulty_level": "Beginner/Intermediate/Advanced",
+    "tech_stack": ["Python", "PyTorch"],
+    "estimated_duration": "4 weeks",
+    "learning_outcomes": ["outcome 1", "outcome 2"],
+    "roadmap": [
+        {
+            "week": 1,
+            "title": "Week 1: ...",
+            "tasks": [{"name": "Task", "description": "What and why", "steps": ["step 1"], "resources": [{"title": "Resource", "url": "https://...", "type": "docs"}], "estimated_time": "3 hours"}],
+            "deliverables": ["deliverable 1"]
+        }
+    ],
+    "tags": ["tag1", "tag2"]
+}""",
+), active=True)
+
+
+def _compact_example(text: str) -> str:
+    """Re-serialize the pretty-printed JSON example inside a prompt without indentation."""
+    start = text.index("{", text.index("structure:"))
+    end = text.rindex("}") + 1
+    example = json.loads(text[start:end])
+    return text[:start] + json.dumps(example, separators=(",", ":"), ensure_ascii=False) + text[end:]
+
+
+# Same instructions as v3 with the schema example minified (no indentation or line breaks).
+# Activate with PROMPT_VERSIONS=recommendations=v2
+RECOMMENDATIONS_V2 = prompt_registry.register(PromptTemplate(
+    name="recommendations",
+    version="v2",
+    budget_tokens=1350,
+    text=_compact_example(RECOMMENDATIONS_V3.text),
+))
@@ -0,0 +1,197 @@
+"""
+Targeted regeneration of a single roadmap week or task.
+
+Instead of regenerating all five projects, the provider only sees a compact
+context of the one project being edited (its summary and the titles of the
+other weeks) and returns a single week or task that is patched into place.
+"""
+import copy
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import msgspec
+
+from ..config import settings
+from ..models.survey import SurveyResponse
+from .ai_engine import complete_json, generate_demo_recommendations
+from .codec import RoadmapWeekStruct, TaskDetailStruct
+from .deadline import Deadline, run_stage, stage_recorder
+from .prompts import prompt_registry
+
+# Output budgets - a single week/task is a small fraction of a full generation
+WEEK_MAX_TOKENS = 1200
+TASK_MAX_TOKENS = 400
+
+_week_decoder = msgspec.json.Decoder(RoadmapWeekStruct)
+_task_decoder = msgspec.json.Decoder(TaskDetailStruct)
+
+
+def locate(roadmap: List[Dict[str, Any]], week: int, task_index: Optional[int] = None) -> int:
+    """Return the list index of ``week`` in ``roadmap``, raising LookupError if the target is missing."""
+    for index, week_data in enumerate(roadmap):
+        if week_data.get("week") == week:
+            if task_index is not None and not 0 <= task_index < len(week_data.get("tasks") or []):
+                raise LookupError(f"Task {task_index} not found in week {week}")
+            return index
+    raise LookupError(f"Week {week} not found in roadmap")
+
+
+def _task_name(task: Any) -> str:
+    return task.get("name", "") if isinstance(task, dict) else str(task)
+
+
+def _is_week(week_data: Any) -> bool:
+    return isinstance(week_data, dict) and isinstance(week_data.get("tasks", []), list)
+
+
+def stored_projects(raw: str) -> Tuple[Any, List[Dict[str, Any]]]:
+    """Decode ``Recommendation.recommendations_json`` into (payload, its list of projects).
+
+    Rows hold either the list of projects or a whole ``RecommendationResponse``
+    object; the projects are the payload's own dicts, so edits to them are
+    saved by re-encoding the payload. Raises ValueError for anything else.
+    """
+    payload = json.loads(raw)
+    projects = payload.get("recommendations") if isinstance(payload, dict) else payload
+    if not isinstance(projects, list) or not all(
+        isinstance(project, dict)
+        and isinstance(project.get("roadmap", []), list)
+        and all(_is_week(week_data) for week_data in project.get("roadmap", []))
+        for project in projects
+    ):
+        raise ValueError("Stored recommendation is not a list of projects with roadmaps")
+    return payload, projects
+
+
+def build_context_prompt(
+    project: Dict[str, Any],
+    roadmap: List[Dict[str, Any]],
+    week: int,
+    task_index: Optional[int] = None,
+    instructions: Optional[str] = None
+) -> str:
+    """Compact context for one project: summary, week outline and the item being replaced."""
+    outline = "\n".join(
+        f"- {w.get('title', '')}" if str(w.get("title", "")).lower().startswith("week")
+        else f"- Week {w.get('week')}: {w.get('title', '')}"
+        for w in roadmap
+    )
+    current_week = roadmap[locate(roadmap, week)]
+    # Only names of what is being replaced - the full JSON would dominate the prompt
+    task_names = [_task_name(t) for t in current_week.get("tasks", [])]
+    if task_index is None:
+        target = (
+            f"Rewrite week {week} ({current_week.get('title', '')}).\n"
+            f"Current tasks: {'; '.join(task_names) or 'none'}\n"
+            f"Current deliverables: {'; '.join(current_week.get('deliverables') or []) or 'none'}"
+        )
+    else:
+        current_task = current_week["tasks"][task_index]
+        sibling_tasks = [name for i, name in enumerate(task_names) if i != task_index]
+        description = current_task.get("description", "") if isinstance(current_task, dict) else ""
+        target = (
+            f"Rewrite task {task_index + 1} of week {week} ({current_week.get('title', '')}).\n"
+            f"Other tasks this week: {'; '.join(sibling_tasks) or 'none'}\n"
+            f"Current task: {task_names[task_index]}{f' - {description}' if description else ''}"
+        )
+    return f"""
+Project: {project.get('title', '')}
+Description: {project.get('description') or ''}
+Difficulty: {project.get('difficulty') or project.get('difficulty_level') or 'Not specified'}
+Tech Stack: {', '.join(project.get('tech_stack') or [])}
+
+Roadmap outline:
+{outline}
+
+{target}
+{f"Student's request: {instructions}" if instructions else ""}
+"""
+
+
+def _demo_week(project: Dict[str, Any], current: Dict[str, Any]) -> RoadmapWeekStruct:
+    """Pick an alternative week with the same number from the demo catalog."""
+    catalog = generate_demo_recommendations(SurveyResponse(
+        name="SanaPath",
+        email="",
+        programming_languages=[],
+        skill_level="intermediate",
+        ai_ml_experience="",
+        interest_areas=["Computer Vision", "NLP", "Machine Learning", "Generative AI"],
+        preferred_project_type="",
+        industry_interest=[],
+        career_goal="",
+        learning_style="",
+        time_commitment="",
+        project_duration="",
+        team_preference="",
+        collaboration_tools=[],
+    ))
+    candidates = [
+        week_data
+        for rec in catalog.recommendations if rec.title != project.get("title")
+        for week_data in rec.roadmap if week_data.title != current.get("title")
+    ]
+    same_week = [w for w in candidates if w.week == current.get("week")]
+    candidates = same_week or candidates
+    return msgspec.convert(candidates[0].model_dump(), RoadmapWeekStruct)
+
+
+async def _generate_week(project, roadmap, week, instructions, deadline=None) -> RoadmapWeekStruct:
+    if not settings.AI_DEMO_MODE:
+        try:
+            raw = await run_stage("provider", deadline, lambda timeout: complete_json(
+                prompt_registry.get("roadmap_week"), build_context_prompt(project, roadmap, week, None, instructions),
+                WEEK_MAX_TOKENS, timeout
+            ))
+            return _week_decoder.decode(raw)
+        except Exception as e:
+            print(f"Week regeneration error: {e}, falling back to demo mode")
+        stage_recorder.record(deadline, "fallback", "ok")
+    return _demo_week(project, roadmap[locate(roadmap, week)])
+
+
+async def _generate_task(project, roadmap, week, task_index, instructions, deadline=None) -> TaskDetailStruct:
+    if not settings.AI_DEMO_MODE:
+        try:
+            raw = await run_stage("provider", deadline, lambda timeout: complete_json(
+                prompt_registry.get("roadmap_task"), build_context_prompt(project, roadmap, week, task_index, instructions),
+                TASK_MAX_TOKENS, timeout
+            ))
+            return _task_decoder.decode(raw)
+        except Exception as e:
+            print(f"Task regeneration error: {e}, falling back to demo mode")
+        stage_recorder.record(deadline, "fallback", "ok")
+    current = roadmap[locate(roadmap, week)]
+    alternative = _demo_week(project, current).tasks
+    current_name = _task_name(current["tasks"][task_index])
+    options = [t for t in alternative if t.name != current_name] or alternative
+    return options[task_index % len(options)]
+
+
+async def regenerate_roadmap(
+    project: Dict[str, Any],
+    roadmap: List[Dict[str, Any]],
+    week: int,
+    task_index: Optional[int] = None,
+    instructions: Optional[str] = None,
+    deadline: Optional[Deadline] = None
+) -> List[Dict[str, Any]]:
+    """Regenerate one week (or one task of it) and return a patched copy of ``roadmap``.
+
+    A new list is returned so SQLAlchemy JSON columns see the assignment as a change.
+    Roadmaps whose tasks are plain strings keep plain-string tasks.
+    """
+    week_position = locate(roadmap, week, task_index)
+    patched = copy.deepcopy(roadmap)
+    current_tasks = roadmap[week_position].get("tasks") or []
+    plain = bool(current_tasks) and all(isinstance(task, str) for task in current_tasks)
+    if task_index is None:
+        new_week = msgspec.to_builtins(await _generate_week(project, roadmap, week, instructions, deadline))
+        new_week["week"] = week
+        if plain:
+            new_week["tasks"] = [task["name"] for task in new_week["tasks"]]
+        patched[week_position] = new_week
+    else:
+        new_task = msgspec.to_builtins(await _generate_task(project, roadmap, week, task_index, instructions, deadline))
+        patched[week_position]["tasks"][task_index] = new_task["name"] if plain else new_task
+    return patched
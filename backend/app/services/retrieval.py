@@ -0,0 +1,201 @@
+"""
+Lexical retrieval over a project's roadmap.
+
+A roadmap is split into passages - one per week (title and deliverables), one
+per task (name, description, steps) and one per resource - and indexed with
+BM25. The assistant then only sends the few passages that match the question
+instead of the whole roadmap, which keeps prompts small regardless of how long
+the roadmap grows.
+
+Indexes and query results are cached per project and keyed by a digest of the
+roadmap, so a regenerated or edited roadmap is re-indexed on its next use.
+"""
+import hashlib
+import json
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_WEEK_REFERENCE = re.compile(r"\bweek\s*(\d+)\b")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from how i if in into is it its me my of on or should so
+that the their then there these this to was what when where which who why will with you your
+""".split())
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        # Cheap plural folding so "models" matches "model"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+@dataclass(frozen=True)
+class Passage:
+    kind: str  # "week", "task" or "resource"
+    week: Optional[int]
+    title: str
+    text: str
+    url: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"kind": self.kind, "week": self.week, "title": self.title}
+        if self.url:
+            data["url"] = self.url
+        return data
+
+
+def roadmap_passages(roadmap: List[Dict[str, Any]]) -> List[Passage]:
+    """Split a roadmap into week, task and resource passages."""
+    passages = []
+    for week_data in roadmap or []:
+        if not isinstance(week_data, dict):
+            continue
+        week = week_data.get("week")
+        week_title = str(week_data.get("title") or f"Week {week}")
+        deliverables = week_data.get("deliverables") or []
+        passages.append(Passage("week", week, week_title, "; ".join(map(str, deliverables))))
+        for task in week_data.get("tasks") or []:
+            # Roadmaps created through /projects/start store tasks as plain strings
+            if not isinstance(task, dict):
+                passages.append(Passage("task", week, str(task), ""))
+                continue
+            steps = task.get("steps") or []
+            passages.append(Passage(
+                "task", week, str(task.get("name", "")),
+                " ".join([str(task.get("description") or ""), *map(str, steps)]).strip()
+            ))
+            for resource in task.get("resources") or []:
+                if isinstance(resource, dict):
+                    passages.append(Passage(
+                        "resource", week, str(resource.get("title", "")),
+                        f"{resource.get('type', '')} for {task.get('name', '')}", resource.get("url")
+                    ))
+    return passages
+
+
+class RoadmapIndex:
+    """BM25 inverted index over the passages of one roadmap."""
+
+    def __init__(self, passages: List[Passage]):
+        self.passages = passages
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+        for doc_id, passage in enumerate(passages):
+            # Titles count twice - they are the most specific part of a passage
+            terms = tokenize(passage.title) * 2 + tokenize(passage.text)
+            self._lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._postings.setdefault(term, []).append((doc_id, tf))
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+    def search(self, query: str, limit: int = 6) -> List[Tuple[Passage, float]]:
+        scores: Dict[int, float] = {}
+        total = len(self.passages)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                norm = K1 * (1 - B + B * self._lengths[doc_id] / self._avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+        # "week 3" in a question is a strong signal even when no other term matches
+        for match in _WEEK_REFERENCE.finditer(query.lower()):
+            week = int(match.group(1))
+            for doc_id, passage in enumerate(self.passages):
+                if passage.week == week and passage.kind != "resource":
+                    scores[doc_id] = scores.get(doc_id, 0.0) + 1.0
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(self.passages[doc_id], score) for doc_id, score in ranked]
+
+
+def roadmap_digest(roadmap: List[Dict[str, Any]]) -> str:
+    return hashlib.sha1(json.dumps(roadmap, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def normalize_query(question: str) -> str:
+    return " ".join(sorted(set(tokenize(question)))) + "|" + " ".join(_WEEK_REFERENCE.findall(question.lower()))
+
+
+class _ProjectEntry:
+    def __init__(self, digest: str, index: RoadmapIndex):
+        self.digest = digest
+        self.index = index
+        self.results: "OrderedDict[str, List[Tuple[Passage, float]]]" = OrderedDict()
+
+
+class RetrievalCache:
+    """LRU of roadmap indexes and their query results, one entry per project."""
+
+    def __init__(self, max_projects: int, max_queries: int):
+        self.max_projects = max_projects
+        self.max_queries = max_queries
+        self._entries: "OrderedDict[str, _ProjectEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "index_builds": 0, "evicted": 0}
+
+    def search(
+        self, project_key: str, roadmap: List[Dict[str, Any]], question: str, limit: int = 6
+    ) -> List[Tuple[Passage, float]]:
+        digest = roadmap_digest(roadmap)
+        query_key = f"{limit}:{normalize_query(question)}"
+        with self._lock:
+            entry = self._entries.get(project_key)
+            if entry is not None and entry.digest == digest:
+                self._entries.move_to_end(project_key)
+                cached = entry.results.get(query_key)
+                if cached is not None:
+                    entry.results.move_to_end(query_key)
+                    self.stats["hits"] += 1
+                    return cached
+            else:
+                entry = _ProjectEntry(digest, RoadmapIndex(roadmap_passages(roadmap)))
+                self._entries[project_key] = entry
+                self.stats["index_builds"] += 1
+                while len(self._entries) > self.max_projects:
+                    self._entries.popitem(last=False)
+                    self.stats["evicted"] += 1
+
+            self.stats["misses"] += 1
+            results = entry.index.search(question, limit)
+            entry.results[query_key] = results
+            if len(entry.results) > self.max_queries:
+                entry.results.popitem(last=False)
+            return results
+
+    def invalidate(self, project_key: str) -> None:
+        with self._lock:
+            self._entries.pop(project_key, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "projects": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+retrieval_cache = RetrievalCache(
+    max_projects=settings.RETRIEVAL_CACHE_PROJECTS,
+    max_queries=settings.RETRIEVAL_CACHE_QUERIES,
+)
@@ -0,0 +1,170 @@
+"""
+Access-token revocation.
+
+Access tokens carry a ``jti`` claim. Logging out stores that jti in the
+``revoked_tokens`` table until the token would have expired anyway. Every
+worker mirrors the table into an in-memory Bloom filter, so checking a token
+that was never revoked (nearly every request) is a few hash probes with no
+query. Only a probable hit is confirmed against the database.
+
+Workers pick up revocations from each other by reading rows revoked since the
+newest one they have seen, at most every ``REVOCATION_REFRESH_SECONDS``. Ids
+and ``revoked_at`` are assigned before commit, so a slow transaction can make
+a row visible after newer ones were read; every refresh therefore re-reads the
+last ``REVOCATION_REFRESH_OVERLAP_SECONDS`` instead of a strict watermark. A
+Bloom filter cannot forget entries, so the filter is rebuilt from the rows of
+unexpired tokens every ``REVOCATION_REBUILD_SECONDS``. Tokens this worker
+revokes while the rebuild query is in flight are replayed into the new filter
+before it replaces the old one.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.revocation import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for ``capacity`` items at ``error_rate``."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """The revoked_tokens table as seen by this worker."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.reset()
+        self.stats = {"checks": 0, "bloom_negatives": 0, "db_checks": 0, "false_positives": 0, "revoked": 0}
+
+    def reset(self) -> None:
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._seen_until: Optional[datetime] = None  # newest revoked_at read so far
+        self._refreshed_at = 0.0
+        self._rebuilt_at = 0.0
+        self._revoked_during_rebuild: Optional[set] = None  # set while a rebuild is in flight
+
+    async def _refresh(self, db: AsyncSession) -> None:
+        now = time.monotonic()
+        if now - self._refreshed_at < settings.REVOCATION_REFRESH_SECONDS:
+            return
+        query = select(RevokedToken.revoked_at, RevokedToken.jti)
+        if now - self._rebuilt_at >= settings.REVOCATION_REBUILD_SECONDS and self._revoked_during_rebuild is None:
+            # Start over without the tokens that have expired since the last rebuild
+            bloom = BloomFilter(self.capacity, self.error_rate)
+            self._revoked_during_rebuild = set()
+            try:
+                rows = (await db.execute(query.where(RevokedToken.expires_at > datetime.utcnow()))).all()
+                # revoke() went to the old filter meanwhile; the query may have missed those rows
+                for jti in self._revoked_during_rebuild:
+                    bloom.add(jti)
+            finally:
+                self._revoked_during_rebuild = None
+            self._rebuilt_at = now
+        else:
+            bloom = self._bloom
+            if self._seen_until is not None:
+                overlap = timedelta(seconds=settings.REVOCATION_REFRESH_OVERLAP_SECONDS)
+                query = query.where(RevokedToken.revoked_at >= self._seen_until - overlap)
+            rows = (await db.execute(query)).all()
+        for revoked_at, jti in rows:
+            # Rows in the overlap were usually added by the previous refresh already
+            if jti not in bloom:
+                bloom.add(jti)
+            if revoked_at is not None and (self._seen_until is None or revoked_at > self._seen_until):
+                self._seen_until = revoked_at
+        self._bloom = bloom
+        self._refreshed_at = now
+
+    async def is_revoked(self, db: AsyncSession, jti: Optional[str]) -> bool:
+        # Tokens issued before revocation support have no jti and cannot be revoked
+        if not jti:
+            return False
+        self.stats["checks"] += 1
+        await self._refresh(db)
+        if jti not in self._bloom:
+            self.stats["bloom_negatives"] += 1
+            return False
+        self.stats["db_checks"] += 1
+        result = await db.execute(select(RevokedToken.id).where(RevokedToken.jti == jti))
+        if result.first() is None:
+            self.stats["false_positives"] += 1
+            return False
+        return True
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: datetime) -> None:
+        """Revoke a token until ``expires_at`` (naive UTC). Revoking twice is a no-op."""
+        existing = await db.execute(select(RevokedToken.id).where(RevokedToken.jti == jti))
+        if existing.first() is None:
+            db.add(RevokedToken(jti=jti, expires_at=expires_at))
+            await db.commit()
+            self.stats["revoked"] += 1
+        # Visible to this worker right away, to the others on their next refresh
+        self._bloom.add(jti)
+        if self._revoked_during_rebuild is not None:
+            self._revoked_during_rebuild.add(jti)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "bloom_entries": self._bloom.count,
+            "bloom_bits": self._bloom.bits,
+            "bloom_hashes": self._bloom.hashes,
+        }
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+)
+
+
+async def purge_expired_revocations(session_factory) -> int:
+    """Delete revocations of tokens that have expired anyway. Returns the number removed."""
+    async with session_factory() as db:
+        result = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        await db.commit()
+        return result.rowcount or 0
+
+
+async def purge_expired_revocations_periodically(session_factory, interval_seconds: int = 3600) -> None:
+    """Background cleanup of the revocation table, started from the application lifespan."""
+    while True:
+        try:
+            removed = await purge_expired_revocations(session_factory)
+            if removed:
+                logger.info(f"Purged {removed} expired token revocations")
+        except Exception as e:
+            logger.warning(f"Token revocation cleanup failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,185 @@
+"""
+Full-text search over community project titles and descriptions.
+
+``ILIKE '%term%'`` cannot use an index and has no notion of relevance. The
+index lives next to ``projects`` and is maintained by the database itself, so
+every insert, update and delete (publish included) is reflected immediately:
+
+- SQLite: an external-content FTS5 table, ``projects_fts``, kept in sync by
+  triggers and ranked with bm25 (title weighted above description);
+- PostgreSQL: a generated ``search_vector`` tsvector column with a GIN index,
+  ranked with ``ts_rank_cd``.
+
+Every word of the query must match, and the last characters typed need not be
+a whole word: "pyth web" finds "Python web scraper". Other databases fall back
+to unranked ``ILIKE``.
+
+Snippets mark matches with ``<mark>``; the surrounding project text is HTML
+escaped, so they can be rendered as markup.
+"""
+import html
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, column, event, func, literal_column, or_, select, table, type_coerce
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from ..models.user import Project
+
+# At most this many words of a query are used
+MAX_QUERY_WORDS = 10
+
+# Snippet delimiters (Unicode private use) swapped for <mark> after escaping
+_OPEN, _CLOSE = "\ue000", "\ue001"
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+        title, description,
+        content='projects', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    # A title match counts ten times a description match
+    "INSERT INTO projects_fts(projects_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF title, description ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO projects_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    """
+    ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_projects_search ON projects USING GIN (search_vector)",
+]
+
+
+def create_search_index(connection) -> None:
+    """Create the index for the connection's dialect (idempotent), filling it if it is new."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        existed = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+        ).first()
+        for statement in SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        if not existed:
+            connection.exec_driver_sql("INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+
+
+def _drop_search_index(target, connection, **kw) -> None:
+    # Triggers go with the table; the FTS5 table does not
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS projects_fts")
+
+
+# Fresh databases get the index with the table; existing ones in init_search_index
+event.listen(Project.__table__, "after_create", lambda target, connection, **kw: create_search_index(connection))
+event.listen(Project.__table__, "before_drop", _drop_search_index)
+
+
+async def init_search_index(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(create_search_index)
+
+
+def query_words(text: Optional[str]) -> List[str]:
+    return re.findall(r"\w+", (text or "").lower())[:MAX_QUERY_WORDS]
+
+
+def highlight(snippet: Optional[str]) -> Optional[str]:
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+class ProjectSearch:
+    """A parsed search query, turned into SQL for the session's dialect."""
+
+    def __init__(self, dialect: str, words: List[str]):
+        self.dialect = dialect
+        self.words = words
+        if dialect == "sqlite":
+            # Quoted, so FTS5 operators in the input are plain words; * makes each a prefix
+            self._fts = table("projects_fts", column("rowid"), column("rank"))
+            self._match = literal_column("projects_fts").op("MATCH")(" ".join(f'"{w}"*' for w in words))
+        elif dialect == "postgresql":
+            self._vector = literal_column("projects.search_vector")
+            self._tsquery = func.to_tsquery("english", " & ".join(f"{w}:*" for w in words))
+
+    @classmethod
+    def parse(cls, db: AsyncSession, text: Optional[str]) -> Optional["ProjectSearch"]:
+        """None when the text has no searchable words."""
+        words = query_words(text)
+        return cls(db.bind.dialect.name, words) if words else None
+
+    @property
+    def ranked(self) -> bool:
+        return self.dialect in ("sqlite", "postgresql")
+
+    def apply(self, query):
+        """Restrict a query on ``Project`` to the matching projects."""
+        if self.dialect == "sqlite":
+            return query.join(self._fts, self._fts.c.rowid == Project.id).where(self._match)
+        if self.dialect == "postgresql":
+            return query.where(self._vector.op("@@")(self._tsquery))
+        return query.where(*(
+            or_(Project.title.ilike(f"%{word}%"), Project.description.ilike(f"%{word}%"))
+            for word in self.words
+        ))
+
+    def published(self):
+        """``is_published`` for a count over the matches."""
+        if self.dialect == "sqlite":
+            # "+ 0" keeps SQLite from driving the count from the is_published
+            # index (probing the FTS table once per published project) instead
+            # of from the match
+            return type_coerce(Project.is_published, Integer) + 0 == 1
+        return Project.is_published == True
+
+    def order_by(self) -> list:
+        """Best match first; FTS5 returns its own rank order without a sort."""
+        if self.dialect == "sqlite":
+            return [self._fts.c.rank]
+        if self.dialect == "postgresql":
+            return [func.ts_rank_cd(self._vector, self._tsquery).desc(), Project.created_at.desc(), Project.id.desc()]
+        return [Project.created_at.desc(), Project.id.desc()]
+
+    async def snippets(self, db: AsyncSession, project_ids: List[int]) -> Dict[int, str]:
+        """Highlighted excerpts for the given (already matched) projects."""
+        if not project_ids or not self.ranked:
+            return {}
+        if self.dialect == "sqlite":
+            # -1: from whichever column matched best
+            excerpt = func.snippet(literal_column("projects_fts"), -1, _OPEN, _CLOSE, "…", 16)
+        else:
+            excerpt = func.ts_headline(
+                "english",
+                func.coalesce(Project.title, "") + ". " + func.coalesce(Project.description, ""),
+                self._tsquery,
+                f"StartSel={_OPEN}, StopSel={_CLOSE}, MaxWords=24, MinWords=8",
+            )
+        query = self.apply(select(Project.id, excerpt)).where(Project.id.in_(project_ids))
+        return {id: highlight(text) for id, text in (await db.execute(query)).all()}
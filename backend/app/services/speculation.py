@@ -0,0 +1,256 @@
+"""
+Speculative recommendation pre-generation.
+
+The answers that drive the recommendations (skills, interests, goals) are known
+after step 4 of the survey. The frontend posts them to ``/api/survey/prefetch``
+and we start generating while the student fills in the last step. On submit the
+full survey is fingerprinted the same way; if it matches, the in-flight or
+finished result is adopted instead of starting a new generation.
+
+With model tiering the roadmap shape (weeks, tasks per week) depends on the
+step-5 answers. The speculative run is planned the way a submit would be,
+within the submit deadline, from the step-5 placeholders; the deadline cap
+leaves few distinct shapes, so most submits want the same shape or a smaller
+one. A smaller shape is cut out of the speculative roadmaps (first weeks,
+first tasks of each week); only a larger one makes the submit generate anew,
+counted as ``shape_mismatches``.
+
+``/prefetch`` is anonymous, like submit, and each new fingerprint costs a
+provider generation, so every client address keeps only its newest few
+speculations; starting another cancels its oldest (``superseded``).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from ..config import settings
+from ..models.survey import PartialSurveyResponse, SurveyResponse
+from .ai_engine import configured_provider
+from .codec import RecommendationStruct
+from .deadline import Deadline
+from .tiering import GenerationPlan, plan_recommendations
+
+Shape = Tuple[int, int]
+
+# Fields answered in steps 1-4 that end up in the prompt
+SPECULATIVE_FIELDS = (
+    "name",
+    "university",
+    "programming_languages",
+    "skill_level",
+    "ai_ml_experience",
+    "interest_areas",
+    "preferred_project_type",
+    "industry_interest",
+    "career_goal",
+    "learning_style",
+)
+
+# Step 5 is not answered yet when speculating
+STEP5_PLACEHOLDERS = {
+    "time_commitment": "Flexible",
+    "project_duration": "3-4 weeks (standard)",
+    "team_preference": "Flexible - depends on the project",
+    "collaboration_tools": ["Git/GitHub"],
+}
+
+
+def survey_fingerprint(survey: Union[SurveyResponse, PartialSurveyResponse]) -> str:
+    """Stable digest of the speculative fields of a (partial) survey."""
+    data = survey.model_dump(mode="json", include=set(SPECULATIVE_FIELDS))
+    data["university"] = data.get("university") or None
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def complete_partial_survey(partial: PartialSurveyResponse) -> SurveyResponse:
+    """Fill in the unanswered step-5 fields with neutral placeholders."""
+    data = partial.model_dump()
+    data["email"] = data.get("email") or ""
+    return SurveyResponse(**data, **STEP5_PLACEHOLDERS)
+
+
+def submit_plan(survey: SurveyResponse, deadline: Optional[Deadline] = None) -> Optional[GenerationPlan]:
+    """The plan a submit of ``survey`` gets, or None when the roadmap shape does not depend on it.
+
+    Demo recommendations and untiered requests always have the same shape.
+    """
+    provider = configured_provider()
+    if not settings.MODEL_TIERING_ENABLED or settings.AI_DEMO_MODE or provider is None:
+        return None
+    return plan_recommendations(survey, provider, deadline or Deadline.for_endpoint("survey_submit"))
+
+
+def fits_shape(speculated: Optional[Shape], wanted: Optional[Shape]) -> bool:
+    if speculated is None or wanted is None:
+        return True
+    return wanted[0] <= speculated[0] and wanted[1] <= speculated[1]
+
+
+def trim_to_shape(result: RecommendationStruct, shape: Shape) -> RecommendationStruct:
+    """Cut the roadmaps of ``result`` down to ``shape`` (in place)."""
+    weeks, tasks = shape
+    for project in result.recommendations:
+        if len(project.roadmap) > weeks:
+            project.roadmap = project.roadmap[:weeks]
+            project.estimated_duration = f"{weeks} weeks"
+        for week in project.roadmap:
+            week.tasks = week.tasks[:tasks]
+    return result
+
+
+@dataclass
+class _Speculation:
+    task: asyncio.Task
+    shape: Optional[Shape] = None
+    client: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    def __post_init__(self):
+        self.task.add_done_callback(self._mark_finished)
+
+    def _mark_finished(self, _task: asyncio.Task) -> None:
+        self.finished_at = time.monotonic()
+
+
+class SpeculationStore:
+    """Bounded, TTL-limited map of fingerprint -> speculative generation task."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int, max_per_client: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_per_client = max_per_client
+        self._entries: "OrderedDict[str, _Speculation]" = OrderedDict()
+        self.stats = {
+            "started": 0,
+            "deduplicated": 0,
+            "hits": 0,
+            "inflight_hits": 0,
+            "misses": 0,
+            "discarded": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "shape_mismatches": 0,
+            "expired": 0,
+            "evicted": 0,
+            "superseded": 0,
+            "saved_seconds": 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for fingerprint in [fp for fp, e in self._entries.items() if now - e.started_at > self.ttl_seconds]:
+            self._drop(fingerprint)
+            self.stats["expired"] += 1
+
+    def _drop(self, fingerprint: str) -> None:
+        entry = self._entries.pop(fingerprint, None)
+        if entry and not entry.task.done():
+            entry.task.cancel()
+
+    def start(
+        self,
+        fingerprint: str,
+        generate: Callable[[], Awaitable[RecommendationStruct]],
+        shape: Optional[Shape] = None,
+        client: Optional[str] = None
+    ) -> bool:
+        """
+        Start a speculative generation unless one is already running. Returns
+        True if started. ``shape`` is the roadmap shape it generates, if it matters;
+        ``client`` identifies the caller for the per-client limit.
+        """
+        self._evict_expired()
+        if fingerprint in self._entries:
+            self.stats["deduplicated"] += 1
+            return False
+        if client is not None:
+            own = [fp for fp, e in self._entries.items() if e.client == client]
+            for oldest in own[:max(0, len(own) - self.max_per_client + 1)]:
+                self._drop(oldest)
+                self.stats["superseded"] += 1
+        while len(self._entries) >= self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.stats["evicted"] += 1
+        self._entries[fingerprint] = _Speculation(
+            task=asyncio.create_task(generate()), shape=shape, client=client
+        )
+        self.stats["started"] += 1
+        return True
+
+    def discard(self, fingerprint: str) -> None:
+        """Throw away a speculation whose answers changed before submit."""
+        if fingerprint in self._entries:
+            self._drop(fingerprint)
+            self.stats["discarded"] += 1
+
+    async def adopt(
+        self, fingerprint: str, timeout: Optional[float] = None, shape: Optional[Shape] = None
+    ) -> Optional[RecommendationStruct]:
+        """
+        Return the speculative result for ``fingerprint`` (waiting if in flight,
+        at most ``timeout`` seconds), trimmed to ``shape``, or None.
+        """
+        adopted_at = time.monotonic()
+        self._evict_expired()
+        entry = self._entries.pop(fingerprint, None)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if not fits_shape(entry.shape, shape):
+            # The submit wants a longer or denser roadmap than was speculated
+            if not entry.task.done():
+                entry.task.cancel()
+            self.stats["shape_mismatches"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        inflight = not entry.task.done()
+        try:
+            # Shield so a client disconnect on submit doesn't cancel the shared task
+            result = await asyncio.wait_for(asyncio.shield(entry.task), timeout)
+        except asyncio.TimeoutError:
+            # The submit's own deadline is up; nobody else can adopt the popped task
+            entry.task.cancel()
+            self.stats["timeouts"] += 1
+            self.stats["misses"] += 1
+            return None
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["inflight_hits" if inflight else "hits"] += 1
+        # Generation time that overlapped with the student answering step 5
+        overlap_end = adopted_at if inflight else min(adopted_at, entry.finished_at or adopted_at)
+        self.stats["saved_seconds"] += overlap_end - entry.started_at
+        if entry.shape is not None and shape is not None:
+            trim_to_shape(result, shape)
+        return result
+
+    def snapshot(self) -> Dict[str, float]:
+        adopted = self.stats["hits"] + self.stats["inflight_hits"]
+        lookups = adopted + self.stats["misses"]
+        return {
+            **self.stats,
+            "pending": len(self._entries),
+            "hit_rate": round(adopted / lookups, 4) if lookups else 0.0,
+        }
+
+
+speculation_store = SpeculationStore(
+    ttl_seconds=settings.SPECULATION_TTL_SECONDS,
+    max_entries=settings.SPECULATION_MAX_ENTRIES,
+    max_per_client=settings.SPECULATION_MAX_PER_CLIENT,
+)
@@ -0,0 +1,199 @@
+"""
+Technology and tag index for community projects.
+
+``Project.tech_stack`` and ``Project.tags`` are JSON lists the database cannot
+filter on, so every project's entries are also stored as rows of
+``project_technologies`` / ``project_tags`` pointing at interned ``terms``.
+Names are canonicalized ("  PyTorch " -> "pytorch") and interned once; ids
+never change, so they are cached in process - those of newly interned terms
+only once their transaction commits. A filter on one or more terms
+becomes an indexed ``project_id IN (...)`` condition applied in SQL before
+pagination:
+
+- ``match="any"``: projects with at least one of the terms,
+- ``match="all"``: projects with every term.
+"""
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, delete, event, exists, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..database import dialect_insert
+from ..models.user import Project, Term, project_tags, project_technologies
+
+logger = logging.getLogger(__name__)
+
+TERM_TABLES = {
+    "tech": project_technologies,
+    "tag": project_tags,
+}
+
+MATCH_MODES = ("any", "all")
+
+
+def canonical_term(name: str) -> str:
+    return " ".join(str(name).split()).lower()
+
+
+def parse_terms(value: Optional[str]) -> List[str]:
+    """Canonical, de-duplicated terms from a comma-separated query parameter."""
+    terms = [canonical_term(part) for part in (value or "").split(",")]
+    return list(dict.fromkeys(term for term in terms if term))
+
+
+class TermIds:
+    """Process-wide cache of canonical name -> term id."""
+
+    def __init__(self, max_entries: int = 50_000):
+        self.max_entries = max_entries
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, int]:
+        with self._lock:
+            return {name: self._ids[name] for name in names if name in self._ids}
+
+    def update(self, ids: Dict[str, int]) -> None:
+        with self._lock:
+            if len(self._ids) + len(ids) > self.max_entries:
+                self._ids.clear()
+            self._ids.update(ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+term_ids = TermIds()
+
+
+# Ids of terms interned by the session's open transaction; a rollback would
+# make them dangling, so they reach term_ids only when it commits
+@event.listens_for(Session, "after_commit")
+def _cache_interned_terms(session):
+    interned = session.info.pop("interned_terms", None)
+    if interned:
+        term_ids.update(interned)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_interned_terms(session, previous_transaction):
+    session.info.pop("interned_terms", None)
+
+
+async def lookup_terms(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """Ids of the given canonical names that exist; unknown names are left out."""
+    names = list(dict.fromkeys(names))
+    found = term_ids.get_many(names)
+    interned = db.info.get("interned_terms", {})
+    found.update((name, interned[name]) for name in names if name not in found and name in interned)
+    missing = [name for name in names if name not in found]
+    if missing:
+        rows = await db.execute(select(Term.name, Term.id).where(Term.name.in_(missing)))
+        loaded = dict(rows.all())
+        term_ids.update(loaded)
+        found.update(loaded)
+    return found
+
+
+async def intern_terms(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """Ids of the given canonical names, creating the terms that do not exist yet."""
+    names = list(dict.fromkeys(names))
+    found = await lookup_terms(db, names)
+    missing = [name for name in names if name not in found]
+    if missing:
+        dialect = dialect_insert(db)
+        if dialect is not None:
+            # Concurrent publishes may intern the same new term
+            await db.execute(dialect(Term).values([{"name": name} for name in missing]).on_conflict_do_nothing())
+        else:
+            await db.execute(insert(Term).values([{"name": name} for name in missing]))
+        rows = await db.execute(select(Term.name, Term.id).where(Term.name.in_(missing)))
+        interned = dict(rows.all())
+        db.info.setdefault("interned_terms", {}).update(interned)
+        found.update(interned)
+    return found
+
+
+def project_terms(project: Project) -> Dict[str, List[str]]:
+    """Canonical, de-duplicated technologies and tags of a project, keyed like ``TERM_TABLES``."""
+    return {
+        "tech": parse_terms(",".join(project.tech_stack or [])),
+        "tag": parse_terms(",".join(project.tags or [])),
+    }
+
+
+async def _insert_term_rows(db: AsyncSession, terms: Dict[int, Dict[str, List[str]]]) -> None:
+    ids = await intern_terms(db, (name for values in terms.values() for names in values.values() for name in names))
+    for kind, table in TERM_TABLES.items():
+        rows = [
+            {"term_id": ids[name], "project_id": project_id}
+            for project_id, values in terms.items()
+            for name in values[kind]
+        ]
+        if rows:
+            await db.execute(insert(table), rows)
+
+
+async def index_project_terms(db: AsyncSession, project: Project) -> None:
+    """Replace the project's technology and tag rows with its current JSON lists."""
+    for table in TERM_TABLES.values():
+        await db.execute(delete(table).where(table.c.project_id == project.id))
+    await _insert_term_rows(db, {project.id: project_terms(project)})
+
+
+async def term_filter(db: AsyncSession, kind: str, names: List[str], match: str = "any"):
+    """
+    SQL condition on ``Project`` for the given canonical terms, or None when
+    no project can match (every term unknown, or one unknown with match="all").
+    """
+    table = TERM_TABLES[kind]
+    ids = await lookup_terms(db, names)
+    if not ids or (match == "all" and len(ids) < len(names)):
+        return None
+    if match == "all":
+        # One indexed membership check per term
+        return and_(*(
+            Project.id.in_(select(table.c.project_id).where(table.c.term_id == term_id))
+            for term_id in ids.values()
+        ))
+    return Project.id.in_(select(table.c.project_id).where(table.c.term_id.in_(list(ids.values()))))
+
+
+async def backfill_project_terms(session_factory, batch_size: int = 500) -> int:
+    """Index projects published before the term tables existed. Returns the number indexed."""
+    indexed = 0
+    last_id = 0
+    while True:
+        async with session_factory() as db:
+            unindexed = (
+                select(Project)
+                .where(
+                    Project.id > last_id,
+                    ~exists().where(project_technologies.c.project_id == Project.id),
+                    ~exists().where(project_tags.c.project_id == Project.id),
+                )
+                .order_by(Project.id)
+                .limit(batch_size)
+            )
+            projects = (await db.execute(unindexed)).scalars().all()
+            if not projects:
+                return indexed
+            terms = {project.id: project_terms(project) for project in projects if project.tech_stack or project.tags}
+            await _insert_term_rows(db, terms)
+            indexed += len(terms)
+            last_id = projects[-1].id
+            await db.commit()
+
+
+async def backfill_project_terms_logged(session_factory) -> None:
+    """Startup task wrapper - failures are logged, never raised."""
+    try:
+        indexed = await backfill_project_terms(session_factory)
+        if indexed:
+            logger.info(f"Indexed technologies and tags of {indexed} existing projects")
+    except Exception as e:
+        logger.warning(f"Project term backfill failed: {e}")
@@ -0,0 +1,276 @@
+"""
+Output budgets and model tiers for recommendation requests.
+
+The roadmap shape (weeks, tasks per week) follows the student's preferred
+duration and weekly time commitment, and ``max_tokens`` is sized from that
+shape instead of a fixed 4000. Each request then goes to either the fast or
+the quality tier of the configured provider:
+
+- quality for advanced/expert students and long projects,
+- fast for everything else,
+- fast regardless when many generations are in flight or the request
+  deadline is close, so the quality tier's latency never breaks the SLO.
+
+With a deadline, ``max_tokens`` is also capped by what the model can write in
+the time left (its output speed times the stage budget). A roadmap that does
+not fit loses weeks first and only then tasks per week, and a quality model
+that cannot write even the smallest roadmap in time is swapped for the fast
+one.
+
+Token usage is recorded per model by ``record_usage``; ``tier_report`` turns
+it into latency and cost per tier.
+"""
+import math
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from ..config import settings
+from ..models.survey import SurveyResponse
+from .deadline import Deadline
+from .prompts import token_accountant
+
+FAST = "fast"
+QUALITY = "quality"
+
+DEFAULT_MODELS = {
+    FAST: {
+        "openai": "gpt-4o-mini",
+        "anthropic": "claude-3-5-haiku-20241022",
+        "gemini": settings.GEMINI_MODEL,
+    },
+    QUALITY: {
+        "openai": "gpt-4o",
+        "anthropic": "claude-3-5-sonnet-20241022",
+        "gemini": "gemini-1.5-pro",
+    },
+}
+
+# Largest max_tokens each model accepts
+OUTPUT_LIMITS = {
+    "gpt-4o": 16384,
+    "gpt-4o-mini": 16384,
+    "claude-3-5-sonnet-20241022": 8192,
+    "claude-3-5-haiku-20241022": 8192,
+    "gemini-1.5-flash": 8192,
+    "gemini-1.5-pro": 8192,
+}
+DEFAULT_OUTPUT_LIMIT = 4096
+
+# Sustained output speed in tokens per second (on the slow side of observed
+# figures) and time to the first token, for sizing output to a deadline
+OUTPUT_TOKENS_PER_SECOND = {
+    "gpt-4o": 90,
+    "gpt-4o-mini": 150,
+    "claude-3-5-sonnet-20241022": 75,
+    "claude-3-5-haiku-20241022": 150,
+    "gemini-1.5-flash": 200,
+    "gemini-1.5-pro": 90,
+}
+DEFAULT_OUTPUT_TOKENS_PER_SECOND = 60
+FIRST_TOKEN_SECONDS = 1.5
+
+# List prices in USD per million (input, output) tokens, without cache discounts
+PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "claude-3-5-sonnet-20241022": (3.00, 15.00),
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+# Output size of a recommendation response, in provider tokens
+PROJECTS = 5
+PROJECT_TOKENS = 180   # title, description, stack, outcomes, tags
+WEEK_TOKENS = 40       # week title and deliverables
+TASK_TOKENS = 150      # name, description, steps, resources
+SUMMARY_TOKENS = 100
+HEADROOM = 1.15
+MIN_WEEKS = 2
+MAX_WEEKS = 8
+
+_NUMBER = re.compile(r"\d+")
+
+
+def roadmap_weeks(project_duration: str) -> int:
+    """Weeks of roadmap for a duration answer like "1-2 weeks (quick win)" or "3+ months"."""
+    text = (project_duration or "").lower()
+    numbers = [int(n) for n in _NUMBER.findall(text)]
+    if not numbers:
+        return 4
+    # Middle of a range ("1-2 months" -> 6 weeks)
+    weeks = math.ceil(sum(numbers) / len(numbers) * (4 if "month" in text else 1))
+    return max(MIN_WEEKS, min(MAX_WEEKS, weeks))
+
+
+def tasks_per_week(time_commitment: str) -> int:
+    """Tasks per week for an answer like "5-10 hours" or "Full-time (30+ hours)"."""
+    numbers = [int(n) for n in _NUMBER.findall(time_commitment or "")]
+    if not numbers:
+        return 3
+    hours = max(numbers)
+    return 1 if hours <= 5 else 2 if hours <= 10 else 3 if hours <= 20 else 4
+
+
+def expected_output_tokens(weeks: int, tasks: int) -> int:
+    return PROJECTS * (PROJECT_TOKENS + weeks * (WEEK_TOKENS + tasks * TASK_TOKENS)) + SUMMARY_TOKENS
+
+
+def output_capacity(model: str, deadline: Optional[Deadline] = None) -> int:
+    """Most output tokens ``model`` accepts and, with a deadline, can write before the stage budget runs out."""
+    limit = OUTPUT_LIMITS.get(model, DEFAULT_OUTPUT_LIMIT)
+    if deadline is None:
+        return limit
+    seconds = deadline.stage_budget() - FIRST_TOKEN_SECONDS
+    speed = OUTPUT_TOKENS_PER_SECOND.get(model, DEFAULT_OUTPUT_TOKENS_PER_SECOND)
+    return max(0, min(limit, int(seconds * speed)))
+
+
+def fits(weeks: int, tasks: int, capacity: int) -> bool:
+    return expected_output_tokens(weeks, tasks) * HEADROOM <= capacity
+
+
+def fit_shape(weeks: int, tasks: int, capacity: int) -> Tuple[int, int]:
+    """Shrink a roadmap until it fits ``capacity`` output tokens, weeks first."""
+    # Fewer full weeks serve a student better than many weeks of a single task
+    while not fits(weeks, tasks, capacity) and (weeks > MIN_WEEKS or tasks > 1):
+        if weeks > MIN_WEEKS:
+            weeks -= 1
+        else:
+            tasks -= 1
+    return weeks, tasks
+
+
+def model_for(tier: str, provider: str) -> str:
+    overrides = settings.fast_models if tier == FAST else settings.quality_models
+    return overrides.get(provider) or DEFAULT_MODELS[tier][provider]
+
+
+def tier_of(model: str) -> Optional[str]:
+    for tier in (QUALITY, FAST):
+        if model in {model_for(tier, provider) for provider in DEFAULT_MODELS[tier]}:
+            return tier
+    return None
+
+
+@dataclass(frozen=True)
+class GenerationPlan:
+    tier: str
+    model: str
+    max_tokens: int
+    weeks: int
+    tasks_per_week: Optional[int]  # None leaves the number of tasks to the model
+    reason: str
+
+    @property
+    def shape(self) -> Tuple[int, Optional[int]]:
+        return self.weeks, self.tasks_per_week
+
+
+class GenerationLoad:
+    """In-flight recommendation generations in this process."""
+
+    def __init__(self):
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        with self._lock:
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+
+generation_load = GenerationLoad()
+
+
+def _choose_tier(survey: SurveyResponse, weeks: int, deadline: Optional[Deadline]) -> Tuple[str, str]:
+    if deadline is not None and deadline.remaining() < settings.TIER_FAST_BELOW_SECONDS:
+        return FAST, "deadline"
+    if generation_load.inflight >= settings.TIER_LOAD_THRESHOLD:
+        return FAST, "load"
+    if survey.skill_level in ("advanced", "expert"):
+        return QUALITY, "skill level"
+    if weeks >= 6:
+        return QUALITY, "long project"
+    return FAST, "default"
+
+
+def plan_recommendations(
+    survey: SurveyResponse, provider: str, deadline: Optional[Deadline] = None
+) -> GenerationPlan:
+    """Pick the tier, roadmap shape and output budget for one recommendation request."""
+    if not settings.MODEL_TIERING_ENABLED:
+        # Previous behaviour: flagship model, 4-week roadmaps, fixed output budget
+        return GenerationPlan(QUALITY, model_for(QUALITY, provider), 4000, 4, None, "tiering disabled")
+
+    weeks = roadmap_weeks(survey.project_duration)
+    tasks = tasks_per_week(survey.time_commitment)
+    tier, reason = _choose_tier(survey, weeks, deadline)
+    model = model_for(tier, provider)
+    capacity = output_capacity(model, deadline)
+    if tier == QUALITY and not fits(MIN_WEEKS, 1, capacity):
+        # Not even the smallest roadmap would finish in time on the quality model
+        tier, reason = FAST, "deadline"
+        model = model_for(tier, provider)
+        capacity = output_capacity(model, deadline)
+
+    weeks, tasks = fit_shape(weeks, tasks, capacity)
+    max_tokens = min(capacity, int(expected_output_tokens(weeks, tasks) * HEADROOM))
+    return GenerationPlan(tier, model, max_tokens, weeks, tasks, reason)
+
+
+class TierStats:
+    """How often each tier was chosen and why."""
+
+    def __init__(self):
+        self._plans: Dict[str, Dict[str, int]] = {}
+
+    def record(self, plan: GenerationPlan) -> None:
+        reasons = self._plans.setdefault(plan.tier, {})
+        reasons[plan.reason] = reasons.get(plan.reason, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {tier: dict(reasons) for tier, reasons in self._plans.items()}
+
+
+tier_stats = TierStats()
+
+
+def _cost_usd(model: str, input_tokens: float, output_tokens: float) -> float:
+    input_price, output_price = PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def tier_report() -> Dict[str, Any]:
+    """Calls, average latency and cost per tier and per model."""
+    models = {}
+    tiers: Dict[str, Dict[str, float]] = {}
+    for model, totals in token_accountant.model_totals().items():
+        cost = _cost_usd(model, totals["input_tokens"], totals["output_tokens"])
+        calls = totals["calls"] or 1
+        tier = tier_of(model) or "other"
+        models[model] = {
+            **totals,
+            "tier": tier,
+            "cost_usd": round(cost, 6),
+            "avg_latency_seconds": round(totals["latency_seconds"] / calls, 3),
+        }
+        aggregate = tiers.setdefault(tier, {"calls": 0, "output_tokens": 0, "latency_seconds": 0.0, "cost_usd": 0.0})
+        aggregate["calls"] += totals["calls"]
+        aggregate["output_tokens"] += totals["output_tokens"]
+        aggregate["latency_seconds"] += totals["latency_seconds"]
+        aggregate["cost_usd"] += cost
+    for aggregate in tiers.values():
+        calls = aggregate["calls"] or 1
+        aggregate["avg_latency_seconds"] = round(aggregate.pop("latency_seconds") / calls, 3)
+        aggregate["avg_cost_usd"] = round(aggregate["cost_usd"] / calls, 6)
+        aggregate["cost_usd"] = round(aggregate["cost_usd"], 6)
+    return {"plans": tier_stats.snapshot(), "tiers": tiers, "models": models}
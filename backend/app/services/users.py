@@ -0,0 +1,164 @@
+"""
+User persistence for authentication: the login-time upsert and the cache of
+authenticated users.
+
+Every login path (Firebase, demo, GitHub, Google) used to SELECT by email, then
+INSERT or mutate the ORM object, COMMIT and REFRESH it. The helper below reads
+the user once and returns right there when the stored profile already matches,
+so a returning user costs a single SELECT and no write. Otherwise one
+``INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING`` creates or updates
+the row and hands back every column, which replaces both the separate write
+and the refresh. Concurrent first logins for the same email resolve in the
+database instead of failing on the unique constraint.
+
+Every protected request resolves its bearer token to a ``User``. The column
+values of recently authenticated users are kept in a bounded LRU keyed by
+UUID, so a hit rebuilds the user and attaches it to the request session
+without a query. Entries expire after ``USER_CACHE_TTL_SECONDS``, which bounds
+how long a change made by another process can go unseen; writes made here
+invalidate the entry immediately.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import and_, func, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..config import settings
+from ..database import dialect_insert
+from ..models.user import User
+
+
+async def upsert_login_user(
+    db: AsyncSession,
+    email: str,
+    create: Dict[str, Any],
+    update: Dict[str, Any],
+    provider_identity: Optional[Tuple[str, str]] = None
+) -> User:
+    """Return the user for a login, creating or updating it only when needed.
+
+    ``create`` holds the columns for a new user, ``update`` the columns a login
+    refreshes on an existing one (empty for "never change an existing user").
+    With ``provider_identity`` an account already linked to that
+    ``(provider, provider_id)`` is returned unchanged, even under another email.
+    """
+    condition = User.email == email
+    if provider_identity:
+        provider, provider_id = provider_identity
+        condition = or_(condition, and_(User.provider == provider, User.provider_id == provider_id))
+    existing = (await db.execute(select(User).where(condition))).scalars().all()
+
+    if provider_identity:
+        linked = next((u for u in existing if (u.provider, u.provider_id) == provider_identity), None)
+        if linked is not None:
+            return linked
+    current = next((u for u in existing if u.email == email), None)
+    if current is not None and all(getattr(current, key) == value for key, value in update.items()):
+        return current
+
+    insert = dialect_insert(db)
+    if insert is None:
+        return await _orm_upsert(db, current, email, create, update)
+
+    stmt = insert(User).values(email=email, **create)
+    # Without fields to refresh the conflict path only happens on a concurrent
+    # first login; a no-op assignment still lets RETURNING hand back the row
+    set_ = {**update, "updated_at": func.now()} if update else {"email": stmt.excluded.email}
+    stmt = stmt.on_conflict_do_update(index_elements=[User.email], set_=set_).returning(User)
+    user = (await db.execute(stmt, execution_options={"populate_existing": True})).scalar_one()
+    await db.commit()
+    user_cache.invalidate(user.uuid)
+    return user
+
+
+async def _orm_upsert(
+    db: AsyncSession, current: Optional[User], email: str, create: Dict[str, Any], update: Dict[str, Any]
+) -> User:
+    """Portable path for databases without INSERT ... ON CONFLICT."""
+    if current is None:
+        current = User(email=email, **create)
+        db.add(current)
+    else:
+        for key, value in update.items():
+            setattr(current, key, value)
+    await db.commit()
+    await db.refresh(current)
+    user_cache.invalidate(current.uuid)
+    return current
+
+
+_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+
+class UserCache:
+    """Bounded LRU of user column values by UUID, each valid for ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evicted": 0}
+
+    def get(self, uuid: str) -> Optional[User]:
+        """A detached copy of the cached user, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(uuid)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[uuid]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(uuid)
+            self.stats["hits"] += 1
+            values = entry[1]
+        user = User(**values)
+        # Loaded state without pending changes, as if it came from a query
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, user: User) -> None:
+        if self.ttl <= 0:
+            return
+        values = {key: getattr(user, key) for key in _COLUMNS}
+        with self._lock:
+            self._entries[user.uuid] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user.uuid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def invalidate(self, uuid: str) -> None:
+        with self._lock:
+            if self._entries.pop(uuid, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+user_cache = UserCache(max_entries=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+async def load_user(db: AsyncSession, uuid: str) -> Optional[User]:
+    """The user with this UUID attached to ``db``, from the cache when possible."""
+    cached = user_cache.get(uuid)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+    user = (await db.execute(select(User).where(User.uuid == uuid))).scalar_one_or_none()
+    if user is not None:
+        user_cache.put(user)
+    return user
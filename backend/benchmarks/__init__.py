@@ -0,0 +1,3 @@
+"""
+Micro-benchmarks for hot paths (run with ``python -m benchmarks.<name>`` from backend/)
+"""
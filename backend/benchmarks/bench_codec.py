@@ -0,0 +1,90 @@
+"""
+Compare the legacy recommendation decode/encode path with the msgspec codec.
+
+Usage (from backend/):
+    python -m benchmarks.bench_codec [iterations]
+"""
+import json
+import sys
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.survey import (
+    SurveyResponse, ProjectRecommendation, ProjectRoadmapWeek, RecommendationResponse
+)
+from app.services.ai_engine import generate_demo_recommendations
+from app.services.codec import decode_provider_json, encode_recommendations
+
+SURVEY = SurveyResponse(
+    name="Bench Student",
+    email="bench@example.com",
+    programming_languages=["Python"],
+    skill_level="intermediate",
+    ai_ml_experience="Basic - completed tutorials/courses",
+    interest_areas=["Computer Vision", "Natural Language Processing", "Generative AI", "MLOps & Deployment"],
+    preferred_project_type="Product-focused (build & ship)",
+    industry_interest=["Education & EdTech"],
+    career_goal="ML Engineer at a tech company",
+    learning_style="Learning by doing (build first)",
+    time_commitment="10-20 hours",
+    project_duration="3-4 weeks (standard)",
+    team_preference="Solo - I like independence",
+    collaboration_tools=["Git/GitHub"],
+)
+
+
+def provider_json() -> str:
+    """A realistic provider answer: the demo catalog serialized the way an LLM returns it."""
+    demo = generate_demo_recommendations(SURVEY).model_dump()
+    return json.dumps({
+        "recommendations": demo["recommendations"],
+        "personalization_summary": demo["personalization_summary"],
+    })
+
+
+def legacy_path(raw: str) -> bytes:
+    """json.loads -> Pydantic constructors -> response_model re-validation -> json.dumps."""
+    result = json.loads(raw)
+    recommendations = []
+    for rec in result["recommendations"]:
+        roadmap = [ProjectRoadmapWeek(**week) for week in rec["roadmap"]]
+        recommendations.append(ProjectRecommendation(
+            title=rec["title"],
+            description=rec["description"],
+            difficulty_level=rec["difficulty_level"],
+            tech_stack=rec["tech_stack"],
+            estimated_duration=rec["estimated_duration"],
+            learning_outcomes=rec["learning_outcomes"],
+            roadmap=roadmap,
+            tags=rec["tags"]
+        ))
+    response = RecommendationResponse(
+        student_name=SURVEY.name,
+        recommendations=recommendations,
+        personalization_summary=result["personalization_summary"]
+    )
+    # What FastAPI does for response_model: validate again, then jsonable_encoder + json.dumps
+    validated = RecommendationResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def codec_path(raw: str) -> bytes:
+    return encode_recommendations(decode_provider_json(raw, SURVEY.name))
+
+
+def main(iterations: int = 500) -> None:
+    raw = provider_json()
+    assert json.loads(legacy_path(raw)) == json.loads(codec_path(raw))
+
+    print(f"payload: {len(raw):,} bytes, {iterations} iterations")
+    results = {}
+    for name, fn in (("legacy", legacy_path), ("codec", codec_path)):
+        seconds = min(timeit.repeat(lambda: fn(raw), number=iterations, repeat=3))
+        results[name] = seconds / iterations * 1e6
+        print(f"{name:>8}: {results[name]:8.1f} us/op")
+    print(f" speedup: {results['legacy'] / results['codec']:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,121 @@
+"""
+Technology/tag filtering of the community listing at scale: the previous
+approach (load published projects, match the JSON ``tech_stack`` in Python)
+vs the indexed ``project_technologies``/``project_tags`` conditions applied in
+SQL before pagination.
+
+The Python filter has to read every published project to fill a page
+correctly; the SQL filter reads only the page.
+
+Usage (from backend/):
+    python -m benchmarks.bench_community_filter [projects] [queries]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base, configure_sqlite
+from app.models.user import Project, User
+from app.services.terms import backfill_project_terms, term_filter, term_ids
+
+TAGS = [f"tag{n}" for n in range(50)]
+PER_PAGE = 10
+
+# (technologies, tags, match)
+QUERIES = [
+    (["tech1"], [], "any"),
+    (["tech1", "tech2", "tech3"], [], "any"),
+    (["tech1", "tech2"], [], "all"),
+    (["tech4"], ["tag1"], "any"),
+]
+
+
+async def seed(sessions, projects: int) -> None:
+    rng = random.Random(7)
+    async with sessions() as db:
+        owner = User(email="bench@example.com")
+        db.add(owner)
+        await db.flush()
+        for start in range(0, projects, 5000):
+            await db.execute(insert(Project), [
+                {
+                    "title": f"Project {n}",
+                    "description": "d",
+                    "owner_id": owner.id,
+                    "is_published": True,
+                    # Skewed, so a few technologies are common and most are rare
+                    "tech_stack": [f"tech{int(rng.paretovariate(1.2)) % 200}" for _ in range(4)],
+                    "tags": rng.sample(TAGS, 2),
+                }
+                for n in range(start, min(start + 5000, projects))
+            ])
+        await db.commit()
+
+
+async def python_filter(db, technologies, tags, match):
+    projects = (await db.execute(
+        select(Project).where(Project.is_published == True).order_by(Project.created_at.desc())
+    )).scalars().all()
+    combine = all if match == "all" else any
+    wanted = [(technologies, "tech_stack"), (tags, "tags")]
+    matched = [
+        p for p in projects
+        if all(
+            combine(name in [t.lower() for t in getattr(p, field) or []] for name in names)
+            for names, field in wanted if names
+        )
+    ]
+    return matched[:PER_PAGE]
+
+
+async def sql_filter(db, technologies, tags, match):
+    query = select(Project).where(Project.is_published == True)
+    for kind, names in (("tech", technologies), ("tag", tags)):
+        if names:
+            condition = await term_filter(db, kind, names, match)
+            if condition is None:
+                return []
+            query = query.where(condition)
+    query = query.order_by(Project.created_at.desc()).limit(PER_PAGE)
+    return (await db.execute(query)).scalars().all()
+
+
+async def run(projects: int, queries: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = configure_sqlite(create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"))
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        started = time.perf_counter()
+        await seed(sessions, projects)
+        seeded = time.perf_counter() - started
+        started = time.perf_counter()
+        await backfill_project_terms(sessions, batch_size=2000)
+        print(f"{projects} projects: seeded in {seeded:.1f}s, indexed in {time.perf_counter() - started:.1f}s")
+        term_ids.clear()
+
+        for technologies, tags, match in QUERIES:
+            timings = {}
+            for name, strategy in (("python", python_filter), ("sql", sql_filter)):
+                rounds = max(1, queries // 20) if name == "python" else queries
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    async with sessions() as db:
+                        page = await strategy(db, technologies, tags, match)
+                timings[name] = (time.perf_counter() - started) / rounds * 1000
+                sizes = len(page)
+            label = f"tech={','.join(technologies)}" + (f" tags={','.join(tags)}" if tags else "") + f" match={match}"
+            print(f"{label:>34}: python {timings['python']:8.1f} ms | sql {timings['sql']:6.2f} ms | "
+                  f"{timings['python'] / timings['sql']:6.0f}x | page {sizes}")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(run(*(args + [100_000, 100][len(args):])))
@@ -0,0 +1,102 @@
+"""
+Community search at scale: the previous ``ILIKE '%term%'`` on title and
+description vs the full-text index (FTS5 on SQLite), for one page of results
+plus its total, as ``get_community_projects`` needs them.
+
+Usage (from backend/):
+    python -m benchmarks.bench_community_search [projects] [rounds]
+"""
+import asyncio
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base, configure_sqlite
+from app.models.user import Project, User
+from app.services.counts import community_total, count_projects
+from app.services.search import ProjectSearch
+
+PER_PAGE = 10
+# Word frequency falls off like natural text (Zipf): the 50 most frequent words
+# are filler, the topical ones come next, then a long tail
+TOPICAL = [
+    "app", "python", "data", "web", "api", "model", "react", "dashboard", "game", "bot",
+    "classifier", "scraper", "tracker", "weather", "finance", "sentiment", "portfolio", "sensor", "robot", "quiz",
+]
+QUERIES = ["python", "dash", "sentiment classif", "weather dash", "robo quiz"]
+
+
+def vocabulary(rng: random.Random, size: int) -> tuple:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    filler = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(5, 9))) for _ in range(size)})
+    words = filler[:50] + TOPICAL + filler[50:]
+    return words, list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+
+def sentence(rng: random.Random, vocab: tuple, length: int) -> str:
+    words, cum_weights = vocab
+    return " ".join(rng.choices(words, cum_weights=cum_weights, k=length))
+
+
+async def seed(sessions, projects: int) -> None:
+    rng = random.Random(3)
+    words = vocabulary(rng, 20_000)
+    async with sessions() as db:
+        owner = User(email="bench@example.com")
+        db.add(owner)
+        await db.flush()
+        for start in range(0, projects, 5000):
+            await db.execute(insert(Project), [
+                {"title": sentence(rng, words, 3), "description": sentence(rng, words, 40), "owner_id": owner.id, "is_published": True}
+                for _ in range(start, min(start + 5000, projects))
+            ])
+        await db.commit()
+
+
+async def ilike_page(db, text):
+    condition = or_(Project.title.ilike(f"%{text}%"), Project.description.ilike(f"%{text}%"))
+    query = select(Project).where(Project.is_published == True, condition)
+    page = (await db.execute(query.order_by(Project.created_at.desc()).limit(PER_PAGE))).scalars().all()
+    return page, await count_projects(db, Project.is_published == True, condition)
+
+
+async def fts_page(db, text):
+    search = ProjectSearch.parse(db, text)
+    query = search.apply(select(Project).where(Project.is_published == True)).order_by(*search.order_by())
+    page = (await db.execute(query.limit(PER_PAGE))).scalars().all()
+    await search.snippets(db, [p.id for p in page])
+    return page, await community_total(db, search=search)
+
+
+async def run(projects: int, rounds: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = configure_sqlite(create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"))
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        started = time.perf_counter()
+        await seed(sessions, projects)
+        print(f"{projects} projects seeded and indexed in {time.perf_counter() - started:.1f}s")
+
+        for text in QUERIES:
+            timings = {}
+            for name, strategy in (("ilike", ilike_page), ("fts", fts_page)):
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    async with sessions() as db:
+                        page, total = await strategy(db, text)
+                timings[name] = ((time.perf_counter() - started) / rounds * 1000, total)
+            print(f"{text!r:>22}: ilike {timings['ilike'][0]:7.1f} ms ({timings['ilike'][1]:6d} hits) | "
+                  f"fts {timings['fts'][0]:6.1f} ms ({timings['fts'][1]:6d} hits, ranked, with snippets)")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(run(*(args + [100_000, 10][len(args):])))
@@ -0,0 +1,68 @@
+"""
+Cost of the community listing total as the table grows: the previous
+``len(select(Project.id).all())``, ``COUNT(*)`` in the database, and the
+cached unfiltered total (``COMMUNITY_TOTAL_MODE=cached``).
+
+Usage (from backend/):
+    python -m benchmarks.bench_community_total [rounds]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base, configure_sqlite
+from app.models.user import Project, User
+from app.services.counts import PublishedTotal, count_projects
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+async def timed(sessions, rounds: int, count) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        async with sessions() as db:
+            await count(db)
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+async def run(rounds: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = configure_sqlite(create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"))
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with sessions() as db:
+            owner = User(email="bench@example.com")
+            db.add(owner)
+            await db.commit()
+
+        async def select_ids(db):
+            return len((await db.execute(select(Project.id).where(Project.is_published == True))).all())
+
+        async def count(db):
+            return await count_projects(db, Project.is_published == True)
+
+        cached = PublishedTotal(ttl=60)
+        seeded = 0
+        for size in SIZES:
+            async with sessions() as db:
+                await db.execute(insert(Project), [
+                    {"title": f"Project {n}", "owner_id": owner.id, "is_published": n % 10 != 0}
+                    for n in range(seeded, size)
+                ])
+                await db.commit()
+            seeded = size
+            cached.invalidate()
+            timings = [await timed(sessions, rounds, strategy) for strategy in (select_ids, count, cached.get)]
+            print(f"{size:>7} projects: len(ids) {timings[0]:7.2f} ms | COUNT(*) {timings[1]:6.2f} ms | "
+                  f"cached {timings[2]:6.3f} ms")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
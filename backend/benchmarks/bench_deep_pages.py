@@ -0,0 +1,101 @@
+"""
+Deep-page latency of the community listing and "my projects": OFFSET paging
+vs the ``next_cursor`` keyset pagination, at increasing page depth.
+
+Projects are created a second apart, with a burst of ties every 1000 rows so
+the id tie-breaker is exercised too. (SQLite seeks on the timestamp only, so a
+cursor inside a long run of same-second rows walks that run.)
+
+Usage (from backend/):
+    python -m benchmarks.bench_deep_pages [projects] [rounds]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base, configure_sqlite
+from app.models.user import Project, User, UserProject
+from app.services.pagination import before_cursor, encode_cursor, fetch_page
+
+PER_PAGE = 20
+EPOCH = datetime(2025, 1, 1)
+
+
+def created(n: int) -> datetime:
+    # Ten projects share each thousandth second
+    return EPOCH + timedelta(seconds=n - n % 10 if n % 1000 < 10 else n)
+
+
+async def seed(sessions, projects: int) -> int:
+    async with sessions() as db:
+        owner = User(email="bench@example.com")
+        db.add(owner)
+        await db.flush()
+        for start in range(0, projects, 5000):
+            batch = range(start, min(start + 5000, projects))
+            await db.execute(insert(Project), [
+                {"title": f"Project {n}", "owner_id": owner.id, "is_published": True, "created_at": created(n)}
+                for n in batch
+            ])
+            await db.execute(insert(UserProject), [
+                {"title": f"Started {n}", "user_id": owner.id, "started_at": created(n)} for n in batch
+            ])
+        await db.commit()
+        return owner.id
+
+
+async def run(projects: int, rounds: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = configure_sqlite(create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"))
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        owner_id = await seed(sessions, projects)
+
+        listings = {
+            "community": (
+                select(Project).where(Project.is_published == True)
+                .order_by(Project.created_at.desc(), Project.id.desc()),
+                Project.created_at, Project.id, lambda p: (p.created_at, p.id),
+            ),
+            "my-projects": (
+                select(UserProject).where(UserProject.user_id == owner_id)
+                .order_by(UserProject.started_at.desc(), UserProject.id.desc()),
+                UserProject.started_at, UserProject.id, lambda p: (p.started_at, p.id),
+            ),
+        }
+        for name, (query, timestamp_column, id_column, key) in listings.items():
+            for depth in (1, 100, projects // PER_PAGE - 1):
+                async with sessions() as db:
+                    # The cursor a client holds after reading depth - 1 pages
+                    rows = (await db.execute(query.offset((depth - 1) * PER_PAGE - 1).limit(1))).scalars().all() \
+                        if depth > 1 else []
+                cursor = encode_cursor(*key(rows[0])) if rows else None
+
+                timings = {}
+                for mode in ("offset", "cursor"):
+                    started = time.perf_counter()
+                    for _ in range(rounds):
+                        async with sessions() as db:
+                            if mode == "offset":
+                                page, _ = await fetch_page(db, query.offset((depth - 1) * PER_PAGE), PER_PAGE, key)
+                            else:
+                                paged = query.where(before_cursor(timestamp_column, id_column, cursor)) if cursor else query
+                                page, _ = await fetch_page(db, paged, PER_PAGE, key)
+                        titles = [p.title for p in page]
+                    timings[mode] = ((time.perf_counter() - started) / rounds * 1000, titles)
+                assert timings["offset"][1] == timings["cursor"][1], "cursor and offset pages differ"
+                print(f"{name:>12} page {depth:5d}: offset {timings['offset'][0]:7.2f} ms | "
+                      f"cursor {timings['cursor'][0]:5.2f} ms")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(run(*(args + [100_000, 20][len(args):])))
@@ -0,0 +1,42 @@
+"""
+Firebase ID-token verification with cached signing keys vs fetching them per login.
+
+The uncached path fetches the keys from a local stand-in server, so it leaves out
+the real round trip to Google; in production the gap is wider.
+
+Usage (from backend/):
+    python -m benchmarks.bench_firebase_verify [iterations]
+"""
+import asyncio
+import sys
+import time
+
+from app.config import settings
+from app.services import firebase
+from app.services.http_client import outbound_http
+from tests.key_server import FirebaseKeyServer
+
+
+async def run(iterations: int) -> None:
+    with FirebaseKeyServer("sanapath-bench") as server:
+        settings.FIREBASE_PROJECT_ID = server.project_id
+        token = server.mint()
+
+        results = {}
+        for name, fresh_cache in (("per-login fetch", True), ("cached keys", False)):
+            firebase.firebase_keys = firebase.FirebaseKeyCache(server.url)
+            await firebase.verify_firebase_token(token)  # warm up the connection
+            started = time.perf_counter()
+            for _ in range(iterations):
+                if fresh_cache:
+                    firebase.firebase_keys = firebase.FirebaseKeyCache(server.url)
+                await firebase.verify_firebase_token(token)
+            results[name] = (time.perf_counter() - started) / iterations * 1e6
+            print(f"{name:>16}: {results[name]:9.1f} us/verify")
+        print(f"{'speedup':>16}: {results['per-login fetch'] / results['cached keys']:.1f}x "
+              f"({server.fetches} key fetches)")
+        await outbound_http.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 300))
@@ -0,0 +1,69 @@
+"""
+Login persistence: the previous SELECT / INSERT-or-update / COMMIT / REFRESH
+pattern vs ``upsert_login_user``.
+
+Every login runs against a file-backed SQLite database, half of them for new
+users and half for returning users with an unchanged profile (the common case,
+where the upsert path does not write at all).
+
+Usage (from backend/):
+    python -m benchmarks.bench_login [logins]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models.user import User
+from app.services.users import upsert_login_user
+
+
+async def legacy_login(db: AsyncSession, email: str, name: str) -> User:
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
+    if not user:
+        user = User(email=email, name=name, provider="firebase", provider_id=f"firebase_{email}")
+        db.add(user)
+    elif name != user.name:
+        user.name = name
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+async def upsert_login(db: AsyncSession, email: str, name: str) -> User:
+    return await upsert_login_user(
+        db,
+        email,
+        create={"name": name, "provider": "firebase", "provider_id": f"firebase_{email}"},
+        update={"name": name},
+    )
+
+
+async def run(logins: int) -> None:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, login in (("select+commit", legacy_login), ("upsert", upsert_login)):
+            engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, name)}.db")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+            started = time.perf_counter()
+            for i in range(logins):
+                # Every email logs in twice: first a sign-up, then a returning login
+                async with sessions() as db:
+                    await login(db, f"user{i // 2}@bench.test", "Bench User")
+            results[name] = logins / (time.perf_counter() - started)
+            await engine.dispose()
+            print(f"{name:>14}: {results[name]:9.0f} logins/s")
+    print(f"{'speedup':>14}: {results['upsert'] / results['select+commit']:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
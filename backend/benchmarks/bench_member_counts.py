@@ -0,0 +1,85 @@
+"""
+Community listing cost of counting members by loading every collaborator
+(``selectinload(Project.collaborators)`` + ``len()``) vs the maintained
+``Project.member_count`` column, plus the cost of the reconciliation job.
+
+Usage (from backend/):
+    python -m benchmarks.bench_member_counts [projects] [rounds]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app.database import Base, configure_sqlite
+from app.models.user import Project, User, project_collaborators
+from app.services.membership import reconcile_member_counts
+
+PER_PAGE = 50
+USERS = 2000
+
+
+async def seed(sessions, projects: int) -> None:
+    rng = random.Random(5)
+    async with sessions() as db:
+        await db.execute(insert(User), [{"email": f"user{n}@example.com", "name": f"User {n}"} for n in range(USERS)])
+        await db.execute(insert(Project), [
+            {"title": f"Project {n}", "owner_id": 1, "is_published": True, "max_team_size": 8} for n in range(projects)
+        ])
+        rows = [
+            {"project_id": project_id, "user_id": user_id}
+            for project_id in range(1, projects + 1)
+            for user_id in rng.sample(range(2, USERS + 1), rng.randint(0, 6))
+        ]
+        for start in range(0, len(rows), 20000):
+            await db.execute(insert(project_collaborators), rows[start:start + 20000])
+        await db.commit()
+
+
+async def run(projects: int, rounds: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = configure_sqlite(create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"))
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        await seed(sessions, projects)
+
+        # The column starts at 1 for every project: the job brings it in line
+        started = time.perf_counter()
+        fixed = await reconcile_member_counts(sessions)
+        print(f"reconcile {projects} projects: {fixed} fixed in {(time.perf_counter() - started) * 1000:.0f} ms")
+        started = time.perf_counter()
+        await reconcile_member_counts(sessions)
+        print(f"reconcile again (no drift): {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        listing = select(Project).where(Project.is_published == True).order_by(Project.created_at.desc(), Project.id.desc())
+        strategies = {
+            "collaborators": (
+                listing.options(selectinload(Project.owner), selectinload(Project.collaborators)),
+                lambda p: len(p.collaborators) + 1,
+            ),
+            "member_count": (listing.options(selectinload(Project.owner)), lambda p: p.member_count),
+        }
+        results = {}
+        for name, (query, members) in strategies.items():
+            started = time.perf_counter()
+            for page in range(rounds):
+                async with sessions() as db:
+                    rows = (await db.execute(query.offset(page * PER_PAGE).limit(PER_PAGE))).scalars().all()
+                    counts = [members(p) for p in rows]
+            results[name] = ((time.perf_counter() - started) / rounds * 1000, counts)
+        assert results["collaborators"][1] == results["member_count"][1], "counts differ"
+        print(f"page of {PER_PAGE}: collaborators loaded {results['collaborators'][0]:6.2f} ms | "
+              f"member_count {results['member_count'][0]:5.2f} ms")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(run(*(args + [100_000, 50][len(args):])))
@@ -0,0 +1,54 @@
+"""
+Latency of an unrelated endpoint (/health) while concurrent logins hash
+passwords, with bcrypt inline on the event loop vs on the password pool.
+
+Usage (from backend/):
+    python -m benchmarks.bench_password_offload [concurrent_logins]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+from app.services import auth
+
+
+async def inline_login(hashed: str) -> None:
+    auth.verify_password("bench-password", hashed)
+
+
+async def offloaded_login(hashed: str) -> None:
+    await auth.verify_password_async("bench-password", hashed)
+
+
+async def probe(client: AsyncClient, stop: asyncio.Event, latencies: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+
+
+async def run(logins: int) -> None:
+    hashed = auth.get_password_hash("bench-password")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for name, login in (("inline", inline_login), ("offloaded", offloaded_login)):
+            latencies, stop = [], asyncio.Event()
+            prober = asyncio.create_task(probe(client, stop, latencies))
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            await asyncio.gather(*(login(hashed) for _ in range(logins)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await prober
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{name:>10}: {logins} logins in {elapsed:5.2f}s | /health p50 "
+                  f"{statistics.median(latencies):7.1f} ms  p99 {p99:7.1f} ms  max {latencies[-1]:7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 8))
@@ -0,0 +1,96 @@
+"""
+Database round trips per request with the previous always-commit ``get_db`` on
+every endpoint vs read-only sessions for reads and a single-commit ``get_db``.
+
+Runs a mix of reads (community listing, project detail, my projects) and
+writes (start project) against a file-backed SQLite database and counts the
+COMMITs the engine sends.
+
+Usage (from backend/):
+    python -m benchmarks.bench_read_sessions [requests]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base, configure_sqlite, get_db, get_read_db, has_pending_writes
+from app.main import app
+
+
+def overrides(sessions, legacy: bool):
+    async def always_commit():
+        async with sessions() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def write_db():
+        async with sessions() as session:
+            try:
+                yield session
+                if has_pending_writes(session):
+                    await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def read_db():
+        async with sessions(autoflush=False) as session:
+            yield session
+
+    if legacy:
+        return {get_db: always_commit, get_read_db: always_commit}
+    return {get_db: write_db, get_read_db: read_db}
+
+
+async def run_one(path: str, legacy: bool, requests: int) -> None:
+    engine = configure_sqlite(create_async_engine(f"sqlite+aiosqlite:///{path}"))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    app.dependency_overrides.update(overrides(sessions, legacy))
+
+    commits = []
+    event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        response = await client.post("/api/auth/demo/login", json={"email": "reads@example.com"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post("/projects/start", headers=headers, json={"title": "Bench", "description": "d"})
+        detail = f"/projects/{response.json()['uuid']}"
+        paths = ["/api/community/projects", detail, "/projects/my-projects"]
+
+        commits.clear()
+        writes = 0
+        started = time.perf_counter()
+        for i in range(requests):
+            if i % 10 == 9:
+                writes += 1
+                response = await client.post("/projects/start", headers=headers, json={"title": "B", "description": "d"})
+            else:
+                response = await client.get(paths[i % 3], headers=headers)
+            response.raise_for_status()
+        elapsed = time.perf_counter() - started
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    print(f"{'always commit' if legacy else 'read-only':>14}: {len(commits):5d} commits for {requests} requests "
+          f"({writes} writes) | {elapsed / requests * 1000:6.2f} ms/request")
+
+
+async def run(requests: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        await run_one(os.path.join(tmp, "legacy.db"), True, requests)
+        await run_one(os.path.join(tmp, "readonly.db"), False, requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
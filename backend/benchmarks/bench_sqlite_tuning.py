@@ -0,0 +1,103 @@
+"""
+Concurrent reads and writes on the community and projects endpoints against a
+file-backed SQLite database, with SQLite defaults (rollback journal,
+synchronous=FULL) vs the connection PRAGMAs from ``configure_sqlite``.
+
+Each client loops over: list community projects, list its own projects, and
+every fourth iteration publish a community project or start a project. The raw
+cost of a single-row commit is measured first, since on a one-core machine the
+endpoint numbers are dominated by request handling in Python.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sqlite_tuning [clients] [iterations_per_client]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base, configure_sqlite, get_db
+from app.main import app
+
+PUBLISH = {"title": "Bench", "description": "d", "difficulty_level": "beginner", "tech_stack": ["Python"], "tags": []}
+START = {"title": "Bench", "description": "d", "tech_stack": ["Python"], "roadmap": []}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def client_loop(client: AsyncClient, headers: dict, iterations: int, reads: list, writes: list) -> None:
+    for i in range(iterations):
+        for path in ("/api/community/projects", "/projects/my-projects"):
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            reads.append(time.perf_counter() - started)
+            response.raise_for_status()
+        if i % 4 == 0:
+            path, body = ("/api/community/publish", PUBLISH) if i % 8 == 0 else ("/projects/start", START)
+            started = time.perf_counter()
+            response = await client.post(path, json=body, headers=headers)
+            writes.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+
+async def run_one(path: str, tuned: bool, clients: int, iterations: int) -> float:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"check_same_thread": False})
+    if tuned:
+        configure_sqlite(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text("CREATE TABLE bench_commits (x INTEGER)"))
+    started = time.perf_counter()
+    for _ in range(200):
+        async with engine.begin() as conn:
+            await conn.execute(text("INSERT INTO bench_commits VALUES (1)"))
+    commit_ms = (time.perf_counter() - started) / 200 * 1000
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def bench_db():
+        async with sessions() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    app.dependency_overrides[get_db] = bench_db
+    reads, writes = [], []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        headers = []
+        for n in range(clients):
+            response = await client.post("/api/auth/demo/login", json={"email": f"bench{n}@test.com"})
+            headers.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, h, iterations, reads, writes) for h in headers))
+        elapsed = time.perf_counter() - started
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    ops = len(reads) + len(writes)
+    print(f"{'tuned' if tuned else 'defaults':>9}: commit {commit_ms:5.2f} ms | {ops / elapsed:5.0f} req/s | "
+          f"read p50 {percentile(reads, 0.5) * 1000:6.1f} ms p95 {percentile(reads, 0.95) * 1000:6.1f} ms | "
+          f"write p50 {percentile(writes, 0.5) * 1000:6.1f} ms p95 {percentile(writes, 0.95) * 1000:6.1f} ms")
+    return ops / elapsed
+
+
+async def run(clients: int, iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        before = await run_one(os.path.join(tmp, "defaults.db"), False, clients, iterations)
+        after = await run_one(os.path.join(tmp, "tuned.db"), True, clients, iterations)
+    print(f"{'speedup':>9}: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(run(*(args + [16, 40][len(args):])))
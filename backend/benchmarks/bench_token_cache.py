@@ -0,0 +1,27 @@
+"""
+Per-request bearer-token verification: full jwt.decode vs the verified-token cache.
+
+Usage (from backend/):
+    python -m benchmarks.bench_token_cache [iterations]
+"""
+import sys
+import time
+
+from app.services import auth
+
+
+def run(iterations: int) -> None:
+    token = auth.create_access_token({"sub": "bench-user", "email": "bench@test.com"})
+    results = {}
+    for name, verify in (("jwt.decode", auth._decode_token), ("cached", auth.verify_token)):
+        verify(token)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            verify(token)
+        results[name] = (time.perf_counter() - started) / iterations * 1e6
+        print(f"{name:>10}: {results[name]:7.2f} us/request")
+    print(f"{'speedup':>10}: {results['jwt.decode'] / results['cached']:.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -8,7 +8,15 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.config import settings
+from app.database import Base, get_db, get_read_db, has_pending_writes
+from app.services.users import user_cache
+from app.services.auth import token_cache
+from app.services.revocation import revocation_list
+from app.services.terms import term_ids
+from app.services.counts import published_total
+from .provider_stub import ProviderStub
+from .key_server import FirebaseKeyServer
 
 
 # Test database URL (in-memory SQLite)
@@ -29,12 +37,21 @@ TestSessionLocal = async_sessionmaker(
 )
 
 
+TestReadSessionLocal = async_sessionmaker(
+    test_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False
+)
+
+
 async def override_get_db():
     """Override database dependency for tests"""
     async with TestSessionLocal() as session:
         try:
             yield session
-            await session.commit()
+            if has_pending_writes(session):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
@@ -42,6 +59,12 @@ async def override_get_db():
             await session.close()
 
 
+async def override_get_read_db():
+    """Override the read-only database dependency for tests"""
+    async with TestReadSessionLocal() as session:
+        yield session
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     """Create event loop for async tests"""
@@ -58,12 +81,18 @@ async def setup_database():
     yield
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    user_cache.clear()
+    token_cache.clear()
+    revocation_list.reset()
+    term_ids.clear()
+    published_total.invalidate()
 
 
 @pytest.fixture
 async def client():
     """Create async test client"""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
@@ -75,3 +104,29 @@ async def db_session():
     """Get database session for tests"""
     async with TestSessionLocal() as session:
         yield session
+
+
+@pytest.fixture
+def provider_stub(monkeypatch):
+    """Point the OpenAI and Anthropic clients at a local stand-in server"""
+    reply = {"name": "Stub task", "description": "d", "steps": ["s"], "resources": [], "estimated_time": "1 hour"}
+    with ProviderStub(reply) as stub:
+        monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-key")
+        monkeypatch.setattr(settings, "ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(settings, "OPENAI_BASE_URL", f"{stub.url}/v1")
+        monkeypatch.setattr(settings, "ANTHROPIC_BASE_URL", stub.url)
+        yield stub
+
+
+@pytest.fixture
+async def firebase_key_server(monkeypatch):
+    """Verify Firebase tokens against a local stand-in for Google's key endpoint"""
+    from app.services import firebase
+    from app.services.http_client import outbound_http
+    
+    with FirebaseKeyServer("sanapath-test") as server:
+        monkeypatch.setattr(settings, "FIREBASE_PROJECT_ID", server.project_id)
+        monkeypatch.setattr(firebase, "firebase_keys", firebase.FirebaseKeyCache(server.url))
+        yield server
+        # The shared client's connections belong to this test's event loop
+        await outbound_http.aclose()
@@ -0,0 +1,100 @@
+"""
+Local stand-in for Google's Firebase signing-key endpoint.
+
+Serves ``{kid: x509 PEM}`` with a ``Cache-Control: max-age`` header like
+``securetoken@system.gserviceaccount.com`` does, counts fetches, and mints ID
+tokens signed with its keys.
+"""
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from jose import jwt
+
+
+def _self_signed(key) -> str:
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.system.gserviceaccount.com")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class FirebaseKeyServer:
+    def __init__(self, project_id: str, max_age: int = 3600):
+        self.project_id = project_id
+        self.max_age = max_age
+        self.fetches = 0
+        self._private = {}
+        self.certs = {}
+        self.rotate()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/certs"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def rotate(self) -> str:
+        """Publish a new signing key and return its kid."""
+        kid = f"key-{len(self._private) + 1}"
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._private[kid] = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        self.certs[kid] = _self_signed(key)
+        self.current_kid = kid
+        return kid
+
+    def mint(self, email: str = "firebase@test.com", kid: str = None, **overrides) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": f"https://securetoken.google.com/{self.project_id}",
+            "aud": self.project_id,
+            "sub": "firebase-uid-1",
+            "auth_time": now,
+            "iat": now,
+            "exp": now + 3600,
+            "email": email,
+            "email_verified": True,
+            **overrides,
+        }
+        kid = kid or self.current_kid
+        return jwt.encode(claims, self._private[kid], algorithm="RS256", headers={"kid": kid})
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.fetches += 1
+                data = json.dumps(server.certs).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={server.max_age}, must-revalidate, no-transform")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,137 @@
+"""
+Local stand-in for the OpenAI and Anthropic HTTP APIs.
+
+Emulates provider prefix caching: the first request with a given system prompt
+reports a cache write, later ones report the prefix as cached input tokens.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ProviderStub:
+    def __init__(self, reply: dict):
+        self.reply = json.dumps(reply)
+        self.delay = 0.0
+        self.requests = []
+        self._seen_prefixes = set()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _prefix_tokens(self, prefix: str, cacheable: bool):
+        """(cached, written) token counts for a request with this static prefix"""
+        tokens = len(prefix) // 4
+        if not cacheable:
+            return 0, 0
+        if prefix in self._seen_prefixes:
+            return tokens, 0
+        self._seen_prefixes.add(prefix)
+        return 0, tokens
+
+    def openai_response(self, body: dict) -> dict:
+        system = body["messages"][0]["content"] if body["messages"][0]["role"] == "system" else ""
+        cached, _ = self._prefix_tokens(system, "prompt_cache_key" in body)
+        prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.reply},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(self.reply) // 4,
+                "total_tokens": prompt_tokens + len(self.reply) // 4,
+                "prompt_tokens_details": {"cached_tokens": cached}
+            }
+        }
+
+    def openai_stream_chunks(self, body: dict) -> list:
+        """The reply split into word chunks, followed by a usage-only chunk"""
+        complete = self.openai_response(body)
+        base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0, "model": body["model"]}
+        words = self.reply.split(" ")
+        chunks = [
+            {**base, "choices": [{"index": 0, "delta": {"content": word + (" " if i < len(words) - 1 else "")},
+                                  "finish_reason": None}]}
+            for i, word in enumerate(words)
+        ]
+        chunks.append({**base, "choices": [], "usage": complete["usage"]})
+        return chunks
+
+    def anthropic_response(self, body: dict) -> dict:
+        blocks = body["system"] if isinstance(body["system"], list) else [{"text": body["system"]}]
+        system = "".join(b["text"] for b in blocks)
+        cached, written = self._prefix_tokens(system, any("cache_control" in b for b in blocks))
+        user_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+        uncached_system = 0 if (cached or written) else len(system) // 4
+        return {
+            "id": "msg_stub",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": [{"type": "text", "text": self.reply}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": user_tokens + uncached_system,
+                "output_tokens": len(self.reply) // 4,
+                "cache_read_input_tokens": cached,
+                "cache_creation_input_tokens": written
+            }
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append((self.path, body))
+                time.sleep(stub.delay)
+                if self.path.endswith("/chat/completions") and body.get("stream"):
+                    self._stream(stub.openai_stream_chunks(body))
+                    return
+                if self.path.endswith("/chat/completions"):
+                    payload = stub.openai_response(body)
+                elif self.path.endswith("/messages"):
+                    payload = stub.anthropic_response(body)
+                else:
+                    self.send_error(404)
+                    return
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (timeout tests)
+
+            def _stream(self, chunks):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for chunk in chunks:
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -1,6 +1,9 @@
 """
 Tests for API endpoints
 """
+import json
+import re
+
 import pytest
 from httpx import AsyncClient
 
@@ -65,6 +68,42 @@ class TestSurveyAPI:
         assert len(data["recommendations"]) > 0
 
 
+    @pytest.mark.asyncio
+    async def test_prefetch_then_submit_adopts_result(self, client: AsyncClient):
+        survey_data = {
+            "name": "Prefetch User",
+            "email": "prefetch@example.com",
+            "programming_languages": ["Python"],
+            "skill_level": "beginner",
+            "ai_ml_experience": "Basic - completed tutorials/courses",
+            "interest_areas": ["Computer Vision"],
+            "preferred_project_type": "Product-focused (build & ship)",
+            "industry_interest": ["Education & EdTech"],
+            "career_goal": "Data Scientist",
+            "learning_style": "Learning by doing (build first)",
+        }
+        response = await client.post("/api/survey/prefetch", json=survey_data)
+        assert response.status_code == 202
+        fingerprint = response.json()["fingerprint"]
+        
+        before = (await client.get("/api/survey/prefetch/stats")).json()
+        survey_data.update({
+            "time_commitment": "5-10 hours",
+            "project_duration": "1-2 weeks (quick win)",
+            "team_preference": "Solo - I like independence",
+            "collaboration_tools": ["Git/GitHub"]
+        })
+        response = await client.post(
+            "/api/survey/submit", json=survey_data, headers={"X-Speculation-Id": fingerprint}
+        )
+        assert response.status_code == 200
+        assert response.json()["student_name"] == "Prefetch User"
+        
+        after = (await client.get("/api/survey/prefetch/stats")).json()
+        adopted = lambda s: s["hits"] + s["inflight_hits"]
+        assert adopted(after) == adopted(before) + 1
+
+
 class TestCommunityAPI:
     """Test community endpoints"""
     
@@ -88,6 +127,168 @@ class TestCommunityAPI:
         assert data["page"] == 1
         assert data["per_page"] == 5
     
+    @pytest.mark.asyncio
+    async def test_filter_by_technologies_and_tags(self, client: AsyncClient):
+        response = await client.post("/api/auth/demo/login", json={"email": "terms@example.com"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        projects = {
+            "py": (["Python", "FastAPI"], ["backend"]),
+            "js": (["JavaScript", "React"], ["frontend"]),
+            "full": (["python", "  React "], ["backend", "frontend"]),
+        }
+        for title, (tech_stack, tags) in projects.items():
+            await client.post("/api/community/publish", headers=headers, json={
+                "title": title, "description": "d", "difficulty_level": "beginner",
+                "tech_stack": tech_stack, "tags": tags
+            })
+        
+        async def titles(**params):
+            response = await client.get("/api/community/projects", params=params)
+            assert response.status_code == 200
+            return sorted(p["title"] for p in response.json()["projects"])
+        
+        assert await titles(tech_stack="PYTHON") == ["full", "py"]
+        assert await titles(tech_stack="python,react") == ["full", "js", "py"]
+        assert await titles(tech_stack="python,react", match="all") == ["full"]
+        assert await titles(tech_stack="react", tags="backend") == ["full"]
+        assert await titles(tech_stack="python,cobol", match="all") == []
+        assert await titles(tech_stack="cobol") == []
+        # Filtering happens before pagination, so pages are full
+        assert len(await titles(tech_stack="python,react", per_page=2)) == 2
+        assert (await client.get("/api/community/projects", params={"match": "some"})).status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_total_counts_the_filtered_projects(self, client: AsyncClient, monkeypatch):
+        from app.config import settings
+        from app.services.counts import published_total
+        
+        response = await client.post("/api/auth/demo/login", json={"email": "totals@example.com"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        
+        async def publish(title, difficulty):
+            await client.post("/api/community/publish", headers=headers, json={
+                "title": title, "description": "d", "difficulty_level": difficulty, "tech_stack": [], "tags": []
+            })
+        
+        async def total(**params):
+            return (await client.get("/api/community/projects", params=params)).json()["total"]
+        
+        for n in range(3):
+            await publish(f"easy {n}", "beginner")
+        await publish("hard", "advanced")
+        assert await total() == 4
+        assert await total(difficulty="beginner", per_page=1) == 3
+        assert await total(search="hard") == 1
+        
+        # Cached mode: the unfiltered total is served from memory until the next publish
+        monkeypatch.setattr(settings, "COMMUNITY_TOTAL_MODE", "cached")
+        assert await total() == 4
+        hits = published_total.stats["hits"]
+        assert await total(page=2) == 4
+        assert published_total.stats["hits"] == hits + 1
+        await publish("new", "beginner")
+        assert await total() == 5
+        assert await total(difficulty="beginner") == 4
+    
+    @pytest.mark.asyncio
+    async def test_cursor_pagination_survives_new_publishes(self, client: AsyncClient):
+        response = await client.post("/api/auth/demo/login", json={"email": "cursor@example.com"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        
+        async def publish(title):
+            await client.post("/api/community/publish", headers=headers, json={
+                "title": title, "description": "d", "difficulty_level": "beginner", "tech_stack": [], "tags": []
+            })
+        
+        # Published within the same second, so the id has to break the ties
+        for n in range(7):
+            await publish(f"p{n}")
+        
+        first = (await client.get("/api/community/projects", params={"per_page": 3})).json()
+        assert [p["title"] for p in first["projects"]] == ["p6", "p5", "p4"]
+        await publish("late")
+        seen = [p["title"] for p in first["projects"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            data = (await client.get("/api/community/projects", params={"per_page": 3, "cursor": cursor})).json()
+            seen += [p["title"] for p in data["projects"]]
+            cursor = data["next_cursor"]
+        assert seen == ["p6", "p5", "p4", "p3", "p2", "p1", "p0"]
+        assert data["total"] == 8
+        
+        # Page numbers still work and hand out a cursor too
+        page = (await client.get("/api/community/projects", params={"per_page": 4, "page": 2})).json()
+        assert [p["title"] for p in page["projects"]] == ["p3", "p2", "p1", "p0"]
+        assert page["next_cursor"] is None
+        assert (await client.get("/api/community/projects", params={"cursor": "not-a-cursor"})).status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_search_is_ranked_prefix_aware_and_highlighted(self, client: AsyncClient):
+        response = await client.post("/api/auth/demo/login", json={"email": "search@example.com"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for title, description in [
+            ("Weather dashboard", "Charts of <b>forecast</b> data scraped with Python"),
+            ("Python web scraper", "Collects prices from shops"),
+            ("Chess engine", "Written in Rust"),
+        ]:
+            await client.post("/api/community/publish", headers=headers, json={
+                "title": title, "description": description, "difficulty_level": "beginner", "tech_stack": [], "tags": []
+            })
+        
+        data = (await client.get("/api/community/projects", params={"search": "pyth scrap"})).json()
+        # A title match outranks a description match
+        assert [p["title"] for p in data["projects"]] == ["Python web scraper", "Weather dashboard"]
+        assert data["total"] == 2
+        assert "<mark>Python</mark>" in data["projects"][0]["snippet"]
+        # Project text is escaped, only the highlights are markup
+        assert "&lt;b&gt;" in data["projects"][1]["snippet"]
+        
+        assert (await client.get("/api/community/projects", params={"search": "rust OR"})).json()["total"] == 0
+        assert (await client.get("/api/community/projects", params={"search": "ches"})).json()["total"] == 1
+        listing = (await client.get("/api/community/projects", params={"search": " ? "})).json()
+        assert listing["total"] == 3 and listing["projects"][0]["snippet"] is None
+        cursor = (await client.get("/api/community/projects", params={"per_page": 1})).json()["next_cursor"]
+        response = await client.get("/api/community/projects", params={"search": "python", "cursor": cursor})
+        assert response.status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_member_count_follows_joins_and_leaves(self, client: AsyncClient):
+        from sqlalchemy import event
+        from .conftest import test_engine
+        
+        headers = []
+        for n in range(4):
+            response = await client.post("/api/auth/demo/login", json={"email": f"member{n}@example.com"})
+            headers.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+        owner, first, second, third = headers
+        project = (await client.post("/api/community/publish", headers=owner, json={
+            "title": "Team", "description": "d", "difficulty_level": "beginner",
+            "tech_stack": [], "tags": [], "max_team_size": 3
+        })).json()
+        join = f"/api/community/projects/{project['uuid']}/join"
+        leave = f"/api/community/projects/{project['uuid']}/leave"
+        
+        assert (await client.post(join, headers=first)).json()["current_members"] == 2
+        assert (await client.post(join, headers=first)).json()["detail"] == "You are already a member of this project"
+        assert (await client.post(join, headers=second)).json()["current_members"] == 3
+        response = await client.post(join, headers=third)
+        assert (response.status_code, response.json()["detail"]) == (400, "Project team is full")
+        assert (await client.post(leave, headers=third)).status_code == 400
+        assert (await client.post(leave, headers=first)).status_code == 200
+        assert (await client.post(join, headers=third)).json()["current_members"] == 3
+        
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            listing = (await client.get("/api/community/projects")).json()
+            detail = (await client.get(f"/api/community/projects/{project['uuid']}")).json()
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+        assert listing["projects"][0]["current_members"] == detail["current_members"] == 3
+        # Counts come from the project row; only the owners are loaded
+        assert not any("project_collaborators" in statement for statement in statements)
+    
     @pytest.mark.asyncio
     async def test_get_project_not_found(self, client: AsyncClient):
         response = await client.get("/api/community/projects/nonexistent-uuid")
@@ -119,3 +320,436 @@ class TestAuthAPI:
     async def test_get_me_unauthorized(self, client: AsyncClient):
         response = await client.get("/api/auth/me")
         assert response.status_code in [401, 403]
+    
+    @pytest.mark.asyncio
+    async def test_logout_revokes_only_that_token(self, client: AsyncClient):
+        tokens = []
+        for _ in range(2):
+            response = await client.post("/api/auth/demo/login", json={"email": "logout@test.com"})
+            tokens.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+        
+        assert (await client.get("/api/auth/me", headers=tokens[0])).status_code == 200
+        assert (await client.post("/api/auth/logout", headers=tokens[0])).status_code == 200
+        response = await client.get("/api/auth/me", headers=tokens[0])
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token has been revoked"
+        
+        # Other sessions of the same user stay valid; logging out twice is harmless
+        assert (await client.get("/api/auth/me", headers=tokens[1])).status_code == 200
+        assert (await client.post("/api/auth/logout", headers=tokens[0])).status_code == 200
+    
+    @pytest.mark.asyncio
+    async def test_authenticated_user_is_cached_until_profile_changes(self, client: AsyncClient):
+        from app.services.users import user_cache
+        
+        async def login(email, name):
+            response = await client.post("/api/auth/firebase/verify", json={"token": "demo", "email": email, "name": name})
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+        
+        owner = await login("owner@test.com", "Owner")
+        member = await login("member@test.com", "Member")
+        await client.get("/api/auth/me", headers=member)
+        hits = user_cache.stats["hits"]
+        
+        response = await client.get("/api/auth/me", headers=member)
+        assert response.json()["user"]["name"] == "Member"
+        assert user_cache.stats["hits"] == hits + 1
+        
+        # A cached user is attached to the request session and usable in relationships
+        project = await client.post(
+            "/api/community/publish",
+            headers=owner,
+            json={"title": "Cache", "description": "d", "difficulty_level": "beginner", "tech_stack": [], "tags": []}
+        )
+        response = await client.post(f"/api/community/projects/{project.json()['uuid']}/join", headers=member)
+        assert response.status_code == 200
+        
+        # A profile write through login invalidates the cached snapshot
+        await login("member@test.com", "Renamed Member")
+        response = await client.get("/api/auth/me", headers=member)
+        assert response.json()["user"]["name"] == "Renamed Member"
+        
+        stats = (await client.get("/api/metrics/users")).json()
+        assert stats["invalidations"] >= 1 and 0 < stats["hit_rate"] < 1
+    
+    @pytest.mark.asyncio
+    async def test_firebase_verify_checks_token_locally(self, client: AsyncClient, firebase_key_server):
+        payload = {"email": "spoofed@test.com", "name": "Firebase User"}
+        
+        token = firebase_key_server.mint(email="firebase@test.com")
+        response = await client.post("/api/auth/firebase/verify", json={**payload, "token": token})
+        assert response.status_code == 200
+        # Identity comes from the verified token, not the request body
+        assert response.json()["user"]["email"] == "firebase@test.com"
+        
+        response = await client.post(
+            "/api/auth/firebase/verify", json={**payload, "token": firebase_key_server.mint()}
+        )
+        assert response.status_code == 200
+        assert firebase_key_server.fetches == 1
+        
+        for bad_token in (
+            firebase_key_server.mint(aud="another-project"),
+            firebase_key_server.mint(exp=0),
+            token[:-4] + ("AAAA" if not token.endswith("AAAA") else "BBBB"),
+            "not-a-jwt",
+        ):
+            response = await client.post("/api/auth/firebase/verify", json={**payload, "token": bad_token})
+            assert response.status_code == 401
+
+
+class TestProjectsAPI:
+    """Test user project endpoints"""
+    
+    async def _auth_headers(self, client: AsyncClient) -> dict:
+        response = await client.post(
+            "/api/auth/demo/login",
+            json={"email": "projects@test.com", "name": "Project User"}
+        )
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    @pytest.mark.asyncio
+    async def test_reads_never_commit_and_writes_commit_once(self, client: AsyncClient):
+        from sqlalchemy import event
+        from .conftest import test_engine
+        
+        headers = await self._auth_headers(client)
+        await client.get("/api/auth/me", headers=headers)
+        commits = []
+        listener = lambda conn: commits.append(conn)
+        event.listen(test_engine.sync_engine, "commit", listener)
+        try:
+            response = await client.post(
+                "/projects/start", headers=headers, json={"title": "Once", "description": "d"}
+            )
+            assert response.status_code == 200
+            # The handler commits itself; the dependency has nothing left to commit
+            assert len(commits) == 1
+            
+            for path in ("/projects/my-projects", f"/projects/{response.json()['uuid']}", "/api/community/projects"):
+                assert (await client.get(path, headers=headers)).status_code == 200
+            assert len(commits) == 1
+        finally:
+            event.remove(test_engine.sync_engine, "commit", listener)
+    
+    @pytest.mark.asyncio
+    async def test_my_projects_cursor_pages(self, client: AsyncClient):
+        headers = await self._auth_headers(client)
+        for n in range(5):
+            await client.post("/projects/start", headers=headers, json={"title": f"m{n}", "description": "d"})
+        
+        everything = (await client.get("/projects/my-projects", headers=headers)).json()
+        assert [p["title"] for p in everything["projects"]] == ["m4", "m3", "m2", "m1", "m0"]
+        assert everything["next_cursor"] is None
+        
+        titles, params = [], {"limit": 2}
+        while True:
+            data = (await client.get("/projects/my-projects", headers=headers, params=params)).json()
+            assert (data["total"], data["active_count"]) == (5, 5)
+            titles += [p["title"] for p in data["projects"]]
+            if not data["next_cursor"]:
+                break
+            params = {"limit": 2, "cursor": data["next_cursor"]}
+        assert titles == ["m4", "m3", "m2", "m1", "m0"]
+    
+    @pytest.mark.asyncio
+    async def test_regenerate_single_week_and_task(self, client: AsyncClient):
+        headers = await self._auth_headers(client)
+        roadmap = [
+            {"week": 1, "title": "Setup", "tasks": ["Install Python", "Read docs"]},
+            {"week": 2, "title": "Build", "tasks": ["Write model"]}
+        ]
+        response = await client.post(
+            "/projects/start",
+            json={"title": "My Project", "description": "Test", "tech_stack": ["Python"], "roadmap": roadmap},
+            headers=headers
+        )
+        project_uuid = response.json()["uuid"]
+        
+        response = await client.post(f"/projects/{project_uuid}/regenerate", json={"week": 1}, headers=headers)
+        assert response.status_code == 200
+        new_roadmap = response.json()["roadmap"]
+        assert new_roadmap[0]["week"] == 1
+        assert new_roadmap[0]["title"] != "Setup"
+        assert new_roadmap[1] == roadmap[1]
+        
+        response = await client.post(
+            f"/projects/{project_uuid}/regenerate", json={"week": 2, "task_index": 0}, headers=headers
+        )
+        assert response.status_code == 200
+        patched = response.json()["roadmap"]
+        assert patched[0] == new_roadmap[0]
+        assert patched[1]["title"] == "Build"
+        # Plain-string tasks stay plain strings
+        assert isinstance(patched[1]["tasks"][0], str) and patched[1]["tasks"][0] != "Write model"
+        assert all(isinstance(task, str) for task in new_roadmap[0]["tasks"])
+        
+        response = await client.post(f"/projects/{project_uuid}/regenerate", json={"week": 9}, headers=headers)
+        assert response.status_code == 404
+    
+    @pytest.mark.asyncio
+    async def test_regenerate_stored_recommendation(self, client: AsyncClient):
+        from sqlalchemy import select
+        from app.models.user import Recommendation, User
+        from .conftest import TestSessionLocal
+        
+        headers = await self._auth_headers(client)
+        project = {"title": "Stored", "description": "d", "tech_stack": ["Python"], "roadmap": [
+            {"week": 1, "title": "Setup", "tasks": ["Install Python", "Read docs"]},
+        ]}
+        async with TestSessionLocal() as db:
+            user = (await db.execute(select(User).where(User.email == "projects@test.com"))).scalar_one()
+            rows = [
+                Recommendation(user_id=user.id, recommendations_json=json.dumps(stored))
+                for stored in (
+                    {"student_name": "Project User", "recommendations": [project], "personalization_summary": "s"},
+                    [project],
+                    {"unexpected": True},
+                )
+            ]
+            db.add_all(rows)
+            await db.commit()
+            whole, listed, broken = (row.uuid for row in rows)
+        
+        for uuid in (whole, listed):
+            response = await client.post(
+                f"/api/survey/recommendations/{uuid}/regenerate",
+                json={"project_index": 0, "week": 1, "task_index": 1}, headers=headers
+            )
+            assert response.status_code == 200
+            assert response.json()["project"]["roadmap"][0]["tasks"][0] == "Install Python"
+            assert isinstance(response.json()["project"]["roadmap"][0]["tasks"][1], str)
+        
+        async with TestSessionLocal() as db:
+            saved = await db.scalar(select(Recommendation.recommendations_json).where(Recommendation.uuid == whole))
+        assert json.loads(saved)["personalization_summary"] == "s"
+        
+        response = await client.post(
+            f"/api/survey/recommendations/{listed}/regenerate",
+            json={"project_index": 3, "week": 1}, headers=headers
+        )
+        assert response.status_code == 404
+        response = await client.post(
+            f"/api/survey/recommendations/{broken}/regenerate",
+            json={"project_index": 0, "week": 1}, headers=headers
+        )
+        assert response.status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_idempotency_key_replays_start_project(self, client: AsyncClient):
+        import asyncio
+        
+        headers = await self._auth_headers(client)
+        payload = {"title": "Retry Project", "description": "Flaky network"}
+        keyed = {**headers, "Idempotency-Key": "start-1"}
+        
+        first, second = await asyncio.gather(
+            client.post("/projects/start", json=payload, headers=keyed),
+            client.post("/projects/start", json=payload, headers=keyed),
+        )
+        assert first.status_code == second.status_code == 200
+        assert first.json()["uuid"] == second.json()["uuid"]
+        
+        third = await client.post("/projects/start", json=payload, headers=keyed)
+        assert third.headers.get("Idempotent-Replayed") == "true"
+        assert third.json()["uuid"] == first.json()["uuid"]
+        
+        response = await client.get("/projects/my-projects", headers=headers)
+        assert response.json()["total"] == 1
+        
+        response = await client.post("/projects/start", json={**payload, "title": "Other"}, headers=keyed)
+        assert response.status_code == 422
+
+
+class TestIdempotencyMiddleware:
+    """Replays keep every header, and an abandoned request releases its key"""
+    
+    @pytest.fixture
+    def keyed_app(self):
+        import asyncio
+        from fastapi import FastAPI, Response
+        from app.database import get_db
+        from app.idempotency import IdempotencyMiddleware
+        from .conftest import override_get_db
+        
+        mini = FastAPI()
+        mini.add_middleware(IdempotencyMiddleware, routes={("POST", "/cookies"), ("POST", "/slow")})
+        mini.dependency_overrides[get_db] = override_get_db
+        
+        @mini.post("/cookies")
+        async def cookies():
+            response = Response(content=b"ok")
+            response.set_cookie("a", "1")
+            response.set_cookie("b", "2")
+            return response
+        
+        @mini.post("/slow")
+        async def slow():
+            await asyncio.sleep(5)
+            return {}
+        
+        return mini
+    
+    @pytest.mark.asyncio
+    async def test_replay_keeps_repeated_headers(self, keyed_app):
+        from httpx import ASGITransport
+        
+        async with AsyncClient(transport=ASGITransport(app=keyed_app), base_url="http://test") as mini:
+            first = await mini.post("/cookies", headers={"Idempotency-Key": "k"})
+            replay = await mini.post("/cookies", headers={"Idempotency-Key": "k"})
+        for response in (first, replay):
+            assert sorted(response.headers.get_list("set-cookie")) == ["a=1; Path=/; SameSite=lax", "b=2; Path=/; SameSite=lax"]
+        assert replay.headers.get("Idempotent-Replayed") == "true"
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_request_releases_its_key(self, keyed_app):
+        import asyncio
+        from sqlalchemy import func, select
+        from app.models.idempotency import IdempotencyKey
+        from httpx import ASGITransport
+        from .conftest import TestSessionLocal
+        
+        async with AsyncClient(transport=ASGITransport(app=keyed_app), base_url="http://test") as mini:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(mini.post("/slow", headers={"Idempotency-Key": "k"}), 0.2)
+        await asyncio.sleep(0.1)
+        async with TestSessionLocal() as db:
+            assert await db.scalar(select(func.count()).select_from(IdempotencyKey)) == 0
+
+
+class TestAIAssistantAPI:
+    """Test the /api/ai assistant endpoints"""
+    
+    @pytest.mark.asyncio
+    async def test_help_retrieves_relevant_roadmap_parts_and_streams(self, client: AsyncClient):
+        from app.services.retrieval import retrieval_cache
+        
+        response = await client.post(
+            "/api/auth/demo/login",
+            json={"email": "assistant@test.com", "name": "Assistant User"}
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        roadmap = [
+            {"week": 1, "title": "Data collection", "deliverables": ["Labeled dataset"], "tasks": [
+                {"name": "Scrape product reviews", "description": "Collect reviews with BeautifulSoup",
+                 "steps": ["Write scraper"], "estimated_time": "3 hours",
+                 "resources": [{"title": "BeautifulSoup docs", "url": "https://example.com/bs4", "type": "docs"}]}
+            ]},
+            {"week": 2, "title": "Model training", "deliverables": ["Trained classifier"], "tasks": [
+                {"name": "Fine-tune BERT", "description": "Fine-tune a transformer for sentiment",
+                 "steps": ["Tokenize", "Train"], "estimated_time": "5 hours", "resources": []}
+            ]},
+        ]
+        response = await client.post(
+            "/projects/start",
+            json={"title": "Review Sentiment", "description": "Test", "roadmap": roadmap},
+            headers=headers
+        )
+        project_uuid = response.json()["uuid"]
+        
+        question = {"project_id": project_uuid, "question": "How do I fine-tune BERT?"}
+        response = await client.post("/api/ai/help", json=question, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["sources"][0]["title"] == "Fine-tune BERT"
+        assert "Fine-tune BERT" in data["answer"]
+        assert all(source["week"] == 2 for source in data["sources"])
+        
+        hits = retrieval_cache.stats["hits"]
+        response = await client.post(
+            "/api/ai/help", json=question, headers={**headers, "Accept": "text/event-stream"}
+        )
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block.split("\n")[0] for block in response.text.strip().split("\n\n")]
+        assert events[0] == "event: sources" and events[-1] == "event: done"
+        assert "event: token" in events
+        assert retrieval_cache.stats["hits"] == hits + 1
+        
+        response = await client.post(
+            "/api/ai/help", json={"project_id": "missing", "question": "?"}, headers=headers
+        )
+        assert response.status_code == 404
+    
+    @pytest.mark.asyncio
+    async def test_generate_idea(self, client: AsyncClient):
+        response = await client.post("/api/ai/generate-idea", json={"interests": ["NLP"]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["title"]
+        assert data["roadmap"]
+
+
+class TestQueryPlans:
+    """Hot queries must use an index - fails when a plan regresses to a table scan or sort"""
+    
+    @staticmethod
+    def _fts_lookup(step, outer):
+        # An FTS5 table driven by its MATCH ("M") is an index lookup. "=" means it
+        # is probed by rowid per row of the outer table - fine only if those rows
+        # are themselves looked up by primary key (a page of ids)
+        match = re.search(r"VIRTUAL TABLE INDEX \d+:(\S*)", step)
+        if not match or "M" not in match.group(1):
+            return False
+        return "=" not in match.group(1) or bool(re.search(r"\((rowid|id)=\?", outer))
+    
+    @classmethod
+    def _regressions(cls, plan):
+        return [
+            step for outer, step in zip([""] + plan, plan)
+            # "SCAN t" reads the whole table (or index); "SEARCH" seeks into an index
+            if (step.startswith("SCAN ") and not cls._fts_lookup(step, outer)) or "TEMP B-TREE FOR ORDER BY" in step
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_hot_queries_use_indexes(self, client: AsyncClient, db_session):
+        from sqlalchemy import event
+        from app.services.users import upsert_login_user
+        from .conftest import test_engine
+        
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                statements.append((statement, parameters))
+        
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            headers = []
+            for email in ("owner@example.com", "member@example.com"):
+                response = await client.post("/api/auth/demo/login", json={"email": email})
+                headers.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+            owner, member = headers
+            project = (await client.post("/api/community/publish", headers=owner, json={
+                "title": "Plans", "description": "d", "difficulty_level": "beginner", "tech_stack": ["Python"], "tags": ["ML"]
+            })).json()
+            for query in ("", "?difficulty=beginner&looking_for_collaborators=true", "?search=Plan&page=2", "?search=pla",
+                          "?tech_stack=python,rust", "?tech_stack=python&tags=ml&match=all"):
+                assert (await client.get(f"/api/community/projects{query}")).status_code == 200
+            from app.services.pagination import encode_cursor
+            from datetime import datetime
+            cursor = encode_cursor(datetime(2100, 1, 1), 1)
+            assert (await client.get(f"/api/community/projects?cursor={cursor}&difficulty=beginner")).status_code == 200
+            await client.get(f"/api/community/projects/{project['uuid']}")
+            await client.post(f"/api/community/projects/{project['uuid']}/join", headers=member)
+            await client.post(f"/api/community/projects/{project['uuid']}/leave", headers=member)
+            await client.post(f"/api/community/projects/{project['uuid']}/join", headers=member)
+            started = (await client.post("/projects/start", headers=owner, json={"title": "x", "description": "d"})).json()
+            await client.get("/projects/my-projects", headers=owner)
+            await client.get("/projects/my-projects?status_filter=active", headers=owner)
+            await client.get(f"/projects/my-projects?limit=1&cursor={cursor}", headers=owner)
+            await client.get(f"/projects/{started['uuid']}", headers=owner)
+            await client.post("/api/auth/logout", headers=member)
+            await upsert_login_user(
+                db_session, "oauth@example.com", {"provider": "github", "provider_id": "7"}, {}, ("github", "7")
+            )
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+        
+        async with test_engine.connect() as conn:
+            regressions = {}
+            for statement, parameters in statements:
+                plan = [row[-1] for row in (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()]
+                if self._regressions(plan):
+                    regressions[" ".join(statement.split())] = plan
+        assert len(statements) > 20
+        assert regressions == {}
@@ -0,0 +1,829 @@
+"""
+Tests for service-layer helpers
+"""
+import json
+import pytest
+
+from app.models.survey import SurveyResponse
+from app.services.ai_engine import generate_demo_recommendations
+from app.services import codec
+
+
+SURVEY = SurveyResponse(
+    name="Test User",
+    email="test@example.com",
+    programming_languages=["Python"],
+    skill_level="intermediate",
+    ai_ml_experience="Basic - completed tutorials/courses",
+    interest_areas=["Computer Vision", "Natural Language Processing"],
+    preferred_project_type="Product-focused (build & ship)",
+    industry_interest=["Education & EdTech"],
+    career_goal="ML Engineer at a tech company",
+    learning_style="Learning by doing (build first)",
+    time_commitment="5-10 hours",
+    project_duration="3-4 weeks (standard)",
+    team_preference="Solo - I like independence",
+    collaboration_tools=["Git/GitHub"],
+)
+
+
+class TestRecommendationCodec:
+    """Test the msgspec recommendation codec"""
+
+    def test_provider_json_round_trip(self):
+        model = generate_demo_recommendations(SURVEY)
+        raw = json.dumps({
+            "recommendations": model.model_dump()["recommendations"],
+            "personalization_summary": model.personalization_summary,
+        })
+        decoded = codec.decode_provider_json(raw, SURVEY.name)
+        assert decoded.student_name == SURVEY.name
+        assert decoded.recommendations[0].roadmap[0].tasks[0].resources[0].url
+        assert json.loads(codec.encode_recommendations(decoded)) == model.model_dump()
+        assert codec.to_model(decoded) == model
+
+    def test_provider_json_rejects_bad_shape(self):
+        raw = json.dumps({"recommendations": [{"title": "Missing fields"}], "personalization_summary": ""})
+        with pytest.raises(codec.CodecError):
+            codec.decode_provider_json(raw, SURVEY.name)
+
+    def test_provider_json_coerces_quoted_numbers(self):
+        payload = generate_demo_recommendations(SURVEY).model_dump()
+        payload["recommendations"][0]["roadmap"][0]["week"] = "1"
+        raw = json.dumps({"recommendations": payload["recommendations"], "personalization_summary": ""})
+        assert codec.decode_provider_json(raw, SURVEY.name).recommendations[0].roadmap[0].week == 1
+        assert codec.salvage_provider_json(raw, SURVEY.name).recommendations[0].roadmap[0].week == 1
+
+    def test_truncated_provider_json_is_a_codec_error(self):
+        raw = json.dumps({"recommendations": [], "personalization_summary": "cut off"})[:-10]
+        with pytest.raises(codec.CodecError):
+            codec.decode_provider_json(raw, SURVEY.name)
+        with pytest.raises(codec.CodecError):
+            codec.salvage_provider_json(raw, SURVEY.name)
+
+
+def _typical_user_prompts():
+    """A representative (deliberately verbose) user message for every prompt name"""
+    from app.services.ai_engine import build_user_prompt
+    from app.services.regeneration import build_context_prompt
+    from app.services.assistant import build_help_prompt, retrieve
+    
+    survey = SURVEY.model_copy(update={
+        "programming_languages": ["Python", "JavaScript", "TypeScript", "SQL", "C++"],
+        "interest_areas": ["Computer Vision", "Natural Language Processing", "Generative AI", "MLOps & Deployment"],
+        "industry_interest": ["Healthcare & Biotech", "Education & EdTech", "Climate & Sustainability"],
+        "collaboration_tools": ["Git/GitHub", "Slack", "Notion", "VS Code Live Share"],
+    })
+    project = generate_demo_recommendations(survey).recommendations[0].model_dump()
+    return {
+        "recommendations": build_user_prompt(survey),
+        "roadmap_week": build_context_prompt(project, project["roadmap"], 2, None, "More hands-on please"),
+        "roadmap_task": build_context_prompt(project, project["roadmap"], 2, 1, "More hands-on please"),
+        "project_help": build_help_prompt(
+            project, retrieve("budget-test", project["roadmap"], "How do I evaluate my model in week 3?"),
+            "How do I evaluate my model in week 3?"
+        ),
+        "project_idea": "Student interests: Computer Vision, Natural Language Processing, Generative AI",
+    }
+
+
+class TestPromptRegistry:
+    """Prompt size budgets - a failure here means a prompt change grew the request payload"""
+
+    def test_every_prompt_version_fits_its_budget(self):
+        from app.services.prompts import prompt_registry, estimate_tokens
+        
+        user_prompts = _typical_user_prompts()
+        for prompt in prompt_registry.active():
+            for version in prompt_registry.versions(prompt.name):
+                template = prompt_registry.get(prompt.name, version)
+                total = template.tokens + estimate_tokens(user_prompts[template.name])
+                budget = prompt_registry.budget_for(template)
+                assert total <= budget, f"{template.key}: ~{total} input tokens exceeds budget {budget}"
+
+    def test_tiered_recommendation_prompts_leave_roadmap_length_to_the_request(self):
+        from app.services.prompts import prompt_registry
+        
+        for version in prompt_registry.versions("recommendations"):
+            if version != "v1":  # the untiered 4-week prompt
+                text = prompt_registry.get("recommendations", version).text
+                assert "4-week" not in text and '"4 weeks"' not in text, version
+
+    def test_usage_is_estimated_when_provider_reports_none(self):
+        import time
+        from app.services.prompts import prompt_registry, token_accountant, record_usage
+        
+        prompt = prompt_registry.get("roadmap_task")
+        record_usage(prompt, "test", "user message", '{"name": "x"}', time.monotonic())
+        usage = token_accountant.snapshot()[f"{prompt.key}:test"]
+        assert usage["calls"] == usage["estimated_calls"] >= 1
+        assert usage["input_tokens"] > prompt.tokens
+        assert usage["output_tokens"] > 0
+
+
+class TestPromptPrefixCaching:
+    """Static system prompts are sent in a cacheable form and cache hits are recorded"""
+
+    @pytest.mark.asyncio
+    async def test_anthropic_cache_control_and_hits(self, provider_stub):
+        from app.services.ai_engine import complete_anthropic
+        from app.services.prompts import prompt_registry, token_accountant
+        
+        token_accountant.reset()
+        prompt = prompt_registry.get("roadmap_task")
+        await complete_anthropic(prompt, "first student", 400)
+        await complete_anthropic(prompt, "second student", 400)
+        
+        _, body = provider_stub.requests[-1]
+        assert body["system"][0]["cache_control"] == {"type": "ephemeral"}
+        usage = token_accountant.snapshot()[f"{prompt.key}:anthropic"]
+        assert usage["cache_write_tokens"] > 0
+        assert usage["cached_input_tokens"] == usage["cache_write_tokens"]
+        assert 0 < usage["cache_hit_ratio"] < 1
+
+    @pytest.mark.asyncio
+    async def test_openai_stable_prefix_and_hits(self, provider_stub):
+        from app.services.ai_engine import complete_openai
+        from app.services.prompts import prompt_registry, token_accountant
+        
+        token_accountant.reset()
+        prompt = prompt_registry.get("roadmap_task")
+        await complete_openai(prompt, "first student", 400)
+        await complete_openai(prompt, "second student", 400)
+        
+        _, body = provider_stub.requests[-1]
+        assert body["messages"][0] == {"role": "system", "content": prompt.text}
+        assert body["prompt_cache_key"] == f"sanapath:{prompt.key}"
+        usage = token_accountant.snapshot()[f"{prompt.key}:openai"]
+        assert usage["calls"] == 2
+        assert usage["cached_input_tokens"] > 0
+
+    @pytest.mark.asyncio
+    async def test_gemini_streaming_uses_the_configured_endpoint(self, monkeypatch):
+        from app.config import settings
+        from app.services import ai_engine
+        from app.services.prompts import prompt_registry
+        
+        configured = []
+        
+        class FakeModel:
+            def __init__(self, model_name, system_instruction=None):
+                self.system_instruction = system_instruction
+            
+            async def generate_content_async(self, contents, generation_config, stream):
+                async def chunks():
+                    yield type("Chunk", (), {"text": "streamed", "usage_metadata": None})()
+                return chunks()
+        
+        monkeypatch.setattr(settings, "GEMINI_API_ENDPOINT", "gemini.internal:8443")
+        monkeypatch.setattr(ai_engine.genai, "configure", lambda **kwargs: configured.append(kwargs))
+        monkeypatch.setattr(ai_engine.genai, "GenerativeModel", FakeModel)
+        
+        prompt = prompt_registry.get("project_help")
+        parts = [part async for part in ai_engine._stream_gemini(prompt, "question", 100)]
+        assert parts == ["streamed"]
+        assert configured[0]["client_options"] == {"api_endpoint": "gemini.internal:8443"}
+
+
+class TestRequestDeadlines:
+    """Provider stages run inside the request deadline and fall back to the demo catalog"""
+
+    @pytest.fixture
+    def live_provider(self, provider_stub, monkeypatch):
+        from app.config import settings
+        monkeypatch.setattr(settings, "AI_DEMO_MODE", False)
+        monkeypatch.setattr(settings, "AI_PROVIDER", "openai")
+        monkeypatch.setattr(settings, "DEADLINE_FALLBACK_RESERVE_SECONDS", 0.5)
+        return provider_stub
+
+    @pytest.mark.asyncio
+    async def test_slow_provider_falls_back_within_deadline(self, live_provider):
+        import time
+        from app.services.ai_engine import get_recommendations
+        from app.services.deadline import Deadline, stage_recorder
+        
+        live_provider.delay = 3.0
+        started = time.monotonic()
+        result = await get_recommendations(SURVEY, Deadline(1.6, "slow_test"))
+        
+        assert time.monotonic() - started < 1.6
+        assert result.recommendations  # demo catalog
+        stages = stage_recorder.snapshot()
+        assert stages["slow_test.provider"]["timeout"] == 1
+        assert stages["slow_test.fallback"]["ok"] == 1
+        assert "slow_test.retry" not in stages
+
+    @pytest.mark.asyncio
+    async def test_client_timeouts_count_as_timeouts(self):
+        import anthropic, httpx, openai
+        from app.services.deadline import Deadline, DeadlineExceeded, run_stage, stage_recorder
+        
+        request = httpx.Request("POST", "https://provider.test")
+        for error in (openai.APITimeoutError(request), anthropic.APITimeoutError(request), httpx.ReadTimeout("slow")):
+            async def call(timeout, error=error):
+                raise error
+            with pytest.raises(DeadlineExceeded):
+                await run_stage("provider", Deadline(10, "client_timeout_test"), call)
+        assert stage_recorder.snapshot()["client_timeout_test.provider"]["timeout"] == 3
+
+    @pytest.mark.asyncio
+    async def test_partially_invalid_answer_is_salvaged(self, live_provider):
+        from app.services.ai_engine import get_recommendations
+        from app.services.deadline import Deadline, stage_recorder
+        
+        payload = generate_demo_recommendations(SURVEY).model_dump()
+        del payload["recommendations"][0]["roadmap"]
+        live_provider.reply = json.dumps(payload)
+        result = await get_recommendations(SURVEY, Deadline(10, "salvage_test"))
+        
+        assert len(result.recommendations) == len(payload["recommendations"]) - 1
+        assert result.student_name == SURVEY.name
+        stages = stage_recorder.snapshot()
+        assert stages["salvage_test.salvage"]["ok"] == 1
+        assert stages["salvage_test.provider"]["ok"] == 1
+
+    @pytest.mark.asyncio
+    async def test_inflight_speculation_is_only_awaited_within_deadline(self):
+        import asyncio
+        from app.services.speculation import SpeculationStore
+
+        async def slow_generation():
+            await asyncio.sleep(3.0)
+            return codec.RecommendationStruct(student_name="late", recommendations=[], personalization_summary="")
+
+        store = SpeculationStore(ttl_seconds=60, max_entries=4, max_per_client=2)
+        store.start("fp", slow_generation)
+        assert await store.adopt("fp", timeout=0.05) is None
+        assert store.stats["timeouts"] == 1
+        assert len(store) == 0
+
+    @pytest.mark.asyncio
+    async def test_speculations_are_limited_per_client(self):
+        import asyncio
+        from app.services.speculation import SpeculationStore
+
+        async def slow_generation():
+            await asyncio.sleep(3.0)
+
+        store = SpeculationStore(ttl_seconds=60, max_entries=4, max_per_client=2)
+        assert store.start("a1", slow_generation, client="10.0.0.1")
+        assert store.start("a2", slow_generation, client="10.0.0.1")
+        assert store.start("b1", slow_generation, client="10.0.0.2")
+        assert store.start("a3", slow_generation, client="10.0.0.1")
+        assert store.stats["superseded"] == 1
+        assert await store.adopt("a1") is None
+        assert len(store) == 3
+        for fingerprint in ("a2", "a3", "b1"):
+            store.discard(fingerprint)
+
+    @pytest.mark.asyncio
+    async def test_speculation_is_trimmed_to_the_submitted_shape(self):
+        from app.services.speculation import SpeculationStore
+
+        async def generation():
+            return codec.from_model(generate_demo_recommendations(SURVEY))
+
+        store = SpeculationStore(ttl_seconds=60, max_entries=4, max_per_client=2)
+        store.start("fp", generation, shape=(3, 2))
+        result = await store.adopt("fp", shape=(2, 1))
+        assert {len(p.roadmap) for p in result.recommendations} == {2}
+        assert all(len(week.tasks) <= 1 for p in result.recommendations for week in p.roadmap)
+        assert result.recommendations[0].estimated_duration == "2 weeks"
+
+        # A longer roadmap than was speculated cannot be cut out of it
+        store.start("fp", generation, shape=(2, 1))
+        assert await store.adopt("fp", shape=(2, 2)) is None
+        assert store.stats["shape_mismatches"] == 1
+        assert store.stats["hits"] + store.stats["inflight_hits"] == 1
+
+
+class TestAssistantRetrieval:
+    """Roadmap retrieval and streamed answers for the AI assistant"""
+
+    @pytest.mark.asyncio
+    async def test_streams_provider_answer_from_retrieved_passages(self, provider_stub, monkeypatch):
+        from app.config import settings
+        from app.services.assistant import retrieve, stream_help
+        from app.services.prompts import token_accountant
+        
+        monkeypatch.setattr(settings, "AI_DEMO_MODE", False)
+        monkeypatch.setattr(settings, "AI_PROVIDER", "openai")
+        provider_stub.reply = "Start with a small labeled dataset and a pretrained backbone."
+        project = generate_demo_recommendations(SURVEY).recommendations[0].model_dump()
+        
+        passages = retrieve("stream-test", project["roadmap"], "Which dataset should I use in week 1?")
+        assert passages and passages[0].week == 1
+        chunks = [chunk async for chunk in stream_help(project, passages, "Which dataset should I use in week 1?")]
+        
+        assert len(chunks) > 1 and "".join(chunks) == provider_stub.reply
+        _, body = provider_stub.requests[-1]
+        user_prompt = body["messages"][1]["content"]
+        # Only the retrieved excerpts are sent, not the whole roadmap
+        assert len(user_prompt) < len(str(project["roadmap"])) / 2
+        assert token_accountant.snapshot()["project_help@v1:openai"]["output_tokens"] > 0
+
+
+class TestModelTiering:
+    """Output budgets and model tiers follow the survey, load and deadline"""
+
+    def test_plan_follows_survey_load_and_deadline(self, monkeypatch):
+        from app.config import settings
+        from app.services.deadline import Deadline
+        from app.services.tiering import generation_load, plan_recommendations
+        
+        quick = SURVEY.model_copy(update={"skill_level": "beginner", "project_duration": "1-2 weeks (quick win)"})
+        long_term = SURVEY.model_copy(update={
+            "skill_level": "advanced", "project_duration": "3+ months (long-term)", "time_commitment": "20-30 hours"
+        })
+        fast = plan_recommendations(quick, "openai")
+        quality = plan_recommendations(long_term, "openai")
+        standard = plan_recommendations(SURVEY, "openai")
+        
+        assert (fast.tier, fast.model, fast.shape) == ("fast", "gpt-4o-mini", (2, 2))
+        # Too long for the output limit: fewer weeks, each still as full as the time commitment allows
+        assert (quality.tier, quality.model, quality.shape) == ("quality", "gpt-4o", (4, 4))
+        assert fast.max_tokens < standard.max_tokens < quality.max_tokens
+        # The same roadmap is trimmed to fit a model with a smaller output limit
+        trimmed = plan_recommendations(long_term, "anthropic")
+        assert trimmed.model == "claude-3-5-sonnet-20241022"
+        assert trimmed.max_tokens <= 8192 and trimmed.shape < quality.shape
+        
+        assert plan_recommendations(long_term, "openai", Deadline(5)).reason == "deadline"
+        monkeypatch.setattr(settings, "TIER_LOAD_THRESHOLD", 1)
+        with generation_load.track():
+            assert plan_recommendations(long_term, "openai").tier == "fast"
+        
+        monkeypatch.setattr(settings, "MODEL_TIERING_ENABLED", False)
+        assert plan_recommendations(quick, "openai").max_tokens == 4000
+
+    def test_every_plan_fits_its_endpoint_deadline(self):
+        from itertools import product
+        from app.services.deadline import Deadline
+        from app.services.tiering import (
+            FIRST_TOKEN_SECONDS, OUTPUT_TOKENS_PER_SECOND, expected_output_tokens, plan_recommendations
+        )
+        
+        answers = product(
+            ("beginner", "intermediate", "advanced", "expert"),
+            ("Less than 5 hours", "5-10 hours", "10-20 hours", "20-30 hours", "Full-time (30+ hours)"),
+            ("1-2 weeks (quick win)", "3-4 weeks (standard)", "1-2 months (substantial)", "3+ months (long-term)"),
+            ("openai", "anthropic", "gemini"),
+            ("survey_submit", "survey_prefetch"),
+        )
+        for skill, hours, duration, provider, endpoint in answers:
+            survey = SURVEY.model_copy(update={
+                "skill_level": skill, "time_commitment": hours, "project_duration": duration
+            })
+            deadline = Deadline.for_endpoint(endpoint)
+            plan = plan_recommendations(survey, provider, deadline)
+            seconds = FIRST_TOKEN_SECONDS + plan.max_tokens / OUTPUT_TOKENS_PER_SECOND[plan.model]
+            assert seconds <= deadline.stage_budget() + 0.1, (plan, endpoint)
+            assert expected_output_tokens(*plan.shape) <= plan.max_tokens
+        
+        # The lightest answers get a smaller budget than the old fixed 4000
+        light = SURVEY.model_copy(update={
+            "skill_level": "beginner", "time_commitment": "Less than 5 hours", "project_duration": "1-2 weeks (quick win)"
+        })
+        assert plan_recommendations(light, "openai").max_tokens < 4000
+
+    @pytest.mark.asyncio
+    async def test_tier_latency_and_cost_are_reported(self, provider_stub, monkeypatch):
+        from app.config import settings
+        from app.services.ai_engine import get_recommendations
+        from app.services.prompts import token_accountant
+        from app.services.tiering import tier_report
+        
+        monkeypatch.setattr(settings, "AI_DEMO_MODE", False)
+        monkeypatch.setattr(settings, "AI_PROVIDER", "openai")
+        token_accountant.reset()
+        provider_stub.reply = generate_demo_recommendations(SURVEY).model_dump_json(exclude={"student_name"})
+        quick = SURVEY.model_copy(update={"project_duration": "1-2 weeks (quick win)"})
+        
+        await get_recommendations(quick)
+        
+        _, body = provider_stub.requests[-1]
+        assert body["model"] == "gpt-4o-mini" and body["max_tokens"] < 6000
+        assert "2-week roadmaps with 2 tasks per week" in body["messages"][1]["content"]
+        # ... and the system prompt does not contradict it with a fixed length
+        assert "4-week" not in body["messages"][0]["content"]
+        report = tier_report()
+        assert report["models"]["gpt-4o-mini"]["calls"] == 1
+        assert report["tiers"]["fast"]["cost_usd"] > 0
+        assert report["plans"]["fast"]["default"] >= 1
+
+
+class TestOutboundHTTP:
+    """The shared outbound client keeps connections alive across requests"""
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused(self):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from app.services.http_client import OutboundHTTP
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            
+            def do_GET(self):
+                body = b'{"login": "octocat"}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        outbound = OutboundHTTP()
+        try:
+            await outbound.start()
+            for _ in range(5):
+                response = await outbound.client.get(f"http://127.0.0.1:{server.server_address[1]}/user")
+                assert response.json() == {"login": "octocat"}
+            stats = outbound.snapshot()
+        finally:
+            await outbound.aclose()
+            server.shutdown()
+            server.server_close()
+        
+        assert stats["requests"] == 5
+        assert stats["connections_opened"] == 1
+        assert stats["reuse_ratio"] == 0.8
+        assert stats["open_connections"] == stats["idle_connections"] == 1
+
+
+class TestFirebaseKeys:
+    """Signing keys are cached per their cache headers and refreshed on rotation"""
+
+    @pytest.mark.asyncio
+    async def test_keys_follow_cache_headers_and_rotation(self, firebase_key_server, monkeypatch):
+        from app.services import firebase
+        
+        await firebase.verify_firebase_token(firebase_key_server.mint())
+        await firebase.verify_firebase_token(firebase_key_server.mint())
+        assert firebase_key_server.fetches == 1
+        
+        # A token from a rotated key refreshes once instead of failing
+        monkeypatch.setattr(firebase, "MIN_REFRESH_INTERVAL_SECONDS", 0)
+        firebase_key_server.rotate()
+        claims = await firebase.verify_firebase_token(firebase_key_server.mint(email="rotated@test.com"))
+        assert claims["email"] == "rotated@test.com"
+        assert firebase.firebase_keys.stats["unknown_kid_refreshes"] == 1
+        
+        # max-age=0 means every verification has to refetch
+        firebase_key_server.max_age = 0
+        firebase.firebase_keys._expires_at = 0
+        await firebase.verify_firebase_token(firebase_key_server.mint())
+        await firebase.verify_firebase_token(firebase_key_server.mint())
+        assert firebase_key_server.fetches == 4
+
+
+class TestLoginUpsert:
+    """Logins write only when the profile changed, in a single statement"""
+
+    @pytest.mark.asyncio
+    async def test_login_writes_only_on_change(self, db_session):
+        from sqlalchemy import event
+        from app.services.users import upsert_login_user
+        from .conftest import test_engine
+        
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.split()[0].upper())
+        
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            create = {"name": "Ada", "provider": "github", "provider_id": "42", "avatar_url": "a.png"}
+            update = {"provider": "github", "provider_id": "42", "avatar_url": "a.png"}
+            user = await upsert_login_user(db_session, "ada@test.com", create, update, ("github", "42"))
+            assert user.id and user.uuid and user.name == "Ada"
+            assert statements == ["SELECT", "INSERT"]
+            
+            # Returning user with an unchanged profile: one SELECT, no write
+            statements.clear()
+            again = await upsert_login_user(db_session, "ada@test.com", create, update, ("github", "42"))
+            assert again.uuid == user.uuid
+            assert statements == ["SELECT"]
+            
+            # Linking the same email to another provider updates the row in place
+            statements.clear()
+            linked = await upsert_login_user(
+                db_session,
+                "ada@test.com",
+                {**create, "provider": "google", "provider_id": "g-1"},
+                {"provider": "google", "provider_id": "g-1", "avatar_url": "b.png"},
+                ("google", "g-1"),
+            )
+            assert statements == ["SELECT", "INSERT"]
+            assert (linked.id, linked.uuid, linked.name) == (user.id, user.uuid, "Ada")
+            assert (linked.provider, linked.avatar_url) == ("google", "b.png")
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+
+class TestTokenCache:
+    """Verified tokens are served from cache until exp or a signing key change"""
+
+    def test_cached_until_expiry_and_key_change(self, monkeypatch):
+        from datetime import timedelta
+        from app.config import settings
+        from app.services.auth import create_access_token, token_cache, verify_token
+        
+        token = create_access_token({"sub": "user-1"})
+        assert verify_token(token)["sub"] == "user-1"
+        hits = token_cache.stats["hits"]
+        payload = verify_token(token)
+        payload["sub"] = "tampered"
+        assert verify_token(token)["sub"] == "user-1"
+        assert token_cache.stats["hits"] == hits + 2
+        
+        # Expired tokens are neither cached nor accepted
+        assert verify_token(create_access_token({"sub": "user-1"}, timedelta(seconds=-1))) is None
+        
+        # Rotating the key flushes every entry, so old tokens are re-verified and rejected
+        monkeypatch.setattr(settings, "SECRET_KEY", settings.SECRET_KEY + "-rotated")
+        assert verify_token(token) is None
+        assert token_cache.stats["flushes"] == 1
+        assert verify_token(create_access_token({"sub": "user-2"}))["sub"] == "user-2"
+
+
+class TestPasswordHashing:
+    """bcrypt runs on its own pool without stalling the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_hashing_does_not_block_event_loop(self):
+        import asyncio
+        import time
+        from app.services.auth import get_password_hash_async, verify_password_async
+        
+        lags = []
+        
+        async def ticker():
+            for _ in range(20):
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - started - 0.01)
+        
+        hashed, _ = await asyncio.gather(get_password_hash_async("correct horse"), ticker())
+        assert await verify_password_async("correct horse", hashed)
+        assert not await verify_password_async("wrong horse", hashed)
+        # An inline bcrypt call would stall the loop for its whole duration
+        assert max(lags) < 0.1
+
+
+class TestTokenRevocation:
+    """Revocations are mirrored into a Bloom filter and picked up incrementally"""
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        from app.services.revocation import BloomFilter
+        
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"revoked-{i}")
+        assert all(f"revoked-{i}" in bloom for i in range(1000))
+        false_positives = sum(f"valid-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+    
+    @pytest.mark.asyncio
+    async def test_other_workers_revocations_are_picked_up(self, db_session, monkeypatch):
+        from datetime import datetime, timedelta
+        from sqlalchemy import select
+        from app.config import settings
+        from app.models.revocation import RevokedToken
+        from app.services.revocation import RevocationList
+        
+        monkeypatch.setattr(settings, "REVOCATION_REFRESH_SECONDS", 0)
+        worker = RevocationList(capacity=1000, error_rate=0.001)
+        assert not await worker.is_revoked(db_session, "jti-1")
+        assert worker.stats["bloom_negatives"] == 1 and worker.stats["db_checks"] == 0
+        
+        # Another worker revokes a token; this one sees it on its next refresh
+        db_session.add(RevokedToken(id=10, jti="jti-1", expires_at=datetime.utcnow() + timedelta(hours=1)))
+        await db_session.commit()
+        assert await worker.is_revoked(db_session, "jti-1")
+        assert worker.stats["db_checks"] == 1
+        
+        # A revocation committed late, with an id and timestamp below the newest one already read
+        seen = (await db_session.execute(select(RevokedToken.revoked_at))).scalar_one()
+        db_session.add(RevokedToken(
+            id=5, jti="jti-late", expires_at=datetime.utcnow() + timedelta(hours=1), revoked_at=seen - timedelta(seconds=5)
+        ))
+        await db_session.commit()
+        assert await worker.is_revoked(db_session, "jti-late")
+        
+        # Tokens without a jti predate revocation and are never looked up
+        assert not await worker.is_revoked(db_session, None)
+    
+    @pytest.mark.asyncio
+    async def test_revocation_during_rebuild_survives_the_swap(self, db_session, monkeypatch):
+        from datetime import datetime, timedelta
+        from app.config import settings
+        from app.services.revocation import RevocationList
+        from .conftest import TestSessionLocal
+        
+        monkeypatch.setattr(settings, "REVOCATION_REFRESH_SECONDS", 0)
+        monkeypatch.setattr(settings, "REVOCATION_REBUILD_SECONDS", 0)
+        worker = RevocationList(capacity=1000, error_rate=0.001)
+        
+        class RevokeAfterRebuildQuery:
+            """Logs a token out after the rebuild has read the table, before the filter swap"""
+            async def execute(self, query):
+                result = await db_session.execute(query)
+                async with TestSessionLocal() as other:
+                    await worker.revoke(other, "jti-racing", datetime.utcnow() + timedelta(hours=1))
+                return result
+        
+        await worker._refresh(RevokeAfterRebuildQuery())
+        assert "jti-racing" in worker._bloom
+
+
+class TestSQLiteTuning:
+    """Every new SQLite connection gets the configured PRAGMAs"""
+
+    @pytest.mark.asyncio
+    async def test_pragmas_applied_on_connect(self, tmp_path, monkeypatch):
+        from sqlalchemy import text
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from app.config import settings
+        from app.database import configure_sqlite
+        
+        monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 1234)
+        engine = configure_sqlite(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}"))
+        try:
+            async with engine.connect() as conn:
+                values = {
+                    pragma: (await conn.execute(text(f"PRAGMA {pragma}"))).scalar()
+                    for pragma in ("journal_mode", "synchronous", "busy_timeout", "temp_store", "cache_size")
+                }
+        finally:
+            await engine.dispose()
+        # synchronous NORMAL = 1, temp_store MEMORY = 2
+        assert values == {
+            "journal_mode": "wal", "synchronous": 1, "busy_timeout": 1234, "temp_store": 2, "cache_size": -65536
+        }
+
+
+class TestReadRouting:
+    """Read-only sessions use the read engine unless the client just wrote"""
+
+    @pytest.mark.asyncio
+    async def test_reads_stick_to_primary_after_a_write(self, monkeypatch):
+        from starlette.requests import Request
+        from app import database
+        
+        def request(method, token):
+            headers = [(b"authorization", f"Bearer {token}".encode())]
+            return Request({"type": "http", "method": method, "headers": headers, "client": ("10.0.0.1", 1)})
+        
+        async def engine_for(req):
+            dependency = database.get_read_db(req)
+            session = await dependency.__anext__()
+            await dependency.aclose()
+            return session.bind
+        
+        monkeypatch.setattr(database, "read_your_writes", database.ReadYourWrites(window_seconds=60, max_clients=10))
+        assert await engine_for(request("GET", "alice")) is database.read_engine
+        
+        # A committed write through get_db pins that client (only) to the primary
+        dependency = database.get_db(request("POST", "alice"))
+        await dependency.__anext__()
+        with pytest.raises(StopAsyncIteration):
+            await dependency.__anext__()
+        assert await engine_for(request("GET", "alice")) is database.engine
+        assert await engine_for(request("GET", "bob")) is database.read_engine
+        
+        database.read_your_writes.window_seconds = 0
+        database.read_your_writes.mark_write(request("POST", "alice"))
+        assert await engine_for(request("GET", "alice")) is database.read_engine
+
+
+class TestProjectTerms:
+    """Technologies and tags are interned once and indexed per project"""
+
+    @pytest.mark.asyncio
+    async def test_backfill_indexes_existing_projects(self, db_session):
+        from sqlalchemy import func, select
+        from app.models.user import Project, Term, User, project_tags, project_technologies
+        from app.services.terms import backfill_project_terms, term_filter
+        from .conftest import TestSessionLocal
+        
+        owner = User(email="terms@test.com")
+        db_session.add(owner)
+        await db_session.flush()
+        for n, stack in enumerate([["Python", "python "], ["Rust"], []]):
+            db_session.add(Project(title=f"p{n}", owner_id=owner.id, is_published=True, tech_stack=stack, tags=["CLI"]))
+        await db_session.commit()
+        
+        assert await backfill_project_terms(TestSessionLocal, batch_size=2) == 3
+        assert await backfill_project_terms(TestSessionLocal) == 0
+        
+        names = (await db_session.execute(select(Term.name).order_by(Term.name))).scalars().all()
+        assert names == ["cli", "python", "rust"]
+        assert await db_session.scalar(select(func.count()).select_from(project_technologies)) == 2
+        assert await db_session.scalar(select(func.count()).select_from(project_tags)) == 3
+        
+        condition = await term_filter(db_session, "tech", ["python", "rust"], "any")
+        matched = (await db_session.execute(select(Project.title).where(condition).order_by(Project.title))).scalars().all()
+        assert matched == ["p0", "p1"]
+        assert await term_filter(db_session, "tech", ["python", "go"], "all") is None
+
+    @pytest.mark.asyncio
+    async def test_interned_ids_are_cached_only_after_commit(self, db_session):
+        from app.services.terms import intern_terms, lookup_terms, term_ids
+
+        rolled_back = await intern_terms(db_session, ["go"])
+        assert await lookup_terms(db_session, ["go"]) == rolled_back
+        await db_session.rollback()
+        assert term_ids.get_many(["go"]) == {}
+        assert await lookup_terms(db_session, ["go"]) == {}
+
+        committed = await intern_terms(db_session, ["go"])
+        assert term_ids.get_many(["go"]) == {}
+        await db_session.commit()
+        assert term_ids.get_many(["go"]) == committed
+
+
+class TestFullTextIndex:
+    """The FTS index follows project writes and is rebuilt for pre-existing tables"""
+
+    @pytest.mark.asyncio
+    async def test_index_tracks_updates_and_rebuilds(self, db_session):
+        from sqlalchemy import select
+        from app.models.user import Project, User
+        from app.services.search import ProjectSearch, create_search_index
+        from .conftest import test_engine
+        
+        async def matches(text):
+            search = ProjectSearch.parse(db_session, text)
+            return (await db_session.execute(search.apply(select(Project.title)))).scalars().all()
+        
+        owner = User(email="fts@test.com")
+        db_session.add(owner)
+        await db_session.flush()
+        project = Project(title="Image classifier", description="CNN on CIFAR", owner_id=owner.id)
+        db_session.add(project)
+        await db_session.commit()
+        assert await matches("classif") == ["Image classifier"]
+        
+        project.title = "Sentiment model"
+        await db_session.commit()
+        assert await matches("classif") == []
+        assert await matches("sentiment cifar") == ["Sentiment model"]
+        
+        # A database that predates the index gets it filled on startup
+        async with test_engine.begin() as conn:
+            await conn.exec_driver_sql("DROP TABLE projects_fts")
+            await conn.run_sync(create_search_index)
+        assert await matches("sentim") == ["Sentiment model"]
+        
+        await db_session.delete(project)
+        await db_session.commit()
+        assert await matches("sentiment") == []
+
+
+class TestMemberCounts:
+    """member_count is recomputed from collaborators and added to existing tables"""
+
+    @pytest.mark.asyncio
+    async def test_reconcile_fixes_drifted_counts(self, db_session):
+        from sqlalchemy import insert, select
+        from app.models.user import Project, User, project_collaborators
+        from app.services.membership import reconcile_member_counts
+        from .conftest import TestSessionLocal
+        
+        users = [User(email=f"m{n}@test.com") for n in range(3)]
+        db_session.add_all(users)
+        await db_session.flush()
+        projects = [Project(title=f"p{n}", owner_id=users[0].id, member_count=count) for n, count in enumerate([1, 5, 1])]
+        db_session.add_all(projects)
+        await db_session.flush()
+        # Collaborators written behind the count's back
+        await db_session.execute(insert(project_collaborators), [
+            {"project_id": projects[2].id, "user_id": users[1].id},
+            {"project_id": projects[2].id, "user_id": users[2].id},
+        ])
+        await db_session.commit()
+        
+        assert await reconcile_member_counts(TestSessionLocal, batch_size=2) == 2
+        counts = await db_session.execute(select(Project.member_count).order_by(Project.id))
+        assert counts.scalars().all() == [1, 1, 3]
+        assert await reconcile_member_counts(TestSessionLocal) == 0
+
+    @pytest.mark.asyncio
+    async def test_missing_column_is_added_to_existing_table(self):
+        from sqlalchemy import inspect
+        from app.database import _add_missing_columns
+        from .conftest import test_engine
+        
+        async with test_engine.begin() as conn:
+            await conn.exec_driver_sql("INSERT INTO users (email) VALUES ('old@test.com')")
+            await conn.exec_driver_sql("INSERT INTO projects (title, owner_id) VALUES ('old', 1)")
+            await conn.exec_driver_sql("ALTER TABLE projects DROP COLUMN member_count")
+            await conn.run_sync(_add_missing_columns)
+            columns = await conn.run_sync(lambda sync: [c["name"] for c in inspect(sync).get_columns("projects")])
+            assert "member_count" in columns
+            assert (await conn.exec_driver_sql("SELECT member_count FROM projects")).scalar() == 1
@@ -115,6 +115,13 @@ export const AuthProvider = ({ children }) => {
 
   const logout = async () => {
     try {
+      // Revoke the backend token so it stops working before it expires
+      const token = localStorage.getItem('token');
+      if (token) {
+        await axios.post(`${API_URL}/api/auth/logout`, null, {
+          headers: { Authorization: `Bearer ${token}` }
+        }).catch(() => {});
+      }
       await logOut();
       localStorage.removeItem('token');
       setUser(null);
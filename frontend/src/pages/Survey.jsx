@@ -13,11 +13,13 @@ import {
   Loader2
 } from 'lucide-react';
 import Navbar from '../components/Navbar';
+import { surveyAPI } from '../services/api';
 
 const Survey = ({ setRecommendations, setUserData }) => {
   const navigate = useNavigate();
   const [currentStep, setCurrentStep] = useState(0);
   const [isSubmitting, setIsSubmitting] = useState(false);
+  const [speculationId, setSpeculationId] = useState(null);
   const [formData, setFormData] = useState({
     // Personal Info
     name: '',
@@ -266,8 +268,24 @@ const Survey = ({ setRecommendations, setUserData }) => {
     });
   };
 
+  const prefetchRecommendations = async () => {
+    // Everything that drives the recommendations is known before the last step,
+    // so start generating while the student answers it
+    const { time_commitment, project_duration, team_preference, collaboration_tools, ...partialData } = formData;
+    try {
+      const data = await surveyAPI.prefetchRecommendations(partialData);
+      setSpeculationId(data.fingerprint);
+    } catch (error) {
+      // Prefetch is best-effort - submit still works without it
+      console.warn('Recommendation prefetch failed:', error);
+    }
+  };
+
   const handleNext = () => {
     if (currentStep < steps.length - 1) {
+      if (currentStep === steps.length - 2) {
+        prefetchRecommendations();
+      }
       setCurrentStep(prev => prev + 1);
     }
   };
@@ -285,6 +303,7 @@ const Survey = ({ setRecommendations, setUserData }) => {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...(speculationId ? { 'X-Speculation-Id': speculationId } : {}),
         },
         body: JSON.stringify(formData),
       });
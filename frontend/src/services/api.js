@@ -120,6 +120,11 @@ export const surveyAPI = {
     body: JSON.stringify(data),
   }),
 
+  prefetchRecommendations: (partialData) => apiCall('/api/survey/prefetch', {
+    method: 'POST',
+    body: JSON.stringify(partialData),
+  }),
+
   getQuestions: () => apiCall('/api/survey/questions'),
 
   getRecommendations: () => apiCall('/api/survey/recommendations'),
@@ -148,6 +153,11 @@ export const projectsAPI = {
     method: 'DELETE',
   }),
 
+  regenerateRoadmap: (uuid, week, taskIndex = null, instructions = null) => apiCall(`/projects/${uuid}/regenerate`, {
+    method: 'POST',
+    body: JSON.stringify({ week, task_index: taskIndex, instructions }),
+  }),
+
   completeTask: (uuid, taskId) => apiCall(`/projects/${uuid}/complete-task`, {
     method: 'POST',
     body: JSON.stringify({ task_id: taskId }),
@@ -201,6 +211,47 @@ export const aiAPI = {
     method: 'POST',
     body: JSON.stringify({ project_id: projectId, question }),
   }),
+
+  // Streams the answer over Server-Sent Events; onToken receives each text chunk
+  streamProjectHelp: async (projectId, question, { onSources, onToken } = {}) => {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${API_URL}/api/ai/help`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'text/event-stream',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify({ project_id: projectId, question }),
+    });
+    if (!response.ok) {
+      const data = await response.json().catch(() => ({}));
+      throw new ApiError(data.detail || `Request failed with status ${response.status}`, response.status, data.error_code);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split('\n\n');
+      buffer = events.pop();
+      for (const block of events) {
+        const event = block.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] || '{}');
+        if (event === 'sources') onSources?.(data);
+        if (event === 'token') {
+          answer += data.text;
+          onToken?.(data.text);
+        }
+        if (event === 'error') throw new ApiError(data.detail, 500, 'AI_ERROR');
+      }
+    }
+    return answer;
+  },
 };
 
 // Users API